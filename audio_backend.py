@@ -0,0 +1,563 @@
+"""
+Auto Mute - Audio Backends
+
+Pluggable access to the system mute state.
+
+PycawBackend keeps a long-lived IAudioEndpointVolume handle per COM thread and
+only re-activates it after a failure or a default device change, so a check is
+a single GetMute call instead of GetSpeakers + Activate + cast + Release.
+FakeAudioBackend keeps the state in memory so the core can run and be
+benchmarked without Windows audio.
+
+Besides the default speakers, backends can enumerate every active render
+endpoint and mute them all in parallel through a bounded worker pool
+(set_mute_all), reporting per-device results and timing.
+
+Backends can also report mute changes made by anyone (pycaw's
+IAudioEndpointVolumeCallback, simulated events in the fake) so the daemon can
+re-assert the schedule without polling.
+
+The master volume level of the default device can be read and set as a
+0.0-1.0 scalar (get_volume / set_volume) for fading (see volume_fade.py),
+through the same cached endpoint handle as the mute calls.
+
+Usage:
+    from audio_backend import PycawBackend, FakeAudioBackend
+
+    backend = PycawBackend()
+    backend.set_mute(True)
+    backend.get_mute()   # True
+    backend.stats()      # activations, activations_per_hour, ...
+    backend.add_mute_listener(lambda muted: print("now muted:", muted))
+"""
+
+import collections
+import concurrent.futures
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+
+class DeviceResult(NamedTuple):
+    """Outcome of a mute/unmute call on one endpoint."""
+    device_id: str
+    ok: bool
+    seconds: float
+    muted: Optional[bool] = None
+    error: Optional[str] = None
+
+
+class AudioBackend:
+    """
+    Interface for reading and changing the system mute state.
+
+    Attributes:
+        activations: Number of endpoint activations performed so far
+        get_calls: Number of get_mute() calls
+        set_calls: Number of set_mute() calls
+        volume_calls: Number of get_volume() / set_volume() calls
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.activations = 0
+        self.get_calls = 0
+        self.set_calls = 0
+        self.volume_calls = 0
+        self.notifications = 0
+        self._created = time.monotonic()
+        self._mute_listeners: List[Callable[[bool], None]] = []
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    # Worker pool bound for multi-device fan-out
+    max_workers = 32
+
+    def get_mute(self) -> bool:
+        """Return the current mute state. Raises on failure."""
+        raise NotImplementedError
+
+    def set_mute(self, mute: bool):
+        """Mute or unmute. Raises on failure."""
+        raise NotImplementedError
+
+    def get_volume(self) -> float:
+        """Return the master volume level of the default device (0.0-1.0). Raises on failure."""
+        raise NotImplementedError
+
+    def set_volume(self, level: float):
+        """Set the master volume level of the default device (0.0-1.0). Raises on failure."""
+        raise NotImplementedError
+
+    def list_endpoints(self) -> List[str]:
+        """Return the IDs of all active render endpoints."""
+        raise NotImplementedError
+
+    def get_device_mute(self, device_id: str) -> bool:
+        """Return the mute state of one endpoint. Raises on failure."""
+        raise NotImplementedError
+
+    def set_device_mute(self, device_id: str, mute: bool):
+        """Mute or unmute one endpoint. Raises on failure."""
+        raise NotImplementedError
+
+    def _worker_init(self):
+        """Per-thread setup for pool workers (e.g. COM initialization)."""
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="audio-endpoint",
+                    initializer=self._worker_init,
+                )
+            return self._executor
+
+    def _fan_out(self, call: Callable[[str], Optional[bool]]) -> List[DeviceResult]:
+        """Run call(device_id) for every endpoint in parallel."""
+        def timed(device_id):
+            started = time.perf_counter()
+            try:
+                muted = call(device_id)
+                return DeviceResult(device_id, True, time.perf_counter() - started, muted)
+            except Exception as e:
+                return DeviceResult(device_id, False, time.perf_counter() - started, None, str(e))
+
+        device_ids = self.list_endpoints()
+        if len(device_ids) <= 1:
+            return [timed(device_id) for device_id in device_ids]
+        return list(self._pool().map(timed, device_ids))
+
+    def get_mute_all(self) -> List[DeviceResult]:
+        """Read the mute state of every active endpoint in parallel."""
+        return self._fan_out(self.get_device_mute)
+
+    def set_mute_all(self, mute: bool) -> List[DeviceResult]:
+        """
+        Mute or unmute every active endpoint in parallel.
+
+        Args:
+            mute: Desired mute state
+
+        Returns:
+            One DeviceResult per endpoint, in enumeration order
+        """
+        def apply(device_id):
+            self.set_device_mute(device_id, mute)
+            return mute
+        return self._fan_out(apply)
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def invalidate(self):
+        """Drop cached handles so the next call re-activates the endpoint."""
+
+    def release(self):
+        """Release handles owned by the calling thread (call before CoUninitialize)."""
+
+    def add_mute_listener(self, callback: Callable[[bool], None]) -> bool:
+        """
+        Register a callback for mute changes made by anyone.
+
+        Args:
+            callback: Called with the new mute state, possibly from another thread
+
+        Returns:
+            True if this backend delivers change notifications
+        """
+        return False
+
+    def _notify_mute(self, muted: bool):
+        """Dispatch a mute change to the registered listeners."""
+        self.notifications += 1
+        for callback in list(self._mute_listeners):
+            try:
+                callback(muted)
+            except Exception as e:
+                print(f"[WARNING] Mute listener failed: {e}")
+
+    def stats(self) -> dict:
+        """
+        Summarize backend usage.
+
+        Returns:
+            Dictionary with call counts and activations per hour
+        """
+        hours = max(time.monotonic() - self._created, 1e-9) / 3600
+        return {
+            "backend": self.name,
+            "activations": self.activations,
+            "activations_per_hour": self.activations / hours,
+            "get_calls": self.get_calls,
+            "set_calls": self.set_calls,
+            "volume_calls": self.volume_calls,
+            "notifications": self.notifications,
+        }
+
+
+class PycawBackend(AudioBackend):
+    """
+    Windows default speakers through pycaw, with cached endpoint handles.
+
+    COM interface pointers belong to the apartment of the thread that created
+    them, so handles are pooled per thread. A default device change bumps a
+    generation counter and each thread re-activates on its next call.
+
+    Change notifications are registered on the handle of the thread that
+    called add_mute_listener() and re-registered whenever that handle is
+    re-activated.
+
+    For multi-device muting the list of active render endpoints is cached
+    until a device is added, removed or changes state, and each pool worker
+    keeps its own per-device handles.
+    """
+
+    name = "pycaw"
+
+    # IMMDeviceEnumerator::EnumAudioEndpoints arguments
+    E_RENDER = 0
+    DEVICE_STATE_ACTIVE = 0x1
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+        self._generation = 0
+        self._endpoint_ids: Optional[List[str]] = None
+        self._device_listener = None
+        self._register_device_listener()
+
+    def _register_device_listener(self):
+        """Invalidate handles when render devices change."""
+        try:
+            from pycaw.callbacks import MMNotificationClient
+            from pycaw.pycaw import AudioUtilities
+        except ImportError:
+            # Older pycaw: handles are still re-activated after a failure
+            return
+
+        backend = self
+
+        class _DeviceListener(MMNotificationClient):
+            def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                backend.invalidate()
+
+            def on_device_added(self, added_device_id):
+                backend._endpoint_ids = None
+
+            def on_device_removed(self, removed_device_id):
+                backend._endpoint_ids = None
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                backend._endpoint_ids = None
+
+        try:
+            enumerator = AudioUtilities.GetDeviceEnumerator()
+            listener = _DeviceListener()
+            enumerator.RegisterEndpointNotificationCallback(listener)
+            self._device_listener = (enumerator, listener)
+        except Exception as e:
+            print(f"[WARNING] Could not watch audio device changes: {e}")
+
+    def _activate(self, device_id: Optional[str] = None):
+        """
+        Activate an endpoint volume handle on the calling thread.
+
+        Args:
+            device_id: Endpoint to activate (default: the default speakers)
+
+        Returns:
+            (interface, volume): the COM pointer to release and its
+            IAudioEndpointVolume view
+        """
+        import ctypes
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        if device_id is None:
+            device = AudioUtilities.GetSpeakers()
+        else:
+            device = AudioUtilities.GetDeviceEnumerator().GetDevice(device_id)
+        interface = device.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        return interface, ctypes.cast(interface, ctypes.POINTER(IAudioEndpointVolume))
+
+    def _endpoint(self):
+        """Return this thread's cached endpoint volume, activating if needed."""
+        local = self._local
+        if getattr(local, "volume", None) is not None and local.generation == self._generation:
+            return local.volume
+
+        self.release()
+
+        local.interface, local.volume = self._activate()
+        local.generation = self._generation
+        self.activations += 1
+
+        if getattr(local, "watching", False):
+            self._register_mute_callback(local)
+        return local.volume
+
+    def _register_mute_callback(self, local):
+        """Register the endpoint volume callback on this thread's handle."""
+        from pycaw.callbacks import AudioEndpointVolumeCallback
+
+        backend = self
+
+        class _MuteCallback(AudioEndpointVolumeCallback):
+            def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+                backend._notify_mute(bool(new_mute))
+
+        callback = _MuteCallback()
+        local.volume.RegisterControlChangeNotify(callback)
+        local.mute_callback = callback
+
+    def add_mute_listener(self, callback: Callable[[bool], None]) -> bool:
+        try:
+            import pycaw.callbacks  # noqa: F401  (older pycaw has no callbacks)
+        except ImportError:
+            return False
+
+        self._mute_listeners.append(callback)
+        local = self._local
+        if getattr(local, "watching", False):
+            return True
+        try:
+            local.watching = True
+            self._endpoint()
+            if getattr(local, "mute_callback", None) is None:
+                self._register_mute_callback(local)
+            return True
+        except Exception as e:
+            print(f"[WARNING] Could not register mute notifications: {e}")
+            local.watching = False
+            self._mute_listeners.remove(callback)
+            return False
+
+    def _call(self, method: str, *args):
+        """Call a method on the cached endpoint, re-activating once on failure."""
+        try:
+            return getattr(self._endpoint(), method)(*args)
+        except Exception:
+            # Stale handle (device removed, audio service restarted): retry fresh
+            self.release()
+            return getattr(self._endpoint(), method)(*args)
+
+    def get_mute(self) -> bool:
+        self.get_calls += 1
+        return bool(self._call("GetMute"))
+
+    def set_mute(self, mute: bool):
+        self.set_calls += 1
+        self._call("SetMute", mute, None)
+
+    def get_volume(self) -> float:
+        self.volume_calls += 1
+        return float(self._call("GetMasterVolumeLevelScalar"))
+
+    def set_volume(self, level: float):
+        self.volume_calls += 1
+        self._call("SetMasterVolumeLevelScalar", min(1.0, max(0.0, level)), None)
+
+    def list_endpoints(self) -> List[str]:
+        endpoint_ids = self._endpoint_ids
+        if endpoint_ids is None:
+            from pycaw.pycaw import AudioUtilities
+
+            enumerator = AudioUtilities.GetDeviceEnumerator()
+            collection = enumerator.EnumAudioEndpoints(self.E_RENDER, self.DEVICE_STATE_ACTIVE)
+            endpoint_ids = [collection.Item(i).GetId() for i in range(collection.GetCount())]
+            self._endpoint_ids = endpoint_ids
+        return endpoint_ids
+
+    def _device_endpoint(self, device_id: str):
+        """Return this thread's cached endpoint volume for a device."""
+        handles = getattr(self._local, "device_handles", None)
+        if handles is None:
+            handles = self._local.device_handles = {}
+
+        cached = handles.get(device_id)
+        if cached is not None and cached[2] == self._generation:
+            return cached[1]
+        if cached is not None:
+            self._release_device(handles, device_id)
+
+        interface, volume = self._activate(device_id)
+        handles[device_id] = (interface, volume, self._generation)
+        self.activations += 1
+        return volume
+
+    def _release_device(self, handles: dict, device_id: str):
+        interface = handles.pop(device_id)[0]
+        try:
+            interface.Release()
+        except Exception:
+            pass
+
+    def _device_call(self, device_id: str, method: str, *args):
+        """Call a method on a device's cached endpoint, re-activating once on failure."""
+        try:
+            return getattr(self._device_endpoint(device_id), method)(*args)
+        except Exception:
+            handles = getattr(self._local, "device_handles", {})
+            if device_id in handles:
+                self._release_device(handles, device_id)
+            return getattr(self._device_endpoint(device_id), method)(*args)
+
+    def get_device_mute(self, device_id: str) -> bool:
+        self.get_calls += 1
+        return bool(self._device_call(device_id, "GetMute"))
+
+    def set_device_mute(self, device_id: str, mute: bool):
+        self.set_calls += 1
+        self._device_call(device_id, "SetMute", mute, None)
+
+    def _worker_init(self):
+        import comtypes
+        comtypes.CoInitialize()
+
+    def invalidate(self):
+        self._generation += 1
+        self._endpoint_ids = None
+
+    def release(self):
+        local = self._local
+        handles = getattr(local, "device_handles", None) or {}
+        for device_id in list(handles):
+            self._release_device(handles, device_id)
+
+        interface = getattr(local, "interface", None)
+        volume = getattr(local, "volume", None)
+        callback = getattr(local, "mute_callback", None)
+        local.interface = None
+        local.volume = None
+        local.mute_callback = None
+        if callback is not None and volume is not None:
+            try:
+                volume.UnregisterControlChangeNotify(callback)
+            except Exception:
+                pass
+        if interface:
+            # Explicitly release the COM pointer to prevent cleanup errors
+            try:
+                interface.Release()
+            except Exception:
+                pass
+
+
+class FakeAudioBackend(AudioBackend):
+    """
+    In-memory backend for running and benchmarking the core off Windows.
+
+    Every change to the default device (ours or a simulated user's) is
+    delivered to mute listeners and recorded in history, so
+    manual-unmute-to-re-mute latency can be measured with remute_latencies().
+
+    Attributes:
+        devices: Simulated endpoints, device ID -> muted; the first is the default
+        latency: Seconds each call sleeps to mimic a slow device
+        fail_next: Number of upcoming calls that should raise
+        failing_devices: Device IDs whose calls always raise
+        history: Recent (perf_counter, muted, source) changes of the default device
+        volume: Master volume level of the default device
+        volume_history: Recent (perf_counter, level) set_volume() calls
+    """
+
+    name = "fake"
+
+    def __init__(self, muted: bool = False, latency: float = 0.0, device_count: int = 1):
+        super().__init__()
+        self.devices = {f"fake-{i}": bool(muted) for i in range(device_count)}
+        self.default_device = "fake-0"
+        self.latency = latency
+        self.fail_next = 0
+        self.failing_devices = set()
+        self.history = collections.deque(maxlen=10000)
+        self.volume = 1.0
+        self.volume_history = collections.deque(maxlen=10000)
+        self._active = set()
+        self._lock = threading.Lock()
+
+    @property
+    def muted(self) -> bool:
+        return self.devices[self.default_device]
+
+    def _endpoint(self, device_id: str, counter: str):
+        # Sleep outside the lock so parallel calls overlap like real devices
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            if device_id in self.failing_devices:
+                raise OSError(f"simulated failure on {device_id}")
+            if self.fail_next:
+                self.fail_next -= 1
+                self._active.discard(device_id)
+                raise OSError("simulated endpoint failure")
+            if device_id not in self._active:
+                self._active.add(device_id)
+                self.activations += 1
+
+    def get_mute(self) -> bool:
+        return self.get_device_mute(self.default_device)
+
+    def _change(self, device_id: str, mute: bool, source: str):
+        with self._lock:
+            self.devices[device_id] = bool(mute)
+            if device_id != self.default_device:
+                return
+            self.history.append((time.perf_counter(), bool(mute), source))
+        self._notify_mute(bool(mute))
+
+    def set_mute(self, mute: bool):
+        self.set_device_mute(self.default_device, mute)
+
+    def get_volume(self) -> float:
+        self._endpoint(self.default_device, "volume_calls")
+        return self.volume
+
+    def set_volume(self, level: float):
+        self._endpoint(self.default_device, "volume_calls")
+        with self._lock:
+            self.volume = min(1.0, max(0.0, level))
+            self.volume_history.append((time.perf_counter(), self.volume))
+
+    def simulate_user_change(self, mute: bool):
+        """Change the mute state as if the user clicked the volume flyout."""
+        self._change(self.default_device, mute, "user")
+
+    def list_endpoints(self) -> List[str]:
+        return list(self.devices)
+
+    def get_device_mute(self, device_id: str) -> bool:
+        self._endpoint(device_id, "get_calls")
+        return self.devices[device_id]
+
+    def set_device_mute(self, device_id: str, mute: bool):
+        self._endpoint(device_id, "set_calls")
+        self._change(device_id, mute, "app")
+
+    def add_mute_listener(self, callback: Callable[[bool], None]) -> bool:
+        self._mute_listeners.append(callback)
+        return True
+
+    def invalidate(self):
+        with self._lock:
+            self._active.clear()
+
+    def remute_latencies(self) -> List[float]:
+        """Seconds from each user change until the app set the state back."""
+        latencies = []
+        user_change = None
+        for timestamp, muted, source in list(self.history):
+            if source == "user":
+                user_change = (timestamp, muted)
+            elif user_change is not None and muted != user_change[1]:
+                latencies.append(timestamp - user_change[0])
+                user_change = None
+        return latencies
@@ -6,8 +6,14 @@ Main script that runs the auto-mute functionality.
 Use --tray flag to enable system tray icon.
 
 Usage:
-    python auto_mute.py          # Console mode
-    python auto_mute.py --tray   # With system tray icon
+    python auto_mute.py                    # Console mode
+    python auto_mute.py --tray             # With system tray icon
+    python auto_mute.py --startup-profile  # Report startup and import cost, then exit
+
+Heavy modules (comtypes, pycaw, keyboard, plyer, pystray, PIL) are imported
+on first use, and the schedule is enforced once before the hotkey and tray
+icon are set up, so the first mute decision after login is not held up by UI
+dependencies.
 
 Note: The tray icon may show harmless COM cleanup errors on exit. 
 These are from the pycaw library and don't affect operation.
@@ -16,13 +22,31 @@ When running via pythonw.exe (as in run_auto_mute.vbs), these errors are hidden.
 
 import sys
 import time
+
+# Startup timing reported by --startup-profile
+_STARTED = time.perf_counter()
+import_times = {}
+
+import importlib
 import threading
-import keyboard
-import auto_mute_core
-import comtypes
 import warnings
 import os
 
+
+def _import(name):
+    """Import a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        import_times[name] = time.perf_counter() - started
+    return module
+
+
+auto_mute_core = _import("auto_mute_core")
+mute_scheduler = _import("mute_scheduler")
+metrics = _import("metrics")
+
 # Suppress resource warnings
 warnings.filterwarnings("ignore", category=ResourceWarning)
 
@@ -45,13 +69,32 @@ class SuppressComErrors:
 # Only suppress errors in tray mode
 if "--tray" in sys.argv:
     sys.stderr = SuppressComErrors(sys.stderr)
+
+
+def enforce_now():
+    """
+    Evaluate the schedule and enforce it once on the calling thread.
+
+    Runs before the hotkey and tray icon are set up; COM must already be
+    initialized. Returns seconds since the script started.
+    """
+    _import("comtypes")
+    _import("pycaw.pycaw")
+    auto_mute_core.check_mute_time()
+    elapsed = time.perf_counter() - _STARTED
+    metrics.observe("time_to_first_enforcement", elapsed)
+    return elapsed
+
+
 def toggle_auto_mute():
     """Toggle auto-mute on/off via hotkey."""
-    auto_mute_core.auto_mute_enabled = not auto_mute_core.auto_mute_enabled
-    status = "ENABLED" if auto_mute_core.auto_mute_enabled else "DISABLED"
+    # Runs on the keyboard hook thread; the scheduler is woken by the state change
+    enabled = auto_mute_core.toggle_auto_mute("hotkey")
+    status = "ENABLED" if enabled else "DISABLED"
     auto_mute_core.send_notification(
         "Auto-Mute Toggle",
-        f"Auto-mute is now {status}"
+        f"Auto-mute is now {status}",
+        key="toggle"
     )
     print(f"\nAuto-mute {status}")
 
@@ -59,6 +102,7 @@ def toggle_auto_mute():
 def setup_hotkey():
     """Setup the global hotkey (Ctrl+Shift+M) to toggle auto-mute."""
     try:
+        keyboard = _import("keyboard")
         keyboard.add_hotkey('ctrl+shift+m', toggle_auto_mute)
         print("Hotkey registered: Ctrl+Shift+M")
         return True
@@ -78,79 +122,125 @@ def run_console_mode():
     print("Auto-mute is ENABLED")
     
     # Initialize COM for this thread (required for audio utilities)
+    comtypes = _import("comtypes")
     comtypes.CoInitialize()
     
+    # Enforce the schedule before anything else is set up
+    elapsed = enforce_now()
+    print(f"Schedule enforced {elapsed * 1000:.0f} ms after start")
+    
+    # Reload config.json as soon as it changes (e.g. saved from config_gui.py)
+    auto_mute_core.start_config_watcher()
+    auto_mute_core.start_metrics_writer()
+    auto_mute_core.start_journal()
+    auto_mute_core.start_fleet_agent()
+    
+    # Enforce at each schedule boundary instead of polling every minute
+    scheduler = mute_scheduler.MuteScheduler(
+        auto_mute_core.check_mute_time,
+        auto_mute_core.get_compiled_schedule,
+        heartbeat=auto_mute_core.get_heartbeat(),
+        lead=auto_mute_core.get_fade_lead,
+    )
+    auto_mute_core.active_scheduler = scheduler
+    
+    def run_scheduler():
+        # COM is per-thread, so the scheduler thread needs its own init
+        comtypes.CoInitialize()
+        try:
+            # With endpoint notifications, manual unmutes are corrected as they
+            # happen, so the scheduler only needs to wake at transitions
+            if auto_mute_core.enable_mute_events():
+                scheduler.max_wait = None
+                print("Mute change notifications enabled")
+            scheduler.run()
+        finally:
+            auto_mute_core.release_audio_thread()
+            comtypes.CoUninitialize()
+    
+    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+    scheduler_thread.start()
+    
     setup_hotkey()
     auto_mute_core.send_notification(
         "Auto-Mute Started",
         "Running in console mode. Press Ctrl+Shift+M to toggle."
     )
     
-    # Clear any existing scheduled jobs
-    auto_mute_core.schedule.clear()
-    
-    # Schedule the check to run every minute
-    auto_mute_core.schedule.every(1).minutes.do(auto_mute_core.check_mute_time)
-    
-    # Run initial check
-    auto_mute_core.check_mute_time()
-    
     print("\nPress Ctrl+C to exit...")
     try:
-        while True:
-            auto_mute_core.schedule.run_pending()
-            time.sleep(1)
+        # time.sleep stays interruptible by Ctrl+C on Windows, unlike Event.wait
+        while scheduler_thread.is_alive():
+            time.sleep(3600)
     except KeyboardInterrupt:
         print("\n\nShutting down Auto-Mute...")
         auto_mute_core.send_notification("Auto-Mute", "Auto-mute stopped")
+        stats = auto_mute_core.get_audio_backend().stats()
+        print(f"Audio endpoint activations: {stats['activations']} "
+              f"({stats['activations_per_hour']:.2f}/hour)")
     finally:
-        # Cleanup scheduler
-        auto_mute_core.schedule.clear()
+        # Stop the scheduler
+        scheduler.stop()
+        scheduler_thread.join(timeout=2)
+        auto_mute_core.active_scheduler = None
+        auto_mute_core.stop_config_watcher()
+        auto_mute_core.stop_metrics_writer()
+        auto_mute_core.stop_fleet_agent()
+        auto_mute_core.stop_volume_fader()
+        auto_mute_core.stop_journal()
+        auto_mute_core.flush_notifications()
         # Cleanup COM when exiting
+        auto_mute_core.release_audio_thread()
         comtypes.CoUninitialize()
 
 
 def run_tray_mode():
     """Run with system tray icon."""
-    try:
-        import task_bar_icon
-    except ImportError:
-        print("Error: task_bar_icon module not found or dependencies missing.")
-        print("Please install: pip install pystray Pillow")
-        sys.exit(1)
-    
     print("Starting Auto-Mute with system tray icon...")
     print("(May take a moment to initialize system tray...)")
     
-    # Keep notifications enabled (they work fine)
-    # Just make sure they're initialized before pystray
-    
     # Initialize COM for main thread (required for audio utilities)
+    comtypes = _import("comtypes")
     try:
         comtypes.CoInitialize()
     except Exception as e:
         print(f"Warning: COM initialization had issues: {e}")
     
-    # Setup hotkey (non-fatal if fails)
-    try:
-        setup_hotkey()
-    except Exception as e:
-        print(f"Warning: Hotkey setup failed: {e}")
-    
-    # Send startup notification while COM is ready
     try:
-        auto_mute_core.send_notification(
-            "Auto-Mute Started",
-            "Running with system tray icon. Press Ctrl+Shift+M to toggle."
-        )
-    except Exception as e:
-        print(f"Warning: Notification failed: {e}")
-    
-    # Setup and run tray icon (pass the core module)
-    # Note: task_bar_icon.setup_tray_icon blocks until the icon is closed
-    try:
-        # Clear any existing scheduled jobs before starting
-        auto_mute_core.schedule.clear()
+        # Enforce the schedule before pystray and PIL are even imported
+        try:
+            enforce_now()
+        except Exception as e:
+            print(f"Warning: Initial enforcement failed: {e}")
+        
+        try:
+            task_bar_icon = _import("task_bar_icon")
+        except ImportError:
+            print("Error: task_bar_icon module not found or dependencies missing.")
+            print("Please install: pip install pystray Pillow")
+            sys.exit(1)
+        
+        # Setup hotkey (non-fatal if fails)
+        try:
+            setup_hotkey()
+        except Exception as e:
+            print(f"Warning: Hotkey setup failed: {e}")
+        
+        # Send startup notification while COM is ready
+        try:
+            auto_mute_core.send_notification(
+                "Auto-Mute Started",
+                "Running with system tray icon. Press Ctrl+Shift+M to toggle."
+            )
+        except Exception as e:
+            print(f"Warning: Notification failed: {e}")
+        
+        # Setup and run tray icon (pass the core module)
+        # Note: task_bar_icon.setup_tray_icon blocks until the icon is closed
+        auto_mute_core.start_config_watcher()
+        auto_mute_core.start_metrics_writer()
+        auto_mute_core.start_journal()
+        auto_mute_core.start_fleet_agent()
         task_bar_icon.setup_tray_icon(auto_mute_core)
     except Exception as e:
         print(f"[ERROR] Tray mode crashed: {e}")
@@ -159,21 +249,54 @@ def run_tray_mode():
         # Allow graceful fallback
         raise
     finally:
-        # Cleanup scheduler
-        try:
-            auto_mute_core.schedule.clear()
-        except:
-            pass
+        auto_mute_core.stop_config_watcher()
+        auto_mute_core.stop_metrics_writer()
+        auto_mute_core.stop_fleet_agent()
+        auto_mute_core.stop_volume_fader()
+        auto_mute_core.stop_journal()
+        auto_mute_core.flush_notifications()
         # Cleanup COM when exiting
         try:
+            auto_mute_core.release_audio_thread()
             comtypes.CoUninitialize()
         except:
             pass
 
 
+def run_startup_profile():
+    """Report time-to-first-enforcement and per-import cost, then exit."""
+    comtypes = _import("comtypes")
+    comtypes.CoInitialize()
+    try:
+        first_enforcement = enforce_now()
+        imported_before = list(import_times)
+        
+        # What the full startup would import after the first enforcement
+        for name in ("keyboard", "plyer", "PIL.Image", "pystray", "task_bar_icon"):
+            try:
+                _import(name)
+            except Exception as e:
+                print(f"[WARNING] Could not import {name}: {e}")
+    finally:
+        auto_mute_core.release_audio_thread()
+        comtypes.CoUninitialize()
+    
+    print("Imports before first enforcement:")
+    for name in imported_before:
+        print(f"  {name:<16} {import_times[name] * 1000:8.1f} ms")
+    print(f"Time to first enforcement: {first_enforcement * 1000:.1f} ms")
+    print(f"  (mute state: {auto_mute_core.state.desired})")
+    print("Deferred imports (after first enforcement):")
+    for name in import_times:
+        if name not in imported_before:
+            print(f"  {name:<16} {import_times[name] * 1000:8.1f} ms")
+
+
 def main():
     """Main entry point."""
-    if "--tray" in sys.argv:
+    if "--startup-profile" in sys.argv:
+        run_startup_profile()
+    elif "--tray" in sys.argv:
         run_tray_mode()
     else:
         run_console_mode()
@@ -188,3 +311,5 @@ if __name__ == "__main__":
         print(f"[ERROR] {e}")
         import traceback
         traceback.print_exc()
+        # Non-zero so the supervisor logs it as a crash
+        sys.exit(1)
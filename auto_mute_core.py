@@ -8,12 +8,16 @@ import datetime
 import time
 import json
 import os
-import ctypes
-import schedule
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from comtypes import CLSCTX_ALL
-from plyer import notification
 import warnings
+from schedule_index import CompiledSchedule, DAYS, iter_transitions, parse_time
+from config_cache import ConfigCache, ConfigWatcher
+from mute_scheduler import WakeDebouncer
+from mute_state import MuteState
+import metrics
+
+# The GUI push listener, journal, fleet fetcher, volume fader, session index,
+# notifications and audio backend are imported by the functions that start
+# them, so the first mute check does not wait for modules it may never use
 
 # Suppress resource warnings
 warnings.filterwarnings("ignore", category=ResourceWarning)
@@ -21,29 +25,91 @@ warnings.filterwarnings("ignore", category=ResourceWarning)
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
+METRICS_JSON_FILE = os.path.join(SCRIPT_DIR, "metrics.json")
+METRICS_PROM_FILE = os.path.join(SCRIPT_DIR, "metrics.prom")
+JOURNAL_DIR = os.path.join(SCRIPT_DIR, "journal")
+REMOTE_CACHE_FILE = os.path.join(SCRIPT_DIR, "config.remote.json")
 
-# Global state
-auto_mute_enabled = True
-last_mute_state = None
-last_notification_time = None
+# Paused/enabled, last enforced and desired mute state, shared by the hotkey,
+# tray, endpoint notification and scheduler threads
+state = MuteState()
 notifications_enabled = True  # Can be disabled in tray mode to avoid COM conflicts
 
+# Background notification queue (created on first use, see get_notification_dispatcher)
+notification_dispatcher = None
+
+# Audio backend (PycawBackend unless replaced with set_audio_backend)
+audio_backend = None
+
+# Per-device results of the last multi-device mute/unmute
+last_device_results = []
+
+# Per-application session muting (used when config.json has "app_rules")
+session_index = None
+session_provider = None
+_app_rules = None
+_app_rules_version = None
+_sessions_muted_by_us = set()
+
+# Transition scheduler driving check_mute_time (set by auto_mute.py / task_bar_icon.py)
+active_scheduler = None
+
+def uses_fleet_schedule(schedule_data):
+    """Whether the schedule comes from a fleet URL or controller rather than config.json."""
+    settings = schedule_data.get("settings", {})
+    return bool(settings.get("remote_config_url") or settings.get("fleet_controller"))
+
+def compile_schedule(schedule_data):
+    """
+    Compile config.json, using the cached fleet schedule if "remote_config_url"
+    or "fleet_controller" is set and merging in any "calendars" (.ics files).
+    """
+    dependencies = []
+    if uses_fleet_schedule(schedule_data):
+        from remote_config import effective_config
+        schedule_data = effective_config(schedule_data, REMOTE_CACHE_FILE)
+        dependencies.append(REMOTE_CACHE_FILE)
+    if not schedule_data.get("calendars"):
+        compiled = CompiledSchedule(schedule_data)
+    else:
+        import ics_import
+        merged, calendar_paths, expires = ics_import.merge_calendars(schedule_data, SCRIPT_DIR)
+        compiled = CompiledSchedule(merged)
+        dependencies.extend(calendar_paths)
+        compiled.expires = expires
+    compiled.dependencies = dependencies
+    compiled.source = schedule_data
+    return compiled
+
+# Parsed config and compiled schedule, reloaded only when config.json (or a calendar) changes
+config_cache = ConfigCache(CONFIG_FILE, compile=compile_schedule)
+config_cache.add_listener(lambda: wake_scheduler("config"))
+_config_watcher = None
+_config_server = None
+_remote_fetcher = None
+_fleet_agent = None
+_metrics_writer = None
+_journal = None
+_volume_fader = None
+
+def get_audio_backend():
+    """Return the active audio backend, creating the pycaw backend on first use."""
+    global audio_backend
+    if audio_backend is None:
+        from audio_backend import PycawBackend
+        audio_backend = PycawBackend()
+    return audio_backend
+
+def set_audio_backend(backend):
+    """Replace the audio backend (e.g. with FakeAudioBackend for testing)."""
+    global audio_backend
+    audio_backend = backend
+
 def get_volume_mute_state():
     """Get current mute state of system volume."""
     try:
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = ctypes.cast(interface, ctypes.POINTER(IAudioEndpointVolume))
-        mute_state = volume.GetMute()
-        
-        # Explicitly release the COM pointer to prevent cleanup errors
-        if interface:
-            try:
-                interface.Release()
-            except:
-                pass
-        
-        return mute_state
+        with metrics.timer("audio_get_mute"):
+            return get_audio_backend().get_mute()
     except Exception as e:
         print(f"[ERROR] Failed to get mute state: {e}")
         return None
@@ -51,78 +117,482 @@ def get_volume_mute_state():
 def set_volume_mute(mute: bool):
     """Mute or unmute system volume."""
     try:
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = ctypes.cast(interface, ctypes.POINTER(IAudioEndpointVolume))
-        volume.SetMute(mute, None)
-        
-        # Explicitly release the COM pointer to prevent cleanup errors
-        if interface:
-            try:
-                interface.Release()
-            except:
-                pass
+        with metrics.timer("audio_set_mute"):
+            get_audio_backend().set_mute(mute)
     except Exception as e:
         print(f"[ERROR] Failed to set mute state: {e}")
 
-def send_notification(title, message):
-    """Send desktop notification."""
-    if not notifications_enabled:
-        return
+def _on_endpoint_mute_changed(muted):
+    """Re-assert the schedule when someone else changes the mute state."""
+    metrics.increment("endpoint_mute_events")
+    current = state.snapshot()
+    if current.enabled and current.desired is not None and bool(muted) != current.desired:
+        metrics.increment("endpoint_reasserts")
+        _enforce_debouncer.trigger("endpoint")
+
+def enable_mute_events():
+    """
+    Subscribe to endpoint mute changes on the calling (scheduler) thread.
     
+    Returns True if the backend delivers notifications, in which case the
+    scheduler no longer needs to poll between transitions.
+    """
+    return get_audio_backend().add_mute_listener(_on_endpoint_mute_changed)
+
+def get_all_devices_mute_state():
+    """Return True only if every active render endpoint is muted."""
     try:
-        notification.notify(
-            title=title,
-            message=message,
-            timeout=5
-        )
+        with metrics.timer("audio_get_mute_all"):
+            results = get_audio_backend().get_mute_all()
     except Exception as e:
-        print(f"[WARNING] Failed to send notification: {e}")
+        print(f"[ERROR] Failed to enumerate audio devices: {e}")
+        return None
+    readable = [result for result in results if result.ok]
+    if not readable:
+        print("[ERROR] Failed to get mute state of any audio device")
+        return None
+    return all(result.muted for result in readable)
+
+def set_all_devices_mute(mute: bool):
+    """Mute or unmute every active render endpoint in parallel."""
+    global last_device_results
+    try:
+        started = time.perf_counter()
+        with metrics.timer("audio_set_mute_all"):
+            last_device_results = get_audio_backend().set_mute_all(mute)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        print(f"[ERROR] Failed to enumerate audio devices: {e}")
+        return
+    
+    failed = [result for result in last_device_results if not result.ok]
+    for result in failed:
+        metrics.failure("audio_set_mute_device", result.error)
+        print(f"[ERROR] Failed to set mute state on {result.device_id}: {result.error}")
+    print(f"{'Muted' if mute else 'Unmuted'} {len(last_device_results) - len(failed)}/"
+          f"{len(last_device_results)} audio devices in {elapsed_ms:.1f} ms")
+
+def set_session_provider(provider):
+    """Replace the session provider (e.g. with FakeSessionProvider for testing)."""
+    global session_provider, session_index
+    session_provider = provider
+    session_index = None
+
+def get_session_index():
+    """Return the session index, starting the provider on first use."""
+    global session_index, session_provider
+    if session_index is None:
+        from session_index import PycawSessionProvider, SessionIndex
+        if session_provider is None:
+            session_provider = PycawSessionProvider()
+        index = SessionIndex()
+        index.on_added = _on_session_added
+        # Expired sessions are not ours to unmute any more
+        index.on_removed = _sessions_muted_by_us.discard
+        session_provider.start(index)
+        session_index = index
+    return session_index
+
+def get_app_rules():
+    """Return the compiled "app_rules" for the current config version."""
+    global _app_rules, _app_rules_version
+    schedule_data = load_schedule()
+    if _app_rules is None or _app_rules_version != config_cache.version:
+        from session_index import AppRules
+        _app_rules = AppRules(schedule_data.get("app_rules", {}))
+        _app_rules_version = config_cache.version
+    return _app_rules
+
+def _on_session_added(session_id, process_name):
+    """Enforce right away when a matching app starts playing during quiet hours."""
+    if state.desired and _app_rules and _app_rules.matches(process_name):
+        wake_scheduler("session")
+
+def app_sessions_in_state(rules, mute: bool) -> bool:
+    """Return True if the sessions matching the rules are already as scheduled."""
+    if not mute:
+        return not _sessions_muted_by_us
+    index = get_session_index()
+    for session_id, handle in index.matching(rules):
+        try:
+            if not handle.get_mute():
+                return False
+        except Exception:
+            # Session expired since it was indexed
+            index.session_removed(session_id)
+    return True
+
+def set_app_sessions_mute(rules, mute: bool):
+    """Mute matching sessions, or unmute the ones we muted."""
+    index = get_session_index()
+    for session_id, handle in index.matching(rules):
+        try:
+            if mute and not handle.get_mute():
+                handle.set_mute(True)
+                _sessions_muted_by_us.add(session_id)
+            elif not mute and session_id in _sessions_muted_by_us:
+                handle.set_mute(False)
+        except Exception:
+            index.session_removed(session_id)
+    if not mute:
+        _sessions_muted_by_us.clear()
+
+def release_audio_thread():
+    """Release the calling thread's cached endpoint handle before CoUninitialize."""
+    if audio_backend is not None:
+        audio_backend.release()
+
+def get_notification_dispatcher():
+    """Return the notification dispatcher, creating it on first use."""
+    global notification_dispatcher
+    if notification_dispatcher is None:
+        from notifications import NotificationDispatcher, PlyerNotifier
+        try:
+            settings = get_settings()
+        except Exception:
+            settings = {}
+        notification_dispatcher = NotificationDispatcher(
+            PlyerNotifier(),
+            min_interval=settings.get("notification_min_interval_seconds", 2.0),
+            max_age=settings.get("notification_max_age_seconds", 30.0),
+        )
+    return notification_dispatcher
+
+def send_notification(title, message, key=None):
+    """Queue a desktop notification; never blocks the caller.
+
+    Notifications sharing a key coalesce, so a burst of toggles shows one toast.
+    """
+    if not notifications_enabled:
+        return
+    get_notification_dispatcher().post(title, message, key=key)
+
+def flush_notifications(timeout=2.0):
+    """Give queued notifications a chance to show before the process exits."""
+    if notification_dispatcher is not None:
+        notification_dispatcher.flush(timeout)
 
 def load_schedule():
-    """Load schedule from config.json."""
-    if not os.path.exists(CONFIG_FILE):
-        raise FileNotFoundError(f"Config file '{CONFIG_FILE}' not found.")
-    with open(CONFIG_FILE, "r") as f:
-        return json.load(f)
-
-def parse_time(timestr):
-    """Parse HH:MM time string to minutes since midnight."""
-    hour, minute = map(int, timestr.split(":"))
-    return hour * 60 + minute
-
-def check_mute_time():
+    """
+    Load schedule from config.json (cached until the file changes), or the
+    effective fleet config when "remote_config_url" / "fleet_controller" is set.
+    """
+    schedule_data = config_cache.get()
+    if not uses_fleet_schedule(schedule_data):
+        return schedule_data
+    return config_cache.get_compiled().source
+
+def get_settings():
+    """Return the optional "settings" section of config.json."""
+    return load_schedule().get("settings", {})
+
+def get_compiled_schedule():
+    """Return the compiled schedule for the current config."""
+    return config_cache.get_compiled()
+
+def upcoming_transitions(now=None):
+    """
+    Lazily yield the next (at, muted) transitions of the current schedule.
+
+    `at` is time-zone aware and DST-correct; take only as many as needed,
+    e.g. itertools.islice(upcoming_transitions(), 3).
+    """
+    return iter_transitions(get_compiled_schedule(), now)
+
+def start_config_watcher():
+    """
+    Watch config.json so edits apply immediately without stat-ing per check,
+    listen for saves pushed by the GUI, and poll the fleet schedule URL if
+    one is configured.
+    """
+    global _config_watcher, _config_server, _remote_fetcher
+    if _config_watcher is None:
+        _config_watcher = ConfigWatcher(config_cache)
+        _config_watcher.start()
+    if _config_server is None:
+        from config_ipc import ConfigServer
+        server = ConfigServer(config_cache.apply_push)
+        if server.start():
+            _config_server = server
+    if _remote_fetcher is None:
+        try:
+            settings = config_cache.get().get("settings", {})
+        except Exception:
+            settings = {}
+        url = settings.get("remote_config_url")
+        if url:
+            from remote_config import RemoteConfigFetcher
+            _remote_fetcher = RemoteConfigFetcher(
+                url, REMOTE_CACHE_FILE,
+                interval=settings.get("remote_poll_seconds", 300),
+                timeout=settings.get("remote_timeout_seconds", 10),
+                on_update=config_cache.refresh,
+            )
+            _remote_fetcher.start()
+
+def stop_config_watcher():
+    """Stop the config watcher, the GUI push listener and the fleet fetcher."""
+    global _config_watcher, _config_server, _remote_fetcher
+    if _config_watcher is not None:
+        _config_watcher.stop()
+        _config_watcher = None
+    if _config_server is not None:
+        _config_server.stop()
+        _config_server = None
+    if _remote_fetcher is not None:
+        _remote_fetcher.stop()
+        _remote_fetcher = None
+
+def start_metrics_writer():
+    """Periodically write metrics.json / metrics.prom next to the script."""
+    global _metrics_writer
+    if _metrics_writer is not None:
+        return
+    try:
+        interval = get_settings().get("metrics_interval_seconds", 60)
+    except Exception:
+        interval = 60
+    if interval:
+        _metrics_writer = metrics.MetricsWriter(METRICS_JSON_FILE, METRICS_PROM_FILE, interval)
+        _metrics_writer.start()
+
+def stop_metrics_writer():
+    """Stop the metrics writer after a final write."""
+    global _metrics_writer
+    if _metrics_writer is not None:
+        _metrics_writer.stop()
+        _metrics_writer = None
+
+def start_journal():
+    """Open the event journal next to the script (unless "journal_enabled" is false)."""
+    global _journal
+    if _journal is not None:
+        return
+    try:
+        settings = get_settings()
+    except Exception:
+        settings = {}
+    if not settings.get("journal_enabled", True):
+        return
+    from journal import Journal
+    try:
+        _journal = Journal(JOURNAL_DIR, retention_days=settings.get("journal_retention_days", 365))
+    except OSError as e:
+        print(f"[WARNING] Event journal unavailable: {e}")
+        return
+    # The first check usually runs before the journal is open
+    current = state.snapshot()
+    if current.enabled and current.muted is not None:
+        journal_event("transition", muted=current.muted, day=DAYS[datetime.datetime.now().weekday()])
+
+def stop_journal():
+    """Record a stop event and close the journal."""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+def journal_event(kind, **fields):
+    """
+    Append an event to the journal if it is open (buffered, cheap), and let
+    the fleet controller know the state may have changed.
+    """
+    if _journal is not None:
+        _journal.record(kind, **fields)
+    if _fleet_agent is not None:
+        _fleet_agent.report()
+
+def get_fleet_state():
+    """State reported to the fleet controller."""
+    current = state.snapshot()
+    return {"muted": current.muted, "enabled": current.enabled}
+
+def start_fleet_agent():
+    """Connect to the "fleet_controller" (if configured) to report state and receive schedules."""
+    global _fleet_agent
+    if _fleet_agent is not None:
+        return
+    try:
+        settings = config_cache.get().get("settings", {})
+    except Exception:
+        settings = {}
+    if not settings.get("fleet_controller"):
+        return
+    import socket
+    from fleet_controller import FleetAgent, schedule_url
+    from remote_config import RemoteConfigFetcher
+    controller = settings["fleet_controller"]
+    group = settings.get("fleet_group", "default")
+    # Pushed schedules go through the same validated cache as polled ones
+    store = _remote_fetcher or RemoteConfigFetcher(schedule_url(controller, group), REMOTE_CACHE_FILE,
+                                                   on_update=config_cache.refresh)
+    _fleet_agent = FleetAgent(
+        controller,
+        settings.get("fleet_agent_id") or socket.gethostname(),
+        group,
+        get_fleet_state,
+        on_schedule=lambda body, etag: store.store(body, {"ETag": etag}),
+        get_etag=lambda: store.etag,
+        token=settings.get("fleet_token"),
+    )
+    _fleet_agent.start()
+
+def stop_fleet_agent():
+    """Disconnect from the fleet controller."""
+    global _fleet_agent
+    if _fleet_agent is not None:
+        _fleet_agent.stop()
+        _fleet_agent = None
+
+def get_fade_seconds():
+    """
+    Length of the volume fade at schedule boundaries ("fade_seconds"), or 0.
+
+    Fading applies to the default device only, not to "app_rules" or
+    "mute_all_devices".
+    """
+    settings = get_settings()
+    if settings.get("mute_all_devices", False) or get_app_rules():
+        return 0
+    return max(0, settings.get("fade_seconds", 0))
+
+def get_fade_lead():
+    """How long before a mute boundary the scheduler should wake to start fading."""
+    try:
+        return get_fade_seconds() if state.enabled else 0
+    except Exception:
+        return 0
+
+def get_volume_fader():
+    """Return the volume fader, creating it on first use."""
+    global _volume_fader
+    if _volume_fader is None:
+        from volume_fade import VolumeFader
+        _volume_fader = VolumeFader(get_audio_backend(), curve=get_settings().get("fade_curve", "ease"))
+    return _volume_fader
+
+def stop_volume_fader():
+    """Cancel a running fade, restoring the user's volume level."""
+    if _volume_fader is not None:
+        _volume_fader.cancel()
+        _volume_fader.wait(timeout=1)
+
+def _fade_out_before(compiled, now, fade_seconds, weekday):
+    """
+    Start (or keep) the fade-out if a mute window begins within fade_seconds.
+
+    Returns True while inside that window, where the fader owns the volume.
+    """
+    fader = get_volume_fader()
+    transition = next(iter_transitions(compiled, now), None)
+    until = (transition.at - now.astimezone()).total_seconds() if transition else None
+    # Small tolerance: the scheduler's early wake may land a hair before the window
+    if transition is None or not transition.muted or until > fade_seconds + 0.05:
+        if fader.direction == "out":
+            fader.cancel()  # the schedule changed; put the level back
+        return False
+    if fader.direction != "out" and not get_volume_mute_state():
+        fader.fade_out(until)
+        send_notification("🔉 Auto Mute", f"Fading out for quiet hours ({weekday})", key="mute-state")
+    return True
+
+def get_heartbeat():
+    """Return the supervisor heartbeat callback, or None when not supervised."""
+    from supervisor import HeartbeatWriter
+    writer = HeartbeatWriter.from_environment()
+    return writer.beat if writer else None
+
+def wake_scheduler(reason="wake"):
+    """Ask the running scheduler to re-evaluate immediately."""
+    if active_scheduler is not None:
+        active_scheduler.wake(reason)
+
+# Repeated re-mutes against a user who keeps unmuting back off instead of spinning
+_enforce_debouncer = WakeDebouncer(wake_scheduler)
+
+def _on_state_changed(old, new, source):
+    """Apply a pause/resume right away, whichever thread toggled."""
+    if old.enabled != new.enabled:
+        wake_scheduler("toggle")
+
+state.add_listener(_on_state_changed)
+
+def toggle_auto_mute(source="toggle"):
+    """
+    Pause or resume auto-mute from any thread; the scheduler re-evaluates at once.
+
+    Returns:
+        True if auto-mute is now enabled
+    """
+    enabled = state.toggle(source).enabled
+    journal_event("toggle", enabled=enabled, source=source)
+    return enabled
+
+def check_mute_time(now=None):
     """Check current time and enforce mute schedule."""
-    global last_mute_state, last_notification_time
-    
+    started = time.perf_counter()
     try:
+        # One consistent view; a toggle during this check wakes the scheduler again
+        current = state.snapshot()
+        last_mute_state = current.muted
+        # Transitions are journalled when the schedule's wish changes, so a
+        # check that cannot read the actual state does not log them twice
+        last_desired = current.desired
+        
         # Skip if auto-mute is disabled
-        if not auto_mute_enabled:
+        if not current.enabled:
+            if _volume_fader is not None and _volume_fader.active:
+                _volume_fader.cancel()
+            # Resuming counts as a fresh transition in the journal
+            state.update(desired=None, muted=None)
             return
         
-        now = datetime.datetime.now()
-        weekday = now.strftime("%A")
+        if now is None:
+            now = datetime.datetime.now()
+        weekday = DAYS[now.weekday()]
 
-        schedule_data = load_schedule()
-        if weekday not in schedule_data:
-            set_volume_mute(False)
+        compiled = get_compiled_schedule()
+        
+        # Either mute listed apps only, every render endpoint, or the default one
+        app_rules = get_app_rules()
+        mute_all = get_settings().get("mute_all_devices", False)
+        if app_rules:
+            target = "apps"
+            set_mute = lambda mute: set_app_sessions_mute(app_rules, mute)
+        else:
+            target = "system volume"
+            set_mute = set_all_devices_mute if mute_all else set_volume_mute
+        fade_seconds = get_fade_seconds()
+        
+        if not compiled.has_day(now):
+            if last_desired is not False:
+                journal_event("transition", muted=False, day=weekday)
+            state.update(desired=False, muted=False)
+            set_mute(False)
             return
 
-        start_str = schedule_data[weekday]["start"]
-        end_str = schedule_data[weekday]["end"]
-
-        start_minutes = parse_time(start_str)
-        end_minutes = parse_time(end_str)
-        current_minutes = now.hour * 60 + now.minute
+        # Overnight ranges, extra windows and dated overrides are already compiled in
+        should_be_muted = compiled.is_muted_at(now)
+        state.update(desired=should_be_muted)
+        if should_be_muted != last_desired:
+            journal_event("transition", muted=should_be_muted, day=weekday)
 
-        # Handle overnight ranges
-        if start_minutes < end_minutes:
-            should_be_muted = start_minutes <= current_minutes < end_minutes
-        else:
-            should_be_muted = current_minutes >= start_minutes or current_minutes < end_minutes
+        if fade_seconds:
+            if not should_be_muted and _fade_out_before(compiled, now, fade_seconds, weekday):
+                state.update(muted=should_be_muted)
+                return
+            if should_be_muted and get_volume_fader().direction == "out":
+                # The fade-out ends at this boundary; let it mute
+                get_volume_fader().wait(timeout=1.0)
 
         # Get actual current mute state
-        actual_mute_state = get_volume_mute_state()
+        if app_rules:
+            in_state = app_sessions_in_state(app_rules, should_be_muted)
+            actual_mute_state = should_be_muted if in_state else not should_be_muted
+        elif mute_all:
+            actual_mute_state = get_all_devices_mute_state()
+        else:
+            actual_mute_state = get_volume_mute_state()
         
         # If we couldn't get the mute state, skip this check
         if actual_mute_state is None:
@@ -130,23 +600,28 @@ def check_mute_time():
 
         # Enforce mute state if it doesn't match what it should be
         if actual_mute_state != should_be_muted:
-            set_volume_mute(should_be_muted)
-            
-            # Only send notification on state changes
-            time_since_last_notification = None
-            if last_notification_time:
-                time_since_last_notification = (now - last_notification_time).total_seconds()
+            if fade_seconds and not should_be_muted:
+                get_volume_fader().fade_in(fade_seconds)
+            else:
+                set_mute(should_be_muted)
+            metrics.increment("enforcements")
+            journal_event("enforce", muted=should_be_muted, target=target)
+            if last_mute_state == should_be_muted:
+                # Already in this state at the last check, so someone changed it since
+                journal_event("override", muted=should_be_muted, target=target)
             
-            if last_mute_state != should_be_muted or time_since_last_notification is None or time_since_last_notification > 30:
-                if should_be_muted:
-                    send_notification("🔇 Auto Mute", f"Muted system volume ({weekday})")
-                else:
-                    send_notification("🔊 Auto Mute", f"Unmuted system volume ({weekday})")
-                last_notification_time = now
+            # The dispatcher drops a repeat of the same message within 30 s
+            if should_be_muted:
+                send_notification("🔇 Auto Mute", f"Muted {target} ({weekday})", key="mute-state")
+            else:
+                send_notification("🔊 Auto Mute", f"Unmuted {target} ({weekday})", key="mute-state")
         
-        last_mute_state = should_be_muted
+        state.update(muted=should_be_muted)
     
     except Exception as e:
+        metrics.failure("check_mute_time", e)
         print(f"[ERROR] check_mute_time failed: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        metrics.observe("check_mute_time", time.perf_counter() - started)
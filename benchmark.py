@@ -0,0 +1,727 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Benchmark Suite
+
+Measures the check/enforce hot path with a fake audio backend, so it runs on
+any platform. Windows-only modules (pycaw, comtypes, plyer, pystray, keyboard)
+are replaced with inert stubs when they are not installed.
+
+Reports per-call latency percentiles, allocations per check, scheduler
+wakeups per simulated day, concurrent toggle correctness and
+toggle-to-applied latency, notification caller latency, calendar import
+time and memory, year-long simulation time, config_gui timeline refresh
+time, tray icon render time, event journal append/query cost, fleet
+schedule polling cost, fleet controller load (thousands of simulated
+agents) and volume fade timing, and writes the results as JSON so runs can
+be compared over time.
+
+Usage:
+    python benchmark.py                         # run all, write benchmark_results/<timestamp>.json
+    python benchmark.py --quick                 # fewer iterations
+    python benchmark.py --output run.json
+    python benchmark.py --compare old.json      # show change against an earlier run
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(SCRIPT_DIR, "benchmark_results")
+EXAMPLE_CONFIG = os.path.join(SCRIPT_DIR, "config.example.json")
+
+
+def install_stubs():
+    """Insert inert stand-ins for Windows-only modules that are missing."""
+    stubbed = []
+
+    def stub(name, **attributes):
+        try:
+            __import__(name)
+        except ImportError:
+            module = types.ModuleType(name)
+            module.__dict__.update(attributes)
+            sys.modules[name] = module
+            stubbed.append(name)
+
+    class _Unavailable:
+        def __getattr__(self, name):
+            raise OSError("stubbed module: no real audio device")
+
+    stub("comtypes", CLSCTX_ALL=0, CoInitialize=lambda: None, CoUninitialize=lambda: None)
+    if "pycaw" not in sys.modules:
+        try:
+            import pycaw.pycaw  # noqa: F401
+        except ImportError:
+            package = types.ModuleType("pycaw")
+            package.__path__ = []
+            module = types.ModuleType("pycaw.pycaw")
+            module.AudioUtilities = _Unavailable()
+            module.IAudioEndpointVolume = _Unavailable()
+            package.pycaw = module
+            sys.modules["pycaw"] = package
+            sys.modules["pycaw.pycaw"] = module
+            stubbed.append("pycaw")
+    stub("plyer", notification=types.SimpleNamespace(notify=lambda **kwargs: None))
+    stub("keyboard", add_hotkey=lambda *args, **kwargs: None)
+    stub("pystray", Icon=lambda *args, **kwargs: types.SimpleNamespace(**kwargs),
+         MenuItem=lambda *args, **kwargs: (args, kwargs))
+    return stubbed
+
+
+def percentiles(samples):
+    """Summarize latency samples (seconds) in microseconds."""
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e6
+
+    return {
+        "iterations": len(ordered),
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": pick(0.50),
+        "p90_us": pick(0.90),
+        "p99_us": pick(0.99),
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def measure(function, iterations, *args):
+    """Time individual calls of function(*args)."""
+    gc.collect()
+    samples = []
+    perf_counter = time.perf_counter
+    for _ in range(iterations):
+        started = perf_counter()
+        function(*args)
+        samples.append(perf_counter() - started)
+    return percentiles(samples)
+
+
+def allocations(function, iterations, *args):
+    """
+    Memory allocated per call, measured with tracemalloc.
+
+    peak_bytes is the transient high-water mark of a single call; retained
+    figures are what is still alive after many calls (leaks, cache growth).
+    """
+    function(*args)  # warm caches first
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(min(iterations, 200)):
+            current, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            function(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+
+        before = tracemalloc.take_snapshot()
+        for _ in range(iterations):
+            function(*args)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(max(stat.count_diff, 0) for stat in stats)
+    size = sum(max(stat.size_diff, 0) for stat in stats)
+    return {
+        "peak_bytes_per_call": statistics.median(peaks),
+        "retained_blocks_per_call": blocks / iterations,
+        "retained_bytes_per_call": size / iterations,
+    }
+
+
+class Environment:
+    """Points auto_mute_core at a temporary config and a fake backend."""
+
+    def __init__(self):
+        import auto_mute_core
+        from audio_backend import FakeAudioBackend
+        from config_cache import ConfigCache
+        from schedule_index import CompiledSchedule
+
+        self.core = auto_mute_core
+        self.directory = tempfile.mkdtemp(prefix="auto_mute_bench_")
+        self.config_path = os.path.join(self.directory, "config.json")
+        shutil.copyfile(EXAMPLE_CONFIG, self.config_path)
+
+        self.core.notifications_enabled = False
+        self.core.config_cache = ConfigCache(self.config_path, compile=CompiledSchedule)
+        self.backend = FakeAudioBackend()
+        self.core.set_audio_backend(self.backend)
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def bench_hot_path(env, iterations):
+    """check_mute_time, load_schedule and parse_time latency."""
+    from config_cache import ConfigCache
+    from schedule_index import CompiledSchedule, parse_time
+
+    core = env.core
+    muted_at = datetime.datetime(2026, 1, 5, 23, 30)  # Monday night
+    schedule_data = core.load_schedule()
+
+    def cold_load():
+        ConfigCache(env.config_path).get()
+
+    return {
+        "check_mute_time": measure(core.check_mute_time, iterations, muted_at),
+        "check_mute_time_allocations": allocations(core.check_mute_time, iterations, muted_at),
+        "load_schedule_cached": measure(core.load_schedule, iterations),
+        "load_schedule_cold": measure(cold_load, max(iterations // 10, 10)),
+        "parse_time": measure(parse_time, iterations, "22:00"),
+        "compile_schedule": measure(CompiledSchedule, max(iterations // 100, 10), schedule_data),
+    }
+
+
+def bench_scheduler(env):
+    """Wakeups per simulated week with the transition scheduler, with and without clock jumps."""
+    from mute_scheduler import MuteScheduler, VirtualClock
+
+    core = env.core
+    results = {}
+    start = datetime.datetime(2026, 1, 5, 12, 0)
+    end = start + datetime.timedelta(days=7)
+    for label, max_wait in (("poll_60s", 60.0), ("transitions_only", None)):
+        clock = VirtualClock(start, wakeup_latency=0.001)
+        scheduler = MuteScheduler(core.check_mute_time, core.get_compiled_schedule,
+                                  clock=clock, max_wait=max_wait)
+        started = time.perf_counter()
+        while clock.now() < end:
+            scheduler.run_once()
+        results[label] = dict(scheduler.stats(), real_seconds=time.perf_counter() - started)
+
+    # Suspends and clock steps of hours at a time: the state must be right on every wake
+    clock = VirtualClock(start, wakeup_latency=0.001)
+    for day in range(7):
+        clock.jump((3 + day % 4) * 3600, after=3600 + day * 20 * 3600)
+    clock.jump(-2 * 3600, after=3 * 86400 + 600)
+    wrong_state = []
+
+    def checked(now):
+        core.check_mute_time(now)
+        wrong_state.append(env.backend.muted != core.get_compiled_schedule().is_muted_at(now))
+
+    scheduler = MuteScheduler(checked, core.get_compiled_schedule, clock=clock, max_wait=None)
+    while clock.now() < end:
+        scheduler.run_once()
+    results["with_clock_jumps"] = dict(scheduler.stats(), wrong_state_checks=sum(wrong_state))
+    # The pre-scheduler loop woke every second
+    results["legacy_poll_1s_wakeups_per_day"] = 86400
+    return results
+
+
+def bench_remute(env, rounds):
+    """Manual-unmute-to-re-mute latency through endpoint notifications."""
+    from audio_backend import FakeAudioBackend
+    from mute_scheduler import MuteScheduler, WakeDebouncer
+
+    core = env.core
+    backend = FakeAudioBackend()
+    core.set_audio_backend(backend)
+
+    # Measure raw reaction time, not the backoff against a fighting user
+    debouncer = core._enforce_debouncer
+    core._enforce_debouncer = WakeDebouncer(core.wake_scheduler, burst=rounds + 1)
+
+    class QuietHoursClock:
+        def now(self):
+            return datetime.datetime(2026, 1, 5, 23, 30)
+
+        def monotonic(self):
+            return time.monotonic()
+
+        def wait(self, event, timeout):
+            return event.wait(timeout)
+
+    scheduler = MuteScheduler(core.check_mute_time, core.get_compiled_schedule,
+                              clock=QuietHoursClock(), max_wait=None)
+    core.active_scheduler = scheduler
+    core.enable_mute_events()
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not backend.muted and time.monotonic() < deadline:
+            time.sleep(0.001)
+        for _ in range(rounds):
+            backend.simulate_user_change(False)
+            deadline = time.monotonic() + 2
+            while not backend.muted and time.monotonic() < deadline:
+                time.sleep(0.0005)
+    finally:
+        scheduler.stop()
+        thread.join(timeout=2)
+        core.active_scheduler = None
+        core._enforce_debouncer = debouncer
+        core.set_audio_backend(env.backend)
+
+    latencies = backend.remute_latencies()
+    return percentiles(latencies) if latencies else {"iterations": 0}
+
+
+def bench_toggle(env, threads, toggles, rounds):
+    """Concurrent toggles from many threads (none lost) and toggle-to-applied latency."""
+    from audio_backend import FakeAudioBackend
+    from mute_scheduler import MuteScheduler
+
+    core = env.core
+    backend = FakeAudioBackend()
+    core.set_audio_backend(backend)
+
+    class QuietHoursClock:
+        def now(self):
+            return datetime.datetime(2026, 1, 5, 23, 30)
+
+        def monotonic(self):
+            return time.monotonic()
+
+        def wait(self, event, timeout):
+            return event.wait(timeout)
+
+    flips = []
+
+    def count_flips(old, new, source):
+        if old.enabled != new.enabled:
+            flips.append(source)
+
+    core.state.add_listener(count_flips)
+    scheduler = MuteScheduler(core.check_mute_time, core.get_compiled_schedule,
+                              clock=QuietHoursClock(), max_wait=None)
+    core.active_scheduler = scheduler
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+
+    def wait_until(condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.0002)
+        return condition()
+
+    try:
+        initially_enabled = core.state.enabled
+        barrier = threading.Barrier(threads)
+
+        def toggler():
+            barrier.wait()
+            for _ in range(toggles):
+                core.toggle_auto_mute("benchmark")
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=toggler) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stress_seconds = time.perf_counter() - started
+        expected_enabled = initially_enabled ^ bool(threads * toggles % 2)
+        stress = {
+            "threads": threads,
+            "toggles": threads * toggles,
+            "lost_toggles": threads * toggles - len(flips),
+            "final_state_correct": core.state.enabled == expected_enabled,
+            "settled_after_stress": wait_until(lambda: backend.muted == expected_enabled),
+            "seconds": stress_seconds,
+        }
+
+        # Resume during quiet hours with the device unmuted: time until it is muted again
+        core.state.set_enabled(True, "benchmark")
+        latencies = []
+        for _ in range(rounds):
+            core.toggle_auto_mute("benchmark")
+            wait_until(lambda: core.state.desired is None)
+            backend.set_device_mute(backend.default_device, False)
+            toggled = time.perf_counter()
+            core.toggle_auto_mute("benchmark")
+            if wait_until(lambda: backend.muted):
+                latencies.append(backend.history[-1][0] - toggled)
+    finally:
+        scheduler.stop()
+        thread.join(timeout=2)
+        core.active_scheduler = None
+        core.state.remove_listener(count_flips)
+        core.state.set_enabled(True, "benchmark")
+        core.set_audio_backend(env.backend)
+
+    stress["toggle_to_applied"] = percentiles(latencies) if latencies else {"iterations": 0}
+    return stress
+
+
+def bench_notifications(iterations):
+    """Caller-side latency of send_notification against a slow notifier."""
+    from notifications import FakeNotifier, NotificationDispatcher
+
+    notifier = FakeNotifier(delay=0.05)
+    dispatcher = NotificationDispatcher(notifier, min_interval=0.0, coalesce_window=0.01)
+    try:
+        results = {"post": measure(dispatcher.post, iterations, "Auto-Mute Toggle", "Auto-mute is now ENABLED", "toggle")}
+        dispatcher.flush(timeout=5)
+        results["burst_posted"] = dispatcher.posted
+        results["burst_delivered"] = len(notifier.delivered)
+        results["burst_coalesced"] = dispatcher.coalesced
+    finally:
+        dispatcher.stop()
+    return results
+
+
+def write_calendar(path, events):
+    """Write a synthetic .ics: years of one-off meetings plus some recurring ones."""
+    start = datetime.datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) - datetime.timedelta(days=3 * 365)
+    with open(path, "w", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for index in range(events):
+            begin = start + datetime.timedelta(hours=index * 7 % 24, days=index * 4 * 365 // events)
+            f.write("BEGIN:VEVENT\r\n")
+            f.write(f"UID:event-{index}@benchmark\r\n")
+            f.write(f"SUMMARY:Meeting {index} with a summary long enough to be folded across\r\n lines\r\n")
+            f.write(f"DTSTART:{begin:%Y%m%dT%H%M%S}\r\nDURATION:PT45M\r\n")
+            if index % 50 == 0:
+                f.write("RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR\r\n")
+            f.write("DESCRIPTION:Agenda\\n- item one\\n- item two\r\nEND:VEVENT\r\n")
+        f.write("END:VCALENDAR\r\n")
+
+
+def bench_calendar(events):
+    """Import time and peak memory for a large .ics calendar."""
+    import ics_import
+
+    directory = tempfile.mkdtemp(prefix="auto_mute_ics_")
+    try:
+        path = os.path.join(directory, "calendar.ics")
+        write_calendar(path, events)
+        window_start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+        ics_import._cache.clear()
+        started = time.perf_counter()
+        intervals = ics_import.import_calendar(path, window_start, ics_import.DEFAULT_HORIZON_DAYS)
+        elapsed = time.perf_counter() - started
+
+        # Separate pass: tracemalloc slows parsing down several times
+        ics_import._cache.clear()
+        tracemalloc.start()
+        ics_import.import_calendar(path, window_start, ics_import.DEFAULT_HORIZON_DAYS)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        ics_import.import_calendar(path, window_start, ics_import.DEFAULT_HORIZON_DAYS)
+        cached = time.perf_counter() - started
+        return {
+            "events": events,
+            "file_mb": os.path.getsize(path) / 1e6,
+            "intervals_in_horizon": len(intervals),
+            "import_ms": elapsed * 1000,
+            "peak_memory_mb": peak / 1e6,
+            "cached_import_ms": cached * 1000,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_simulation(days):
+    """Time to simulate the example schedule over a period, with and without NumPy."""
+    import simulate
+
+    with open(EXAMPLE_CONFIG, "r") as f:
+        config = json.load(f)
+    start = datetime.date(2026, 1, 1)
+    results = {"days": days}
+    for label, use_numpy in (("numpy", True), ("bytes", False)):
+        if use_numpy and simulate.numpy is None:
+            continue
+        started = time.perf_counter()
+        simulate.minute_grid(simulate.CompiledSchedule(config), start, days, use_numpy)
+        results[f"grid_{label}_ms"] = (time.perf_counter() - started) * 1000
+    report = simulate.simulate(config, start, days)
+    results["full_report_ms"] = report["seconds"] * 1000
+    results["transitions"] = report["transitions"]
+    results["replay_wrong_state_checks"] = report["replay"]["wrong_state_checks"]
+    return results
+
+
+def bench_timeline(iterations):
+    """config_gui preview refresh (compile + redraw one edited day) with many windows per day."""
+    from schedule_index import CompiledSchedule, DAYS
+    from week_timeline import RecordingCanvas, WeekTimeline, week_segments
+
+    busy_day = [{"start": f"{minute // 60:02d}:{minute % 60:02d}", "end": f"{(minute + 2) // 60:02d}:{(minute + 2) % 60:02d}"}
+                for minute in range(0, 1435, 7)]
+    config = {day: busy_day for day in DAYS}
+    timeline = WeekTimeline(RecordingCanvas(), 560)
+    timeline.draw_grid()
+    edits = [0]
+
+    def refresh():
+        # Alternate the edited day's first window, as typing would
+        edits[0] += 1
+        config["Monday"] = [{"start": "22:00", "end": f"0{edits[0] % 2 + 6}:00"}] + busy_day
+        segments = week_segments(CompiledSchedule(config))
+        timeline.render_day(0, segments[0])
+
+    results = {"windows_per_day": len(busy_day), "refresh": measure(refresh, iterations)}
+    results["rows_drawn"] = timeline.rows_drawn
+    return results
+
+
+def bench_journal(days):
+    """Journal append cost, disk use and rollup vs full-scan query time for a long history."""
+    import journal
+
+    directory = tempfile.mkdtemp(prefix="auto_mute_journal_")
+    try:
+        start = datetime.datetime(2025, 1, 1)
+        clock = [start.timestamp()]
+        events = journal.Journal(directory, max_bytes=256 * 1024, retention_days=0,
+                                 clock=lambda: clock[0], background=False)
+        # A busy machine: two transitions, a re-mute and a few enforcements per day
+        day_events = (
+            (7 * 3600, "transition", {"muted": False, "day": "Monday"}),
+            (9 * 3600, "toggle", {"enabled": False, "source": "tray"}),
+            (10 * 3600, "toggle", {"enabled": True, "source": "tray"}),
+            (22 * 3600, "transition", {"muted": True, "day": "Monday"}),
+            (22 * 3600 + 1, "enforce", {"muted": True, "target": "system volume"}),
+            (23 * 3600, "enforce", {"muted": True, "target": "system volume"}),
+            (23 * 3600, "override", {"muted": True, "target": "system volume"}),
+        )
+        samples = []
+        for day in range(days):
+            midnight = (start + datetime.timedelta(days=day)).timestamp()
+            for offset, kind, fields in day_events:
+                clock[0] = midnight + offset
+                started = time.perf_counter()
+                events.record(kind, **fields)
+                samples.append(time.perf_counter() - started)
+        events.close()
+
+        first = (start + datetime.timedelta(days=days - 31)).date()
+        last = (start + datetime.timedelta(days=days - 1)).date()
+        started = time.perf_counter()
+        report = journal.load_rollup(directory).summary(first, last)
+        rollup_query = time.perf_counter() - started
+
+        # What answering the same question would cost without the rollups
+        started = time.perf_counter()
+        scanned = sum(1 for _ in journal.read_events(directory))
+        full_scan = time.perf_counter() - started
+
+        files = os.listdir(directory)
+        return {
+            "days": days,
+            "events": scanned,
+            "record": percentiles(samples),
+            "flushes": events.flushes,
+            "segments": len(journal.list_segments(directory)),
+            "disk_kb": sum(os.path.getsize(os.path.join(directory, name)) for name in files) / 1024,
+            "rollup_kb": os.path.getsize(os.path.join(directory, journal.ROLLUP_FILE)) / 1024,
+            "month_summary_ms": rollup_query * 1000,
+            "full_scan_ms": full_scan * 1000,
+            "month_overrides": report["totals"]["overrides"],
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_fleet_fetch(iterations):
+    """Fleet schedule polling against a local stand-in server: full fetch vs 304."""
+    import remote_config
+
+    directory = tempfile.mkdtemp(prefix="auto_mute_fleet_")
+    server = None
+    try:
+        published = os.path.join(directory, "fleet.json")
+        shutil.copy(EXAMPLE_CONFIG, published)
+        server = remote_config.ScheduleServer(published)
+        server.start()
+        cache_path = os.path.join(directory, "config.remote.json")
+        updates = []
+        fetcher = remote_config.RemoteConfigFetcher(server.url, cache_path, on_update=lambda: updates.append(1))
+
+        def full_fetch():
+            for path in (cache_path, fetcher.meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            fetcher.fetch()
+
+        results = {"full_fetch": measure(full_fetch, iterations)}
+        updates.clear()
+        cache_mtime = os.stat(cache_path).st_mtime_ns
+        results["conditional_fetch"] = measure(fetcher.fetch, iterations)
+        results["updates_while_unchanged"] = len(updates)
+        results["cache_rewritten_while_unchanged"] = os.stat(cache_path).st_mtime_ns != cache_mtime
+        results["server_304s"] = server.not_modified
+        return results
+    finally:
+        if server is not None:
+            server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_fleet_controller(agents):
+    """Fleet controller under many simulated agents: round trips, push fan-out, memory."""
+    import asyncio
+    import fleet_controller
+
+    return asyncio.run(fleet_controller.load_test(agents, seconds=6.0, heartbeat=1.0))
+
+
+def bench_fade(fades, duration=1.0):
+    """Volume fade ramps against the fake backend: step lateness, backend calls, level restored."""
+    from audio_backend import FakeAudioBackend
+    from volume_fade import VolumeFader
+
+    backend = FakeAudioBackend()
+    backend.volume = 0.62
+    fader = VolumeFader(backend)
+    restored = True
+    for _ in range(fades):
+        fader.fade_out(duration)
+        fader.wait()
+        restored = restored and backend.get_mute() and abs(backend.volume - 0.62) < 1e-9
+        fader.fade_in(duration)
+        fader.wait()
+        restored = restored and not backend.get_mute() and abs(backend.volume - 0.62) < 1e-9
+    results = list(fader.results)
+    lateness = [late for result in results for late in result.lateness]
+
+    # The same ramp paced with relative sleeps, for comparison
+    interval = 1 / fader.steps_per_second
+    started = time.perf_counter()
+    for _ in range(int(duration * fader.steps_per_second)):
+        time.sleep(interval)
+    sleep_drift = time.perf_counter() - started - duration
+
+    return {
+        "fades": len(results),
+        "duration_seconds": duration,
+        "step_lateness": percentiles(lateness),
+        "backend_calls_per_fade": statistics.fmean(result.backend_calls for result in results),
+        "skipped_steps": sum(result.skipped_steps for result in results),
+        "endpoint_activations": backend.activations,
+        "level_and_mute_restored": restored,
+        "relative_sleep_drift_ms": sleep_drift * 1000,
+    }
+
+
+def bench_icon(env, iterations):
+    """Tray icon render time and steady-state update cost."""
+    try:
+        import task_bar_icon
+    except ImportError as e:
+        return {"skipped": f"tray dependencies unavailable: {e}"}
+
+    tray = task_bar_icon.TaskBarIcon(env.core)
+    results = {
+        "create_icon_image_enabled": measure(tray._create_icon_image, iterations, True),
+        "create_icon_image_paused": measure(tray._create_icon_image, iterations, False),
+    }
+
+    # Steady state: the scheduler calls _update_icon after every check
+    class RecordingIcon:
+        def __init__(self):
+            self.pushes = 0
+
+        def __setattr__(self, name, value):
+            if name in ("icon", "title"):
+                object.__setattr__(self, "pushes", self.pushes + 1)
+            object.__setattr__(self, name, value)
+
+    started = time.perf_counter()
+    tray._prerender_icons()
+    results["prerender_all_sizes_ms"] = (time.perf_counter() - started) * 1000
+    tray.icon = RecordingIcon()
+    tray._update_icon()
+    renders_before, pushes_before = tray.icon_renders, tray.icon.pushes
+    results["update_icon_steady_state"] = measure(tray._update_icon, iterations)
+    results["steady_state_renders"] = tray.icon_renders - renders_before
+    results["steady_state_pystray_updates"] = tray.icon.pushes - pushes_before
+    return results
+
+
+def compare(current, previous, path=""):
+    """Yield (metric path, old, new) for numeric leaves present in both runs."""
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict):
+            yield from compare(value, old or {}, name)
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and not isinstance(value, bool):
+            yield name, old, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Auto Mute hot path")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument("--output", help="results file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    iterations = 2000 if args.quick else 20000
+    stubbed = install_stubs()
+    sys.path.insert(0, SCRIPT_DIR)
+
+    env = Environment()
+    try:
+        results = {
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "stubbed_modules": stubbed,
+                "iterations": iterations,
+            },
+            "hot_path": bench_hot_path(env, iterations),
+            "scheduler": bench_scheduler(env),
+            "remute_latency": bench_remute(env, 5 if args.quick else 20),
+            "toggle_race": bench_toggle(env, 8, 250 if args.quick else 2500, 20 if args.quick else 100),
+            "notifications": bench_notifications(iterations),
+            "calendar": bench_calendar(5000 if args.quick else 20000),
+            "simulation": bench_simulation(365),
+            "gui_timeline": bench_timeline(max(iterations // 20, 50)),
+            "icon": bench_icon(env, max(iterations // 20, 50)),
+            "journal": bench_journal(365 if args.quick else 730),
+            "fleet_fetch": bench_fleet_fetch(max(iterations // 100, 20)),
+            "fleet_controller": bench_fleet_controller(500 if args.quick else 2000),
+            "volume_fade": bench_fade(3 if args.quick else 10),
+        }
+    finally:
+        env.close()
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        for name, old, new in compare(results, previous):
+            if name.startswith("meta."):
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  {name}: {old:.3f} -> {new:.3f} ({change})")
+
+
+if __name__ == "__main__":
+    main()
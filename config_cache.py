@@ -0,0 +1,375 @@
+"""
+Auto Mute - Config Cache
+
+Keeps the parsed config.json (and its compiled schedule) in memory and only
+re-reads the file when its (mtime_ns, size, inode) signature changes. If the
+file is half-written or invalid, the last good config keeps being served.
+
+A compiled form may list extra `dependencies` (e.g. imported calendars) whose
+signatures are checked alongside config.json, and an `expires` epoch time
+after which it is rebuilt even if nothing changed on disk.
+
+ConfigWatcher can drive the cache from filesystem events (inotify on Linux,
+stat polling elsewhere) so the hot path does not even need to stat the file.
+
+write_config() is the writer side: it replaces the file atomically (temp
+file, fsync, rename) and stamps an increasing "config_version", so a reader
+never sees a half-written file and can tell which save it has loaded.
+
+Usage:
+    from config_cache import ConfigCache, ConfigWatcher
+
+    cache = ConfigCache("config.json", compile=CompiledSchedule)
+    cache.add_listener(lambda: print("config changed"))
+    ConfigWatcher(cache).start()
+    cache.get()           # parsed dict
+    cache.get_compiled()  # compiled schedule
+
+    version = write_config("config.json", new_data)
+"""
+
+import json
+import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional
+
+import metrics
+
+# Key stamped into the file by write_config()
+CONFIG_VERSION_KEY = "config_version"
+
+
+def write_config(path: str, data: dict) -> int:
+    """
+    Atomically replace a JSON config file and stamp the next config version.
+
+    The data is written to a temp file in the same directory, flushed to
+    disk, then renamed over the old file, so readers see either the old or
+    the new config, never a truncated one.
+
+    Args:
+        path: Config file to replace
+        data: New contents (any existing version key is superseded)
+
+    Returns:
+        The version stamped into the file
+    """
+    try:
+        with open(path, "r") as f:
+            current = int(json.load(f).get(CONFIG_VERSION_KEY, 0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        current = 0
+    version = max(current, int(data.get(CONFIG_VERSION_KEY) or 0)) + 1
+    data = dict(data, **{CONFIG_VERSION_KEY: version})
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                # Windows refuses while a reader has the file open; it is only open briefly
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (POSIX)
+        dir_fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return version
+
+
+class ConfigCache:
+    """
+    Stat-keyed cache for a JSON config file.
+
+    Attributes:
+        path: Path to the JSON file
+        version: Incremented every time a new good config is loaded
+        loads: Number of times the file was actually read and parsed
+    """
+
+    def __init__(self, path: str, compile: Optional[Callable] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Path to the JSON config file
+            compile: Optional callable building a compiled form of the config
+                (e.g. CompiledSchedule). Errors from it count as an invalid file.
+        """
+        self.path = path
+        self.compile = compile
+        self.version = 0
+        self.loads = 0
+
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data: Optional[dict] = None
+        self._compiled = None
+        self._listeners: List[Callable[[], None]] = []
+        self._watched = False
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Register a callback invoked after a new config has been loaded."""
+        self._listeners.append(callback)
+
+    @property
+    def config_version(self) -> int:
+        """The "config_version" stamp of the loaded file (0 if unstamped)."""
+        try:
+            return int((self._data or {}).get(CONFIG_VERSION_KEY, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    @property
+    def dependencies(self) -> List[str]:
+        """Extra files the compiled config was built from."""
+        return list(getattr(self._compiled, "dependencies", None) or [])
+
+    def _stat_signature(self, dependencies=()):
+        stat = os.stat(self.path)
+        signature = [(stat.st_mtime_ns, stat.st_size, stat.st_ino)]
+        for path in dependencies:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _expired(self) -> bool:
+        expires = getattr(self._compiled, "expires", None)
+        return expires is not None and time.time() >= expires
+
+    def refresh(self) -> bool:
+        """
+        Re-read the file if its signature changed.
+
+        Returns:
+            True if a new good config was loaded
+
+        Raises:
+            FileNotFoundError: If the file is missing and nothing was loaded yet
+            ValueError: If the file is invalid and nothing was loaded yet
+        """
+        with self._lock:
+            try:
+                signature = self._stat_signature(self.dependencies)
+            except FileNotFoundError:
+                if self._data is None:
+                    raise FileNotFoundError(f"Config file '{self.path}' not found.")
+                return False
+
+            if signature == self._signature and not self._expired():
+                return False
+
+            started = time.perf_counter()
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                compiled = self.compile(data) if self.compile else None
+            except Exception as e:
+                metrics.failure("config_load", e)
+                if self._data is None:
+                    raise ValueError(f"Config file '{self.path}' is invalid: {e}")
+                # Remember the bad signature so we don't re-parse it every call
+                self._signature = signature
+                print(f"[WARNING] Ignoring invalid config ({e}); keeping last good schedule")
+                return False
+
+            metrics.observe("config_load", time.perf_counter() - started)
+            new_dependencies = list(getattr(compiled, "dependencies", None) or [])
+            if new_dependencies != self.dependencies:
+                signature = (signature[0],) + self._stat_signature(new_dependencies)[1:]
+            self._signature = signature
+            self._data = data
+            self._compiled = compiled
+            self.version += 1
+            self.loads += 1
+
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[WARNING] Config listener failed: {e}")
+        return True
+
+    def apply_push(self, version: int) -> int:
+        """
+        Load a version its writer announced (see config_ipc.py) without
+        waiting for the watcher.
+
+        Returns:
+            The config version loaded afterwards
+        """
+        if self._data is None or self.config_version < version:
+            self.refresh()
+        return self.config_version
+
+    def _ensure_fresh(self):
+        # With a watcher running, changes arrive as events and we skip the stat
+        if not self._watched or self._data is None or self._expired():
+            self.refresh()
+
+    def get(self) -> dict:
+        """Return the current parsed config."""
+        self._ensure_fresh()
+        return self._data
+
+    def get_compiled(self):
+        """Return the compiled form of the current config."""
+        self._ensure_fresh()
+        return self._compiled
+
+
+class ConfigWatcher:
+    """
+    Background thread that refreshes a ConfigCache on file changes.
+
+    Uses inotify on Linux and falls back to polling the file's stat signature.
+    The cache's dependencies are watched too.
+    """
+
+    def __init__(self, cache: ConfigCache, poll_interval: float = 2.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            cache: ConfigCache to refresh
+            poll_interval: Seconds between stat checks in polling mode
+        """
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wake_r = None
+        self._wake_w = None
+        self._libc = None
+        self._watched_dirs = set()
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        inotify_fd = self._open_inotify() if sys.platform.startswith("linux") else None
+        if inotify_fd is not None:
+            self.mode = "inotify"
+            self._thread = threading.Thread(target=self._run_inotify, args=(inotify_fd,), daemon=True)
+        else:
+            self.mode = "polling"
+            self._thread = threading.Thread(target=self._run_polling, daemon=True)
+        self.cache._watched = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread."""
+        self.cache._watched = False
+        self._stop_event.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _refresh(self):
+        try:
+            self.cache.refresh()
+        except Exception as e:
+            print(f"[WARNING] Config reload failed: {e}")
+
+    def _run_polling(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self._refresh()
+
+    def _open_inotify(self) -> Optional[int]:
+        """Create an inotify watch on the config directory, or None."""
+        try:
+            import ctypes
+            import ctypes.util
+
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0:
+                return None
+
+            self._libc = libc
+            directory = os.path.dirname(os.path.abspath(self.cache.path))
+            if not self._add_watch(fd, directory):
+                os.close(fd)
+                return None
+            self._watch_dependencies(fd)
+
+            self._wake_r, self._wake_w = os.pipe()
+            return fd
+        except Exception as e:
+            print(f"[WARNING] inotify unavailable, polling config instead: {e}")
+            return None
+
+    def _add_watch(self, fd: int, directory: str) -> bool:
+        # Watch the directory so atomic renames over the file are seen
+        if directory in self._watched_dirs:
+            return True
+        IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x8, 0x80, 0x100, 0x200
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if self._libc.inotify_add_watch(fd, directory.encode(), mask) < 0:
+            return False
+        self._watched_dirs.add(directory)
+        return True
+
+    def _watch_dependencies(self, fd: int):
+        for path in self.cache.dependencies:
+            directory = os.path.dirname(os.path.abspath(path))
+            if not self._add_watch(fd, directory):
+                print(f"[WARNING] Cannot watch {directory}; changes to {os.path.basename(path)} "
+                      "apply when config.json is next saved")
+
+    def _run_inotify(self, fd: int):
+        header = struct.Struct("iIII")
+        try:
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([fd, self._wake_r], [], [])
+                if self._wake_r in readable:
+                    break
+
+                buffer = os.read(fd, 4096)
+                filenames = {os.path.basename(path).encode()
+                             for path in [self.cache.path] + self.cache.dependencies}
+                changed = False
+                offset = 0
+                while offset + header.size <= len(buffer):
+                    _wd, _mask, _cookie, length = header.unpack_from(buffer, offset)
+                    name = buffer[offset + header.size:offset + header.size + length].rstrip(b"\0")
+                    offset += header.size + length
+                    if name in filenames:
+                        changed = True
+                if changed:
+                    self._refresh()
+                    self._watch_dependencies(fd)
+        finally:
+            os.close(fd)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
@@ -1,20 +1,39 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import itertools
 import json
 import os
 
-CONFIG_FILE = "config.json"
+from config_cache import write_config
+from config_ipc import notify_daemon
+from schedule_index import CompiledSchedule, iter_transitions
+from week_timeline import WeekTimeline, week_segments
+
+# Same file the daemon reads, wherever the GUI is started from
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
+
+# Upcoming mute/unmute events previewed below the table
+PREVIEW_EVENTS = 3
+
+# Typing pause (ms) before the preview is re-validated and redrawn
+REFRESH_DELAY_MS = 250
+
+TIMELINE_WIDTH = 560
+WINDOW_WIDTH = 600
+WINDOW_HEIGHT = 880
 
 class AutoMuteConfigGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Auto Mute - Schedule Configuration")
-        self.root.geometry("600x500")
-        self.root.resizable(False, False)
+        self.root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
+        self.root.resizable(False, True)
         
         # Configure style
         style = ttk.Style()
         style.theme_use('clam')
+        style.configure("Invalid.TEntry", fieldbackground="#fdecea")
         
         # Header
         header = tk.Label(
@@ -51,10 +70,17 @@ class AutoMuteConfigGUI:
         # Days of the week
         self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         self.entries = {}
+        self.entry_widgets = {}
         
         # Load existing config
         config = self.load_config()
         
+        # Keep non-day sections (e.g. "settings") so saving doesn't drop them
+        self.extra_config = {key: value for key, value in config.items() if key not in self.days}
+        
+        # Days with several windows: the first is edited here, the rest are kept as-is
+        self.extra_windows = {}
+        
         # Create entries for each day
         for i, day in enumerate(self.days, start=1):
             # Day label
@@ -67,13 +93,18 @@ class AutoMuteConfigGUI:
             )
             day_label.grid(row=i, column=0, padx=5, pady=8, sticky=tk.W)
             
+            windows = config.get(day, {})
+            if isinstance(windows, list):
+                self.extra_windows[day] = windows[1:]
+                windows = windows[0] if windows else {}
+            
             # Start time entry
-            start_var = tk.StringVar(value=config.get(day, {}).get("start", "22:00"))
+            start_var = tk.StringVar(value=windows.get("start", "22:00"))
             start_entry = ttk.Entry(main_frame, textvariable=start_var, width=10, font=("Segoe UI", 10))
             start_entry.grid(row=i, column=1, padx=5, pady=8)
             
             # End time entry
-            end_var = tk.StringVar(value=config.get(day, {}).get("end", "07:00"))
+            end_var = tk.StringVar(value=windows.get("end", "07:00"))
             end_entry = ttk.Entry(main_frame, textvariable=end_var, width=10, font=("Segoe UI", 10))
             end_entry.grid(row=i, column=2, padx=5, pady=8)
             
@@ -87,6 +118,25 @@ class AutoMuteConfigGUI:
                 "end": end_var,
                 "enabled": enabled_var
             }
+            self.entry_widgets[day] = (start_entry, end_entry)
+        
+        # Week timeline from the compiled schedule; only edited days are redrawn
+        self.timeline_canvas = tk.Canvas(root, width=TIMELINE_WIDTH, height=0, bg="white", highlightthickness=0)
+        self.timeline = WeekTimeline(self.timeline_canvas, TIMELINE_WIDTH)
+        self.timeline_canvas.config(height=self.timeline.height)
+        self.timeline_canvas.pack(padx=20)
+        self.timeline.draw_grid()
+        
+        # Preview of the next transitions
+        self.upcoming_label = tk.Label(root, text="", font=("Segoe UI", 9), bg="white", fg="#555")
+        self.upcoming_label.pack(padx=20, anchor=tk.W)
+        
+        # Validate and redraw shortly after typing pauses, not on every keystroke
+        self._dirty_days = set(self.days)
+        self._pending_refresh = None
+        for day, entries in self.entries.items():
+            for var in entries.values():
+                var.trace_add("write", lambda *args, day=day: self.schedule_refresh(day))
         
         # Button frame
         button_frame = tk.Frame(root, bg="white")
@@ -149,6 +199,15 @@ class AutoMuteConfigGUI:
             padx=10
         )
         self.status_label.pack(fill=tk.X, side=tk.BOTTOM)
+        
+        self.refresh_preview()
+        
+        # Never smaller than the content (fonts and DPI scaling vary), so the
+        # buttons and status bar are not clipped
+        self.root.update_idletasks()
+        height = self.root.winfo_reqheight()
+        self.root.minsize(WINDOW_WIDTH, height)
+        self.root.geometry(f"{WINDOW_WIDTH}x{max(WINDOW_HEIGHT, height)}")
     
     def load_config(self):
         """Load existing configuration from config.json"""
@@ -172,36 +231,126 @@ class AutoMuteConfigGUI:
         except:
             return False
     
+    def day_config(self, day):
+        """
+        Read one row of the table.
+        
+        Returns:
+            (windows, error): windows is None for a disabled or invalid day,
+            error is a message if a time is invalid
+        """
+        entries = self.entries[day]
+        if not entries["enabled"].get():
+            return None, None
+        
+        start_time = entries["start"].get().strip()
+        end_time = entries["end"].get().strip()
+        
+        # Validate times
+        if not self.validate_time(start_time):
+            return None, f"Invalid start time for {day}: {start_time}\nUse format HH:MM (e.g., 22:00)"
+        
+        if not self.validate_time(end_time):
+            return None, f"Invalid end time for {day}: {end_time}\nUse format HH:MM (e.g., 07:00)"
+        
+        windows = {
+            "start": start_time,
+            "end": end_time
+        }
+        if self.extra_windows.get(day):
+            windows = [windows] + self.extra_windows[day]
+        return windows, None
+    
+    def collect_config(self):
+        """
+        Build the config dictionary from the table.
+        
+        Returns:
+            (config, None), or (None, (title, message)) if a time is invalid
+        """
+        config = dict(self.extra_config)
+        for day in self.days:
+            windows, error = self.day_config(day)
+            if error:
+                return None, ("Invalid Time", error)
+            if windows is not None:
+                config[day] = windows
+        return config, None
+    
+    def schedule_refresh(self, day):
+        """Mark a day as edited and refresh the preview once typing pauses."""
+        self._dirty_days.add(day)
+        if self._pending_refresh is not None:
+            self.root.after_cancel(self._pending_refresh)
+        self._pending_refresh = self.root.after(REFRESH_DELAY_MS, self.refresh_preview)
+    
+    def refresh_preview(self):
+        """Validate the table, recompile it and redraw the edited days' rows."""
+        self._pending_refresh = None
+        dirty, self._dirty_days = self._dirty_days, set()
+        
+        # Invalid days are left out of the preview and drawn as errors
+        config = dict(self.extra_config)
+        errors = {}
+        for day in self.days:
+            windows, error = self.day_config(day)
+            if error:
+                errors[day] = error
+            elif windows is not None:
+                config[day] = windows
+        
+        for day in dirty:
+            style = "Invalid.TEntry" if day in errors else "TEntry"
+            for widget in self.entry_widgets[day]:
+                widget.configure(style=style)
+        
+        try:
+            compiled = CompiledSchedule(config)
+        except (ValueError, KeyError) as e:
+            self.status_label.config(text=f"✗ Invalid schedule: {e}", fg="#e74c3c")
+            return
+        
+        segments = week_segments(compiled)
+        for day in dirty:
+            day_index = self.days.index(day)
+            self.timeline.render_day(day_index, segments[day_index], error=day in errors)
+        
+        if errors:
+            first_error = errors[min(errors, key=self.days.index)]
+            self.status_label.config(text=f"✗ {first_error.splitlines()[0]}", fg="#e74c3c")
+        elif dirty and self.status_label.cget("fg") == "#e74c3c":
+            self.status_label.config(text="Ready", fg="#555")
+        
+        self.update_upcoming(compiled)
+    
+    def update_upcoming(self, compiled):
+        """Show the next few transitions of the schedule being edited."""
+        upcoming = list(itertools.islice(iter_transitions(compiled), PREVIEW_EVENTS))
+        if not upcoming:
+            self.upcoming_label.config(text="Next: no mute windows scheduled")
+            return
+        events = [f"{'Mute' if muted else 'Unmute'} {at.strftime('%a %H:%M')}" for at, muted in upcoming]
+        self.upcoming_label.config(text="Next: " + "  ·  ".join(events))
+    
     def save_config(self):
         """Save the configuration to config.json"""
-        config = {}
-        
-        for day, entries in self.entries.items():
-            if entries["enabled"].get():
-                start_time = entries["start"].get().strip()
-                end_time = entries["end"].get().strip()
-                
-                # Validate times
-                if not self.validate_time(start_time):
-                    messagebox.showerror("Invalid Time", f"Invalid start time for {day}: {start_time}\nUse format HH:MM (e.g., 22:00)")
-                    return
-                
-                if not self.validate_time(end_time):
-                    messagebox.showerror("Invalid Time", f"Invalid end time for {day}: {end_time}\nUse format HH:MM (e.g., 07:00)")
-                    return
-                
-                config[day] = {
-                    "start": start_time,
-                    "end": end_time
-                }
+        config, error = self.collect_config()
+        if error:
+            messagebox.showerror(*error)
+            return
         
-        # Save to file
+        # Save atomically, then tell a running Auto-Mute to load it now
         try:
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(config, f, indent=2)
+            version = write_config(CONFIG_FILE, config)
+            self.extra_config["config_version"] = version
+            reply = notify_daemon(version)
+            if reply and reply.get("ok") and reply.get("version", 0) >= version:
+                applied = "Auto-Mute is already using the new schedule."
+            else:
+                applied = "Auto-Mute will use the new schedule when it next reads the file."
             
-            self.status_label.config(text="✓ Schedule saved successfully!", fg="#27ae60")
-            messagebox.showinfo("Success", "Schedule saved successfully!\n\nThe Auto Mute script will use the new schedule.")
+            self.status_label.config(text=f"✓ Schedule saved (version {version})", fg="#27ae60")
+            messagebox.showinfo("Success", f"Schedule saved successfully!\n\n{applied}")
             
             # Reset status after 3 seconds
             self.root.after(3000, lambda: self.status_label.config(text="Ready", fg="#555"))
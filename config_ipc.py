@@ -0,0 +1,169 @@
+"""
+Auto Mute - Config IPC
+
+Lets config_gui.py tell the running daemon that it just saved config.json,
+so the new schedule applies at once instead of whenever the file watcher (or
+the polling fallback) notices.
+
+The daemon listens on a local channel (a named pipe on Windows, a Unix socket
+elsewhere) via multiprocessing.connection. Connections are authenticated
+with a random key the daemon writes to ipc.key next to the script, readable
+only by the current user. A message is a small dict:
+
+    {"type": "reload", "version": 7}  ->  {"ok": True, "version": 7}
+
+The daemon replies with the config version it has loaded afterwards, so the
+GUI can confirm its save is live.
+
+Usage:
+    # daemon
+    server = ConfigServer(lambda version: cache.apply_push(version))
+    server.start()
+
+    # GUI, after write_config()
+    reply = notify_daemon(version)   # None if the daemon is not running
+"""
+
+import os
+import sys
+import threading
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import Callable, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_KEY_FILE = os.path.join(SCRIPT_DIR, "ipc.key")
+
+
+def default_address() -> str:
+    """Per-user pipe name on Windows, a socket next to the script elsewhere."""
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\auto-mute-config-{user}"
+    return os.path.join(SCRIPT_DIR, "ipc.sock")
+
+
+def _family(address: str) -> str:
+    return "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+
+class ConfigServer:
+    """
+    Background listener that applies config pushes from the GUI.
+
+    Attributes:
+        pushes: Number of reload requests handled
+    """
+
+    def __init__(self, on_push: Callable[[int], int], address: Optional[str] = None,
+                 key_file: str = DEFAULT_KEY_FILE):
+        """
+        Initialize the server.
+
+        Args:
+            on_push: Called with the pushed version; returns the version that
+                is loaded afterwards
+            address: Pipe name or socket path (default: default_address())
+            key_file: Where the authentication key is written
+        """
+        self.on_push = on_push
+        self.address = address or default_address()
+        self.key_file = key_file
+        self.pushes = 0
+        self._listener: Optional[Listener] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._authkey = b""
+
+    def start(self) -> bool:
+        """Start listening in a daemon thread; returns False if the channel is unavailable."""
+        try:
+            self._authkey = os.urandom(32)
+            fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._authkey)
+            if _family(self.address) == "AF_UNIX" and os.path.exists(self.address):
+                os.remove(self.address)  # left over from a crashed run
+            self._listener = Listener(self.address, family=_family(self.address), authkey=self._authkey)
+        except OSError as e:
+            print(f"[WARNING] Config IPC unavailable, relying on the file watcher: {e}")
+            return False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop listening and remove the key file."""
+        if self._listener is None:
+            return
+        self._stopping = True
+        # Unblock accept() with a connection of our own
+        try:
+            Client(self.address, family=_family(self.address), authkey=self._authkey).close()
+        except (OSError, AuthenticationError, EOFError):
+            pass
+        if self._thread:
+            self._thread.join(timeout=2)
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        self._listener = None
+        try:
+            os.remove(self.key_file)
+        except OSError:
+            pass
+
+    def _run(self):
+        # Always go back to accept(): stop() unblocks it with its own connection
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError) as e:
+                print(f"[WARNING] Rejected config IPC connection: {e}")
+                continue
+            except OSError:
+                if self._stopping:
+                    return
+                continue
+            with connection:
+                if self._stopping:
+                    return
+                self._handle(connection)
+
+    def _handle(self, connection):
+        try:
+            if not connection.poll(2.0):
+                return
+            message = connection.recv()
+            if not isinstance(message, dict) or message.get("type") != "reload":
+                connection.send({"ok": False, "error": "unknown request"})
+                return
+            self.pushes += 1
+            version = self.on_push(int(message.get("version") or 0))
+            connection.send({"ok": True, "version": version})
+        except Exception as e:
+            print(f"[WARNING] Config push failed: {e}")
+            try:
+                connection.send({"ok": False, "error": str(e)})
+            except (OSError, EOFError):
+                pass
+
+
+def notify_daemon(version: int, address: Optional[str] = None, key_file: str = DEFAULT_KEY_FILE) -> Optional[dict]:
+    """
+    Ask the running daemon to load a config version now.
+
+    Returns:
+        The daemon's reply, or None if no daemon is listening
+    """
+    address = address or default_address()
+    try:
+        with open(key_file, "rb") as f:
+            authkey = f.read()
+        with Client(address, family=_family(address), authkey=authkey) as connection:
+            connection.send({"type": "reload", "version": version})
+            if not connection.poll(5.0):
+                return None
+            return connection.recv()
+    except (OSError, EOFError, AuthenticationError):
+        return None
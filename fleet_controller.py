@@ -0,0 +1,997 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Fleet Controller
+
+Central service for machines running Auto Mute: publishes schedule documents,
+pushes changes to connected agents, and shows which machines are muted,
+unmuted, paused or offline, without logging into each one.
+
+One asyncio server handles both sides on one port:
+
+    GET  /schedule/<group>    schedule document with ETag / 304, so it also
+                              works as an agent's "remote_config_url"
+    PUT  /schedule/<group>    publish a new schedule (validated, then pushed)
+    GET  /status              fleet counts per group and state
+    GET  /agents[?group=g]    per-agent state
+    GET  /agent               long-lived agent connection (Upgrade)
+
+An agent connection is upgraded to newline-delimited JSON after the
+handshake. The agent sends "hello" (id, group, ETag of its cached schedule),
+then "state" reports when its state changes and "heartbeat"s in between. The
+controller answers "hello" with the current schedule if the agent's copy is
+out of date and pushes each newly published schedule to every connected
+agent of the group. The notification is serialized once per publish and
+written to all connections; an agent that cannot keep up (write buffer over
+max_write_buffer) is disconnected rather than buffered without limit, and
+catches up through "hello" when it reconnects.
+
+Memory is bounded: each agent keeps a fixed set of fields plus its last
+RECENT_EVENTS state changes, strings are truncated, unknown message fields
+are dropped, and at most max_agents agents are tracked (the longest-offline
+ones are forgotten first). Fleet counts are maintained incrementally, so
+/status costs the same for ten agents or ten thousand.
+
+Agents that stop sending anything for stale_after seconds are disconnected
+and counted as offline.
+
+Usage:
+    python fleet_controller.py serve --port 8770 --schedules schedules
+    python fleet_controller.py publish http://controller:8770 lab lab.json
+    python fleet_controller.py status http://controller:8770
+    python fleet_controller.py loadtest --agents 5000 --seconds 20
+
+    # agent side, config.json
+    {"settings": {"fleet_controller": "http://controller:8770", "fleet_group": "lab"}}
+"""
+
+import argparse
+import asyncio
+import collections
+import hashlib
+import ipaddress
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+from schedule_index import CompiledSchedule
+
+PROTOCOL = "auto-mute-agent/1"
+DEFAULT_PORT = 8770
+DEFAULT_GROUP = "default"
+HEARTBEAT_SECONDS = 30.0
+STALE_AFTER_SECONDS = 90.0
+MAX_AGENTS = 100000
+MAX_WRITE_BUFFER = 256 * 1024
+MAX_LINE_BYTES = 64 * 1024
+MAX_SCHEDULE_BYTES = 1024 * 1024
+RECENT_EVENTS = 8
+MAX_ID_LENGTH = 128
+# Group names become file names in schedules_dir
+GROUP_NAME = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+# Agent states as counted in /status
+OFFLINE = "offline"
+PAUSED = "paused"
+MUTED = "muted"
+UNMUTED = "unmuted"
+UNKNOWN = "unknown"
+
+_REASONS = {101: "Switching Protocols", 200: "OK", 204: "No Content", 304: "Not Modified",
+            400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _text(value, limit: int = MAX_ID_LENGTH) -> Optional[str]:
+    return None if value is None else str(value)[:limit]
+
+
+def _flag(value) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def valid_group(group: str) -> bool:
+    """Whether a group name is safe to use as a schedule file name."""
+    return bool(GROUP_NAME.fullmatch(group)) and group not in (".", "..")
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a listen address only accepts local connections."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class AgentState:
+    """What the controller remembers about one agent (fixed size)."""
+
+    __slots__ = ("agent_id", "group", "address", "muted", "enabled", "etag", "version",
+                 "last_seen", "connected_at", "connects", "reports", "recent", "writer")
+
+    def __init__(self, agent_id: str, group: str):
+        self.agent_id = agent_id
+        self.group = group
+        self.address: Optional[str] = None
+        self.muted: Optional[bool] = None
+        self.enabled: Optional[bool] = None
+        self.etag: Optional[str] = None
+        self.version: Optional[str] = None
+        self.last_seen = 0.0
+        self.connected_at: Optional[float] = None
+        self.connects = 0
+        self.reports = 0
+        self.recent = collections.deque(maxlen=RECENT_EVENTS)
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def status(self) -> str:
+        if self.writer is None:
+            return OFFLINE
+        if self.enabled is False:
+            return PAUSED
+        if self.muted is None:
+            return UNKNOWN
+        return MUTED if self.muted else UNMUTED
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "agent": self.agent_id,
+            "group": self.group,
+            "status": self.status,
+            "address": self.address,
+            "muted": self.muted,
+            "enabled": self.enabled,
+            "schedule_etag": self.etag,
+            "version": self.version,
+            "seconds_since_seen": round(now - self.last_seen, 1) if self.last_seen else None,
+            "connects": self.connects,
+            "reports": self.reports,
+            "recent": list(self.recent),
+        }
+
+
+class Schedule:
+    """A published schedule document and its pre-encoded push notification."""
+
+    __slots__ = ("group", "body", "etag", "published_at", "notification")
+
+    def __init__(self, group: str, data: dict):
+        self.group = group
+        self.body = json.dumps(data, indent=2).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.published_at = time.time()
+        self.notification = _encode({"type": "schedule", "group": group, "etag": self.etag,
+                                     "published_at": self.published_at, "config": data})
+
+
+class FleetController:
+    """
+    Asyncio server for schedules, agent connections and fleet status.
+
+    Attributes:
+        agents: agent id -> AgentState, least recently seen first
+        schedules: group -> published Schedule
+        stats: Connection, message and push counters
+    """
+
+    def __init__(self, schedules_dir: Optional[str] = None, token: Optional[str] = None,
+                 heartbeat: float = HEARTBEAT_SECONDS, stale_after: float = STALE_AFTER_SECONDS,
+                 max_agents: int = MAX_AGENTS, max_write_buffer: int = MAX_WRITE_BUFFER):
+        """
+        Initialize the controller.
+
+        Args:
+            schedules_dir: Directory of <group>.json schedules, loaded at
+                start and updated on publish (None keeps them in memory only)
+            token: If set, required as "Authorization: Bearer <token>" for
+                everything except GET /schedule
+            heartbeat: Heartbeat interval suggested to agents
+            stale_after: Disconnect agents silent for this long
+            max_agents: Most agents tracked at once
+            max_write_buffer: Disconnect agents with more unsent bytes than this
+        """
+        self.schedules_dir = schedules_dir
+        self.token = token
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self.max_agents = max_agents
+        self.max_write_buffer = max_write_buffer
+
+        self.agents: "collections.OrderedDict[str, AgentState]" = collections.OrderedDict()
+        self.schedules: Dict[str, Schedule] = {}
+        self.stats = collections.Counter()
+        self._counts: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        self._connected: Dict[str, set] = collections.defaultdict(set)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+        if schedules_dir:
+            self._load_schedules()
+
+    # -- schedules ---------------------------------------------------------
+
+    def _load_schedules(self):
+        os.makedirs(self.schedules_dir, exist_ok=True)
+        for name in sorted(os.listdir(self.schedules_dir)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.schedules_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                CompiledSchedule(data)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Skipping schedule {path}: {e}")
+                continue
+            group = name[:-len(".json")]
+            self.schedules[group] = Schedule(group, data)
+
+    def schedule_for(self, group: str) -> Optional[Schedule]:
+        """The group's schedule, or the "default" group's if it has none."""
+        return self.schedules.get(group) or self.schedules.get(DEFAULT_GROUP)
+
+    def publish(self, group: str, data: dict) -> Schedule:
+        """
+        Publish a schedule and push it to the group's connected agents.
+
+        Raises:
+            ValueError: If the group name or the document is not valid
+        """
+        if not valid_group(group):
+            raise ValueError(f"invalid group name {group!r} (letters, digits, '_', '.', '-'; at most 64)")
+        if not isinstance(data, dict):
+            raise ValueError("schedule must be a JSON object")
+        CompiledSchedule(data)
+        schedule = Schedule(group, data)
+        if self.schedules_dir:
+            _atomic_write(os.path.join(self.schedules_dir, f"{group}.json"), schedule.body)
+        self.schedules[group] = schedule
+        self.stats["publishes"] += 1
+
+        if group == DEFAULT_GROUP:
+            # Groups without their own schedule follow the default one
+            targets = [agent for name, members in self._connected.items()
+                       if name not in self.schedules or name == DEFAULT_GROUP for agent in members]
+        else:
+            targets = list(self._connected.get(group, ()))
+        for agent in targets:
+            self._push(agent, schedule)
+        return schedule
+
+    def _push(self, agent: AgentState, schedule: Schedule):
+        if agent.etag == schedule.etag or agent.writer is None:
+            return
+        self._send(agent, schedule.notification)
+        self.stats["pushes"] += 1
+
+    def _send(self, agent: AgentState, data: bytes):
+        writer = agent.writer
+        if writer is None:
+            return
+        if writer.transport.get_write_buffer_size() > self.max_write_buffer:
+            # Slow or stuck consumer: drop it instead of buffering without limit
+            self.stats["slow_disconnects"] += 1
+            writer.close()
+            return
+        writer.write(data)
+
+    # -- agent state -------------------------------------------------------
+
+    def _update(self, agent: AgentState, change: Callable[[AgentState], None]):
+        """Apply a change to an agent, keeping the per-group counts in step."""
+        before = agent.status
+        change(agent)
+        after = agent.status
+        if before != after:
+            counts = self._counts[agent.group]
+            counts[before] -= 1
+            counts[after] += 1
+
+    def _agent(self, agent_id: str, group: str) -> Optional[AgentState]:
+        agent = self.agents.get(agent_id)
+        if agent is not None:
+            if agent.group != group:
+                # Moved to another group: recount it there
+                self._counts[agent.group][agent.status] -= 1
+                if agent.writer is not None:
+                    self._connected[agent.group].discard(agent)
+                agent.group = group
+                self._counts[group][agent.status] += 1
+            self.agents.move_to_end(agent_id)
+            return agent
+        if len(self.agents) >= self.max_agents and not self._evict():
+            return None
+        agent = AgentState(agent_id, group)
+        self.agents[agent_id] = agent
+        self._counts[group][OFFLINE] += 1
+        return agent
+
+    def _evict(self) -> bool:
+        for agent_id, agent in self.agents.items():
+            if agent.writer is None:
+                del self.agents[agent_id]
+                self._counts[agent.group][OFFLINE] -= 1
+                self.stats["evicted"] += 1
+                return True
+        return False
+
+    @property
+    def connected_agents(self) -> int:
+        return sum(len(members) for members in self._connected.values())
+
+    def status(self) -> dict:
+        """Fleet counts per group (and totals) without visiting each agent."""
+        groups = {}
+        totals = collections.Counter()
+        for group, counts in self._counts.items():
+            counts = {state: count for state, count in counts.items() if count}
+            if counts:
+                groups[group] = counts
+                totals.update(counts)
+        return {
+            "agents": len(self.agents),
+            "totals": dict(totals),
+            "groups": groups,
+            "schedules": {group: schedule.etag for group, schedule in self.schedules.items()},
+            "stats": dict(self.stats),
+        }
+
+    def agent_list(self, group: Optional[str] = None) -> List[dict]:
+        now = time.monotonic()
+        return [agent.to_dict(now) for agent in self.agents.values() if group is None or agent.group == group]
+
+    # -- server ------------------------------------------------------------
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        """Start listening; returns once the socket is bound."""
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE_BYTES, backlog=4096)
+        self._reaper = asyncio.get_running_loop().create_task(self._reap())
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._reaper:
+            self._reaper.cancel()
+        if self._server:
+            self._server.close()
+            for agent in list(self.agents.values()):
+                if agent.writer is not None:
+                    agent.writer.close()
+            await self._server.wait_closed()
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(self.stale_after / 3, 0.1))
+            cutoff = time.monotonic() - self.stale_after
+            for members in list(self._connected.values()):
+                for agent in list(members):
+                    if agent.last_seen < cutoff and agent.writer is not None:
+                        self.stats["stale_disconnects"] += 1
+                        agent.writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+                if len(headers) > 64:
+                    raise ValueError("too many headers")
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except (ValueError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+        self.stats["requests"] += 1
+
+        try:
+            if parts[:1] == ["schedule"] and len(parts) == 2 and method == "GET":
+                self._get_schedule(writer, parts[1], headers)
+            elif not self._authorized(headers):
+                _respond(writer, 401, {"error": "unauthorized"})
+            elif parts[:1] == ["schedule"] and len(parts) == 2 and method == "PUT":
+                await self._put_schedule(reader, writer, parts[1], headers)
+            elif parts == ["status"] and method == "GET":
+                _respond(writer, 200, self.status())
+            elif parts == ["agents"] and method == "GET":
+                _respond(writer, 200, self.agent_list((query.get("group") or [None])[0]))
+            elif parts == ["agent"] and method == "GET" and headers.get("upgrade") == PROTOCOL:
+                await self._agent_session(reader, writer)
+                return
+            else:
+                _respond(writer, 404, {"error": "not found"})
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if not writer.is_closing():
+                writer.close()
+
+    def _authorized(self, headers: dict) -> bool:
+        return not self.token or headers.get("authorization") == f"Bearer {self.token}"
+
+    def _get_schedule(self, writer, group: str, headers: dict):
+        schedule = self.schedule_for(group)
+        if schedule is None:
+            _respond(writer, 404, {"error": f"no schedule for group {group}"})
+        elif schedule.etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            self.stats["not_modified"] += 1
+            _respond(writer, 304, None, {"ETag": schedule.etag})
+        else:
+            self.stats["schedule_downloads"] += 1
+            _respond(writer, 200, schedule.body, {"ETag": schedule.etag})
+
+    async def _put_schedule(self, reader, writer, group: str, headers: dict):
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            length = -1
+        if not 0 < length <= MAX_SCHEDULE_BYTES:
+            _respond(writer, 413 if length > 0 else 400, {"error": "bad content length"})
+            return
+        body = await reader.readexactly(length)
+        try:
+            schedule = self.publish(urllib.parse.unquote(group), json.loads(body))
+        except ValueError as e:
+            _respond(writer, 400, {"error": str(e)})
+            return
+        _respond(writer, 200, {"group": schedule.group, "etag": schedule.etag,
+                               "pushed_to": len(self._connected.get(schedule.group, ()))})
+
+    async def _agent_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: {PROTOCOL}\r\n"
+                     f"Connection: Upgrade\r\n\r\n".encode("latin-1"))
+        agent = None
+        self.stats["agent_connections"] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    self.stats["bad_messages"] += 1
+                    continue
+                self.stats["messages"] += 1
+                if agent is None:
+                    if kind != "hello" or not message.get("agent"):
+                        break
+                    agent = self._hello(message, writer)
+                    if agent is None:
+                        break
+                    continue
+                agent.last_seen = time.monotonic()
+                if kind == "state":
+                    self._update(agent, lambda a: _apply_state(a, message))
+                elif kind == "ping":
+                    self._send(agent, _encode({"type": "pong", "id": message.get("id")}))
+                elif kind == "schedule_applied":
+                    agent.etag = _text(message.get("etag"))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if agent is not None and agent.writer is writer:
+                self._connected[agent.group].discard(agent)
+                self._update(agent, lambda a: setattr(a, "writer", None))
+            writer.close()
+
+    def _hello(self, message: dict, writer: asyncio.StreamWriter) -> Optional[AgentState]:
+        agent = self._agent(_text(message["agent"]), _text(message.get("group")) or DEFAULT_GROUP)
+        if agent is None:
+            self.stats["rejected_full"] += 1
+            writer.write(_encode({"type": "error", "error": "controller is tracking too many agents"}))
+            return None
+        if agent.writer is not None and agent.writer is not writer:
+            # Same agent reconnected before its old connection timed out
+            agent.writer.close()
+        peer = writer.get_extra_info("peername")
+
+        def connect(a):
+            a.writer = writer
+            a.address = f"{peer[0]}:{peer[1]}" if peer else None
+            a.connected_at = time.time()
+            a.connects += 1
+            a.etag = _text(message.get("etag"))
+            a.version = _text(message.get("version"), 32)
+            _apply_state(a, message)
+
+        self._update(agent, connect)
+        agent.last_seen = time.monotonic()
+        self._connected[agent.group].add(agent)
+        self._send(agent, _encode({"type": "welcome", "heartbeat": self.heartbeat}))
+        schedule = self.schedule_for(agent.group)
+        if schedule is not None:
+            self._push(agent, schedule)
+        return agent
+
+
+def _apply_state(agent: AgentState, message: dict):
+    """Copy the known state fields of a hello/state message."""
+    changed = False
+    for field in ("muted", "enabled"):
+        if field in message:
+            value = _flag(message[field])
+            if getattr(agent, field) != value:
+                setattr(agent, field, value)
+                changed = True
+    if "etag" in message:
+        agent.etag = _text(message["etag"])
+    agent.reports += 1
+    if changed:
+        agent.recent.append({"t": round(time.time(), 1), "muted": agent.muted, "enabled": agent.enabled})
+
+
+def _respond(writer: asyncio.StreamWriter, status: int, body, headers: Optional[dict] = None):
+    if body is None:
+        payload = b""
+    elif isinstance(body, bytes):
+        payload = body
+    else:
+        payload = json.dumps(body, indent=2).encode("utf-8")
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", "Connection: close"]
+    if status != 304:
+        lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write to a temp file in the same directory, then rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".schedule-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+# -- agent side ---------------------------------------------------------------
+
+def _split_url(url: str):
+    parts = urllib.parse.urlsplit(url if "//" in url else "http://" + url)
+    return parts.hostname or "127.0.0.1", parts.port or DEFAULT_PORT
+
+
+def schedule_url(controller: str, group: str) -> str:
+    """URL of a group's schedule on a controller given as "http://host:port" or "host:port"."""
+    host, port = _split_url(controller)
+    return f"http://{host}:{port}/schedule/{urllib.parse.quote(group)}"
+
+
+async def open_agent_connection(host: str, port: int, token: Optional[str] = None):
+    """
+    Connect and upgrade to the agent protocol.
+
+    Returns:
+        (reader, writer) speaking newline-delimited JSON
+
+    Raises:
+        ConnectionError: If the controller refuses the upgrade
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES)
+    request = f"GET /agent HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: Upgrade\r\nUpgrade: {PROTOCOL}\r\n"
+    if token:
+        request += f"Authorization: Bearer {token}\r\n"
+    writer.write((request + "\r\n").encode("latin-1"))
+    status_line = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    if b" 101 " not in status_line:
+        writer.close()
+        raise ConnectionError(f"controller refused the agent connection: {status_line.decode('latin-1').strip()}")
+    return reader, writer
+
+
+class FleetAgent:
+    """
+    Daemon-side connection to the fleet controller.
+
+    Runs an asyncio loop in a daemon thread: reports state changes (call
+    report() from any thread), sends heartbeats, and hands pushed schedules
+    to on_schedule. Reconnects with jittered exponential backoff.
+
+    Attributes:
+        connected: Whether the connection is currently up
+        schedules_received: Number of schedules pushed to this agent
+    """
+
+    def __init__(self, controller: str, agent_id: str, group: str, get_state: Callable[[], dict],
+                 on_schedule: Callable[[bytes, str], Optional[str]], get_etag: Callable[[], Optional[str]] = lambda: None,
+                 token: Optional[str] = None, rng: Optional[random.Random] = None):
+        """
+        Initialize the agent.
+
+        Args:
+            controller: "http://host:port" (or "host:port")
+            agent_id: Name shown in the fleet status (e.g. the host name)
+            group: Schedule group to follow
+            get_state: Returns the state to report, e.g. {"muted": True, "enabled": True}
+            on_schedule: Called with a pushed schedule document and its ETag
+            get_etag: Returns the ETag of the schedule currently cached
+            token: Controller token, if it requires one
+            rng: Random source for the reconnect jitter
+        """
+        self.host, self.port = _split_url(controller)
+        self.agent_id = agent_id
+        self.group = group
+        self.get_state = get_state
+        self.on_schedule = on_schedule
+        self.get_etag = get_etag
+        self.token = token
+        self.rng = rng or random.Random()
+        self.connected = False
+        self.schedules_received = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self.report()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def report(self):
+        """Send the current state now (thread-safe)."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        failures = 0
+        while not self._stopping:
+            try:
+                await self._session()
+                failures = 0
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError) as e:
+                failures += 1
+                if failures == 1:
+                    print(f"[WARNING] Fleet controller unavailable ({e}); retrying in the background")
+            self.connected = False
+            if self._stopping:
+                break
+            delay = min(300.0, 2.0 * 2 ** min(failures, 8)) * self.rng.uniform(0.5, 1.0)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _session(self):
+        reader, writer = await open_agent_connection(self.host, self.port, self.token)
+        try:
+            state = self.get_state()
+            writer.write(_encode(dict(state, type="hello", agent=self.agent_id, group=self.group,
+                                      etag=self.get_etag())))
+            heartbeat = HEARTBEAT_SECONDS
+            self.connected = True
+            reported = state
+            read = asyncio.ensure_future(reader.readline())
+            while not self._stopping:
+                wake = asyncio.ensure_future(self._wake.wait())
+                done, _ = await asyncio.wait({read, wake}, timeout=heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not wake.done():
+                    wake.cancel()
+                if read in done:
+                    line = read.result()
+                    if not line:
+                        raise ConnectionError("controller closed the connection")
+                    heartbeat = self._on_message(json.loads(line), writer) or heartbeat
+                    read = asyncio.ensure_future(reader.readline())
+                self._wake.clear()
+                state = self.get_state()
+                if state != reported:
+                    writer.write(_encode(dict(state, type="state")))
+                    reported = state
+                elif not done:
+                    writer.write(_encode({"type": "heartbeat"}))
+                await writer.drain()
+            read.cancel()
+        finally:
+            writer.close()
+
+    def _on_message(self, message: dict, writer) -> Optional[float]:
+        kind = message.get("type")
+        if kind == "welcome":
+            return float(message.get("heartbeat") or HEARTBEAT_SECONDS)
+        if kind == "schedule" and isinstance(message.get("config"), dict):
+            self.schedules_received += 1
+            body = json.dumps(message["config"], indent=2).encode("utf-8")
+            if self.on_schedule(body, message.get("etag")) != "error":
+                writer.write(_encode({"type": "schedule_applied", "etag": message.get("etag")}))
+        elif kind == "error":
+            print(f"[WARNING] Fleet controller: {message.get('error')}")
+        return None
+
+
+# -- load test ----------------------------------------------------------------
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p90_ms": pick(0.90),
+            "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1000}
+
+
+async def _simulated_agent(port: int, index: int, group: str, results: dict, heartbeat: float,
+                           rng: random.Random):
+    """One fake agent: hello, then a ping or a state report about every `heartbeat` seconds."""
+    reader, writer = await open_agent_connection("127.0.0.1", port)
+    writer.write(_encode({"type": "hello", "agent": f"agent-{index:05d}", "group": group,
+                          "muted": rng.random() < 0.5, "enabled": rng.random() < 0.95}))
+    pings = {}
+    next_beat = time.monotonic() + rng.uniform(0, heartbeat)
+    results["connected"] += 1
+    try:
+        while True:
+            timeout = max(0.0, next_beat - time.monotonic())
+            try:
+                line = await asyncio.wait_for(reader.readline(), timeout)
+            except asyncio.TimeoutError:
+                line = None
+            if line == b"":
+                break  # the controller closed the connection: end of the test
+            if line:
+                message = json.loads(line)
+                if message["type"] == "schedule":
+                    results["pushes"].append((message["published_at"], time.time()))
+                    writer.write(_encode({"type": "schedule_applied", "etag": message["etag"]}))
+                elif message["type"] == "pong":
+                    results["ping"].append(time.perf_counter() - pings.pop(message["id"]))
+                continue
+            next_beat = time.monotonic() + heartbeat * rng.uniform(0.8, 1.2)
+            if rng.random() < 0.5:
+                ping_id = f"{index}-{time.perf_counter()}"
+                pings[ping_id] = time.perf_counter()
+                writer.write(_encode({"type": "ping", "id": ping_id}))
+            else:
+                writer.write(_encode({"type": "state", "muted": rng.random() < 0.5, "enabled": True}))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_agents(port: int, first: int, count: int, groups: int, heartbeat: float, seed: int) -> dict:
+    """Run simulated agents first..first+count until the controller disconnects them."""
+    rng = random.Random(seed)
+    results = {"connected": 0, "ping": [], "pushes": []}
+    tasks = []
+    for index in range(first, first + count):
+        tasks.append(asyncio.ensure_future(_simulated_agent(
+            port, index, f"group{index % groups}", results, heartbeat, random.Random(rng.random()))))
+        if index % 200 == 199:
+            await asyncio.sleep(0)  # let the accept queue drain
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    results["failed"] = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+    return results
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident memory of this process (Linux), or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+async def load_test(agents: int = 2000, seconds: float = 10.0, heartbeat: float = 1.0,
+                    groups: int = 4, workers: int = 0, seed: int = 1) -> dict:
+    """
+    Run a controller here and `agents` simulated agents in worker processes.
+
+    Agents run in separate processes (as they would on separate machines),
+    so the controller's own memory can be measured. Each agent says hello,
+    then sends a ping or a state report about every `heartbeat` seconds.
+    Halfway through, a new schedule is published to every group. Reports
+    connect time, ping round trips, push fan-out latency (publish to
+    receipt), /status cost and controller memory per agent.
+    """
+    workers = workers or max(1, min(8, agents // 1000))
+    group_names = [f"group{i}" for i in range(groups)]
+    controller = FleetController(heartbeat=heartbeat, stale_after=max(heartbeat * 5, 5))
+    for group in group_names:
+        controller.publish(group, {"Monday": {"start": "22:00", "end": "07:00"}})
+    await controller.start("127.0.0.1", 0)
+    rss_before = _rss_bytes()
+
+    started = time.perf_counter()
+    processes = []
+    per_worker = -(-agents // workers)
+    for worker in range(workers):
+        first = worker * per_worker
+        count = min(per_worker, agents - first)
+        if count <= 0:
+            break
+        processes.append(await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "_agents", str(controller.port), str(first),
+            str(count), str(groups), str(heartbeat), str(seed + worker),
+            stdout=asyncio.subprocess.PIPE))
+    while controller.connected_agents < agents and time.perf_counter() - started < 60:
+        await asyncio.sleep(0.05)
+    connect_seconds = time.perf_counter() - started
+
+    await asyncio.sleep(seconds / 2)
+    status_started = time.perf_counter()
+    status = controller.status()
+    status_seconds = time.perf_counter() - status_started
+    rss_loaded = _rss_bytes()
+
+    published_at = time.time()
+    publish_started = time.perf_counter()
+    for group in group_names:
+        controller.publish(group, {"Monday": {"start": "23:00", "end": "06:00"}})
+    publish_seconds = time.perf_counter() - publish_started
+    await asyncio.sleep(seconds / 2)
+    messages = controller.stats["messages"]
+    await controller.close()
+
+    connected, failed, pings, fan_out = 0, 0, [], []
+    for process in processes:
+        output, _ = await process.communicate()
+        results = json.loads(output)
+        connected += results["connected"]
+        failed += results["failed"]
+        pings.extend(results["ping"])
+        fan_out.extend(received - sent for sent, received in results["pushes"] if sent >= published_at)
+    report = {
+        "agents": agents,
+        "worker_processes": len(processes),
+        "connected": connected,
+        "failed": failed,
+        "connect_all_seconds": connect_seconds,
+        "messages": messages,
+        "messages_per_second": messages / max(seconds, 1e-9),
+        "ping_round_trip": _percentiles(pings),
+        "publish_call_ms": publish_seconds * 1000,
+        "push_fan_out": _percentiles(fan_out),
+        "status_call_ms": status_seconds * 1000,
+        "status_totals": status["totals"],
+    }
+    if rss_before is not None and rss_loaded is not None:
+        report["controller_rss_mb"] = rss_loaded / 1e6
+        report["controller_kb_per_agent"] = (rss_loaded - rss_before) / max(agents, 1) / 1024
+    return report
+
+
+# -- command line -------------------------------------------------------------
+
+def _http(method: str, url: str, token: Optional[str], body: Optional[bytes] = None) -> dict:
+    request = urllib.request.Request(url, data=body, method=method)
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    if body is not None:
+        request.add_header("Content-Type", "application/json")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read() or b"null")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto Mute fleet controller")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run the controller")
+    serve_parser.add_argument("--host", default="127.0.0.1",
+                              help="listen address (default: local only; other addresses need --token)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--schedules", help="directory of <group>.json schedules")
+    serve_parser.add_argument("--token", default=os.environ.get("AUTO_MUTE_FLEET_TOKEN"),
+                              help="required bearer token (default: $AUTO_MUTE_FLEET_TOKEN)")
+
+    publish_parser = commands.add_parser("publish", help="publish a schedule to a group")
+    publish_parser.add_argument("url", help="controller URL, e.g. http://controller:8770")
+    publish_parser.add_argument("group")
+    publish_parser.add_argument("path", help="schedule JSON")
+    publish_parser.add_argument("--token", default=os.environ.get("AUTO_MUTE_FLEET_TOKEN"))
+
+    status_parser = commands.add_parser("status", help="show fleet status")
+    status_parser.add_argument("url")
+    status_parser.add_argument("--agents", action="store_true", help="list every agent")
+    status_parser.add_argument("--group", help="with --agents, only this group")
+    status_parser.add_argument("--token", default=os.environ.get("AUTO_MUTE_FLEET_TOKEN"))
+
+    load_parser = commands.add_parser("loadtest", help="simulate many agents against a local controller")
+    load_parser.add_argument("--agents", type=int, default=2000)
+    load_parser.add_argument("--seconds", type=float, default=10.0)
+    load_parser.add_argument("--heartbeat", type=float, default=1.0, help="seconds between agent messages")
+    load_parser.add_argument("--workers", type=int, default=0, help="agent processes (default: 1 per 1000 agents)")
+
+    # Worker process of the load test
+    agents_parser = commands.add_parser("_agents")
+    for name, kind in (("port", int), ("first", int), ("count", int), ("groups", int),
+                       ("heartbeat", float), ("seed", int)):
+        agents_parser.add_argument(name, type=kind)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if not args.token and not is_loopback(args.host):
+            # Anyone who can reach the port could publish a schedule to every agent
+            parser.error("serving on a non-loopback address requires --token")
+        async def serve():
+            controller = FleetController(args.schedules, args.token)
+            await controller.start(args.host, args.port)
+            print(f"Fleet controller listening on {args.host}:{controller.port} "
+                  f"({len(controller.schedules)} schedule(s) loaded)")
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await controller.close()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "publish":
+        with open(args.path, "rb") as f:
+            body = f.read()
+        reply = _http("PUT", f"{args.url.rstrip('/')}/schedule/{args.group}", args.token, body)
+        print(f"Published {args.group} ({reply['etag']}), pushed to {reply['pushed_to']} connected agent(s)")
+    elif args.command == "status":
+        if args.agents:
+            query = f"?group={urllib.parse.quote(args.group)}" if args.group else ""
+            for agent in _http("GET", f"{args.url.rstrip('/')}/agents{query}", args.token):
+                seen = agent["seconds_since_seen"]
+                print(f"{agent['agent']:<24} {agent['group']:<12} {agent['status']:<8} "
+                      f"{'' if seen is None else f'{seen:.0f}s ago'}")
+        else:
+            print(json.dumps(_http("GET", f"{args.url.rstrip('/')}/status", args.token), indent=2))
+    elif args.command == "loadtest":
+        print(json.dumps(asyncio.run(load_test(args.agents, args.seconds, args.heartbeat,
+                                               workers=args.workers)), indent=2))
+    else:
+        print(json.dumps(asyncio.run(_run_agents(args.port, args.first, args.count, args.groups,
+                                                 args.heartbeat, args.seed))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
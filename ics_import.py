@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - ICS Calendar Import
+
+Lets quiet hours follow .ics calendars (holidays, meeting blocks) instead of
+retyping them into config_gui.py.
+
+The file is read as a stream: lines are unfolded on the fly and one VEVENT
+is held in memory at a time. Recurring events (RRULE) are expanded lazily
+and only across a bounded look-ahead window, so a calendar with years of
+history costs no more than the occurrences inside the window. Results are
+cached by file hash, so an unchanged calendar is not re-parsed when
+config.json reloads.
+
+Calendar events become dated "exceptions" (see schedule_index.py): all-day
+events mute the whole day, timed events add mute windows on top of that
+day's regular windows.
+
+config.json:
+    "calendars": [
+        {"path": "holidays.ics"},
+        {"path": "work.ics", "match": ["Focus", "Presentation"], "horizon_days": 30}
+    ]
+
+Supported RRULE parts: FREQ (DAILY/WEEKLY/MONTHLY/YEARLY), INTERVAL, COUNT,
+UNTIL, BYDAY, BYMONTHDAY, BYMONTH. Events with other rule parts or
+out-of-range values (BYMONTHDAY=32) only use their first occurrence.
+
+Usage:
+    python ics_import.py calendar.ics            # print windows for the next 60 days
+    python ics_import.py calendar.ics --days 14
+"""
+
+import argparse
+import datetime
+import hashlib
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schedule_index import DAYS, day_intervals, MINUTES_PER_DAY
+
+DEFAULT_HORIZON_DAYS = 60
+
+WEEKDAY_CODES = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+SUPPORTED_RULE_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "WKST"}
+
+# Properties read from each VEVENT (everything else is skipped unparsed)
+EVENT_PROPERTIES = {"DTSTART", "DTEND", "DURATION", "RRULE", "EXDATE", "RECURRENCE-ID",
+                    "UID", "SUMMARY", "STATUS"}
+
+_PROPERTY_NAME = re.compile(r"[^:;]*")
+_BYDAY = re.compile(r"([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)")
+_INTEGER_PARTS = ("INTERVAL", "COUNT", "BYMONTHDAY", "BYMONTH")
+# Allowed values of the list parts (0 is never valid)
+_RANGES = {"BYMONTHDAY": (-31, 31), "BYMONTH": (1, 12), "BYDAY": (-53, 53)}
+
+# A MONTHLY/YEARLY rule that selects nothing for this many periods in a row
+# never will (BYMONTH=2;BYMONTHDAY=30); leap days skip at most 7 years
+MAX_EMPTY_PERIODS = 100
+
+# path -> (sha256, window start, horizon days, match, intervals)
+_cache: Dict[str, tuple] = {}
+
+
+class UnsupportedRule(ValueError):
+    """Raised for RRULE parts the expander does not implement."""
+
+
+def unfold_lines(stream: Iterable[str]) -> Iterator[str]:
+    """Yield logical content lines, joining folded continuation lines."""
+    pending = None
+    for raw in stream:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _split_content_line(line: str) -> Optional[Tuple[str, dict, str]]:
+    """Split `NAME;PARAM=x:VALUE` into (name, params, value)."""
+    colon = line.find(":")
+    if colon < 0:
+        return None
+    quote = line.find('"', 0, colon)
+    if quote >= 0:
+        # A quoted parameter value may itself contain ':'
+        in_quotes = False
+        for index in range(quote, len(line)):
+            char = line[index]
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ":" and not in_quotes:
+                colon = index
+                break
+        else:
+            return None
+    head, value = line[:colon], line[colon + 1:]
+    parts = head.split(";")
+    params = {}
+    for part in parts[1:]:
+        key, _, param_value = part.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return parts[0].upper(), params, value
+
+
+def iter_events(stream: Iterable[str]) -> Iterator[dict]:
+    """
+    Yield VEVENTs one at a time as {property: [(params, value), ...]}.
+
+    Components nested in an event (VALARM) are skipped.
+    """
+    event = None
+    depth = 0
+    for line in unfold_lines(stream):
+        # Cheap name check before splitting the line
+        name_end = _PROPERTY_NAME.match(line).end()
+        name = line[:name_end].upper()
+
+        if name == "BEGIN":
+            if line[name_end + 1:].strip().upper() == "VEVENT" and event is None:
+                event, depth = {}, 0
+            elif event is not None:
+                depth += 1
+            continue
+        if name == "END":
+            if event is not None:
+                if depth:
+                    depth -= 1
+                elif line[name_end + 1:].strip().upper() == "VEVENT":
+                    yield event
+                    event = None
+            continue
+        if event is None or depth or name not in EVENT_PROPERTIES:
+            continue
+
+        parsed = _split_content_line(line)
+        if parsed:
+            event.setdefault(parsed[0], []).append((parsed[1], parsed[2]))
+
+
+def _to_local(value):
+    """Convert an aware datetime to naive local time; dates and naive values pass through."""
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _zone(tzid: Optional[str]):
+    if not tzid:
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(tzid)
+    except Exception:
+        # Unknown (e.g. Windows-style) zone names are treated as local time
+        return None
+
+
+def parse_datetime(value: str, params: dict):
+    """Parse a DATE or DATE-TIME value (UTC, TZID or floating)."""
+    value = value.strip()
+    # Sliced by hand: strptime dominated import time on large calendars
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        if len(value) != 8 or not value.isdigit():
+            raise ValueError(f"Invalid date: {value}")
+        return datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    utc = value.endswith("Z")
+    if len(value) != 15 + utc or value[8] != "T" or not (value[:8] + value[9:15]).isdigit():
+        raise ValueError(f"Invalid date-time: {value}")
+    moment = datetime.datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                               int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if utc:
+        return moment.replace(tzinfo=datetime.timezone.utc)
+    zone = _zone(params.get("TZID"))
+    return moment.replace(tzinfo=zone) if zone else moment
+
+
+def parse_duration(value: str) -> datetime.timedelta:
+    """Parse an ICS DURATION such as PT1H30M, P1D or P2W."""
+    sign = -1 if value.startswith("-") else 1
+    value = value.lstrip("+-")
+    if not value.startswith("P"):
+        raise ValueError(f"Invalid duration: {value}")
+    total = datetime.timedelta()
+    number = ""
+    in_time = False
+    units = {"W": "weeks", "D": "days", "H": "hours", "M": "minutes", "S": "seconds"}
+    for char in value[1:]:
+        if char == "T":
+            in_time = True
+        elif char.isdigit():
+            number += char
+        elif char in units and number:
+            if char == "M" and not in_time:
+                raise ValueError(f"Month durations are not supported: {value}")
+            total += datetime.timedelta(**{units[char]: int(number)})
+            number = ""
+        else:
+            raise ValueError(f"Invalid duration: {value}")
+    return sign * total
+
+
+def parse_rule(value: str) -> dict:
+    rule = {}
+    for part in value.split(";"):
+        key, _, part_value = part.partition("=")
+        if key:
+            rule[key.upper()] = part_value
+    unsupported = set(rule) - SUPPORTED_RULE_PARTS
+    if unsupported or rule.get("FREQ") not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+        raise UnsupportedRule(f"unsupported RRULE {value}")
+    # Checked here so the lazy expansion never meets a value it cannot handle
+    if "BYDAY" in rule and not all(_BYDAY.fullmatch(text) for text in rule["BYDAY"].upper().split(",")):
+        raise UnsupportedRule(f"unsupported BYDAY in RRULE {value}")
+    for key in _INTEGER_PARTS:
+        if key in rule and not all(re.fullmatch(r"[+-]?\d+", text) for text in rule[key].split(",")):
+            raise UnsupportedRule(f"invalid {key} in RRULE {value}")
+    if "BYDAY" in rule:
+        rule["BYDAY"] = rule["BYDAY"].upper()
+    # Out-of-range values would never match, and the expansion would search forever
+    for key, (low, high) in _RANGES.items():
+        if key not in rule:
+            continue
+        if key == "BYDAY":
+            numbers = [int(text[:-2]) for text in rule[key].split(",") if text[:-2]]
+        else:
+            numbers = [int(text) for text in rule[key].split(",")]
+        if not all(low <= number <= high and number != 0 for number in numbers):
+            raise UnsupportedRule(f"{key} out of range in RRULE {value}")
+    return rule
+
+
+def _month_days(year: int, month: int, rule: dict, default_day: int) -> List[int]:
+    """Days of a month selected by BYMONTHDAY / BYDAY (with ordinals) or the start day."""
+    first = datetime.date(year, month, 1)
+    length = ((first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - first).days
+    days = set()
+    if "BYMONTHDAY" in rule:
+        for text in rule["BYMONTHDAY"].split(","):
+            day = int(text)
+            day = day if day > 0 else length + day + 1
+            if 1 <= day <= length:
+                days.add(day)
+    elif "BYDAY" in rule:
+        for text in rule["BYDAY"].split(","):
+            weekday = WEEKDAY_CODES[text[-2:]]
+            matching = [day for day in range(1, length + 1) if (first.weekday() + day - 1) % 7 == weekday]
+            ordinal = text[:-2]
+            if ordinal:
+                index = int(ordinal)
+                if -len(matching) <= index <= len(matching) and index != 0:
+                    days.add(matching[index - 1 if index > 0 else index])
+            else:
+                days.update(matching)
+    elif default_day <= length:
+        days.add(default_day)
+    return sorted(days)
+
+
+def _candidates(start, rule: dict, skip_before) -> Iterator:
+    """Yield candidate occurrence starts in order (may include some before `start`)."""
+    freq = rule["FREQ"]
+    interval = max(1, int(rule.get("INTERVAL", 1)))
+    start_date = start if not isinstance(start, datetime.datetime) else start.date()
+
+    def at(date):
+        if isinstance(start, datetime.datetime):
+            return start.replace(year=date.year, month=date.month, day=date.day)
+        return date
+
+    # Without COUNT, whole periods before the window can be skipped arithmetically
+    first_period = 0
+    if "COUNT" not in rule and skip_before is not None and freq in ("DAILY", "WEEKLY"):
+        period_days = interval * (1 if freq == "DAILY" else 7)
+        first_period = max(0, (skip_before - start_date).days // period_days - 1)
+
+    period = first_period
+    empty_periods = 0
+    while True:
+        if freq == "DAILY":
+            yield at(start_date + datetime.timedelta(days=period * interval))
+        elif freq == "WEEKLY":
+            week_start = start_date - datetime.timedelta(days=start_date.weekday())
+            week_start += datetime.timedelta(weeks=period * interval)
+            weekdays = sorted(WEEKDAY_CODES[text[-2:]] for text in rule["BYDAY"].split(",")) \
+                if "BYDAY" in rule else [start_date.weekday()]
+            for weekday in weekdays:
+                yield at(week_start + datetime.timedelta(days=weekday))
+        elif freq == "MONTHLY":
+            month_index = start_date.month - 1 + period * interval
+            year, month = start_date.year + month_index // 12, month_index % 12 + 1
+            days = _month_days(year, month, rule, start_date.day)
+            empty_periods = 0 if days else empty_periods + 1
+            for day in days:
+                yield at(datetime.date(year, month, day))
+        else:
+            year = start_date.year + period * interval
+            months = sorted(int(text) for text in rule["BYMONTH"].split(",")) \
+                if "BYMONTH" in rule else [start_date.month]
+            found = False
+            for month in months:
+                if "BYMONTH" in rule and ("BYDAY" in rule or "BYMONTHDAY" in rule):
+                    days = _month_days(year, month, rule, start_date.day)
+                else:
+                    days = _month_days(year, month, {}, start_date.day)
+                found = found or bool(days)
+                for day in days:
+                    yield at(datetime.date(year, month, day))
+            empty_periods = 0 if found else empty_periods + 1
+        if empty_periods >= MAX_EMPTY_PERIODS:
+            return
+        period += 1
+
+
+def iter_occurrences(start, rule: Optional[dict], window_start, window_end) -> Iterator:
+    """
+    Lazily yield occurrence starts (local time) of an event up to window_end.
+
+    Occurrences ending before window_start are the caller's to drop; COUNT is
+    always counted from the first occurrence.
+    """
+    if rule is None:
+        yield _to_local(start)
+        return
+
+    until = None
+    if "UNTIL" in rule:
+        until = _to_local(parse_datetime(rule["UNTIL"], {}))
+    count = int(rule["COUNT"]) if "COUNT" in rule else None
+    skip_before = window_start.date() if isinstance(window_start, datetime.datetime) else window_start
+
+    emitted = 0
+    for candidate in _candidates(start, rule, skip_before):
+        local = _to_local(candidate)
+        if _as_datetime(local) > window_end:
+            return
+        if until is not None and _compare_until(local, until):
+            return
+        if candidate < start:
+            continue
+        emitted += 1
+        yield local
+        if count is not None and emitted >= count:
+            return
+
+
+def _as_datetime(value) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.combine(value, datetime.time())
+
+
+def _compare_until(local, until) -> bool:
+    """True if an occurrence is past UNTIL (which may be a date or a datetime)."""
+    if isinstance(local, datetime.datetime) and not isinstance(until, datetime.datetime):
+        return local.date() > until
+    return _as_datetime(local) > _as_datetime(until)
+
+
+def event_intervals(event: dict, window_start: datetime.datetime, window_end: datetime.datetime,
+                    match: Optional[List[str]] = None):
+    """
+    Yield (start, end, all_day, key) for an event's occurrences in the window.
+
+    start/end are naive local datetimes; key identifies the occurrence for
+    RECURRENCE-ID overrides.
+    """
+    if "DTSTART" not in event:
+        return
+    if event.get("STATUS", [({}, "")])[0][1].upper() == "CANCELLED":
+        return
+    if match:
+        summary = event.get("SUMMARY", [({}, "")])[0][1].lower()
+        if not any(pattern.lower() in summary for pattern in match):
+            return
+
+    params, value = event["DTSTART"][0]
+    start = parse_datetime(value, params)
+    all_day = not isinstance(start, datetime.datetime)
+    if "DTEND" in event:
+        end_params, end_value = event["DTEND"][0]
+        duration = _as_datetime(_to_local(parse_datetime(end_value, end_params))) - _as_datetime(_to_local(start))
+    elif "DURATION" in event:
+        duration = parse_duration(event["DURATION"][0][1])
+    else:
+        duration = datetime.timedelta(days=1) if all_day else datetime.timedelta()
+    if duration <= datetime.timedelta():
+        return
+
+    rule = None
+    if "RRULE" in event:
+        try:
+            rule = parse_rule(event["RRULE"][0][1])
+        except (UnsupportedRule, ValueError) as e:
+            print(f"[WARNING] {e}; using the first occurrence only")
+
+    excluded = set()
+    for exdate_params, exdate_value in event.get("EXDATE", []):
+        for text in exdate_value.split(","):
+            excluded.add(_as_datetime(_to_local(parse_datetime(text, exdate_params))))
+
+    uid = event.get("UID", [({}, None)])[0][1]
+    for occurrence in iter_occurrences(start, rule, window_start, window_end):
+        begin = _as_datetime(occurrence)
+        if begin in excluded:
+            continue
+        end = begin + duration
+        if end <= window_start:
+            continue
+        yield begin, end, all_day, (uid, begin)
+
+
+def import_calendar(path: str, window_start: datetime.datetime, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                    match: Optional[List[str]] = None) -> List[Tuple[datetime.datetime, datetime.datetime, bool]]:
+    """
+    Return (start, end, all_day) mute intervals from a calendar, cached by file hash.
+
+    Args:
+        path: .ics file
+        window_start: Start of the look-ahead window (naive local)
+        horizon_days: Length of the window
+        match: Optional case-insensitive SUMMARY substrings to keep
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    key = (digest.hexdigest(), window_start, horizon_days, tuple(match or ()))
+    cached = _cache.get(os.path.abspath(path))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    window_end = window_start + datetime.timedelta(days=horizon_days)
+    intervals = {}
+    overridden = set()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for event in iter_events(f):
+            try:
+                if "RECURRENCE-ID" in event:
+                    # A moved/edited instance replaces the master's occurrence
+                    params, value = event["RECURRENCE-ID"][0]
+                    uid = event.get("UID", [({}, None)])[0][1]
+                    overridden.add((uid, _as_datetime(_to_local(parse_datetime(value, params)))))
+                for begin, end, all_day, occurrence in event_intervals(event, window_start, window_end, match):
+                    instance = "RECURRENCE-ID" in event
+                    intervals[(occurrence, instance)] = (begin, end, all_day)
+            except (ValueError, KeyError, IndexError, OverflowError) as e:
+                print(f"[WARNING] Skipping calendar event in {os.path.basename(path)}: {e!r}")
+
+    result = sorted(
+        interval for (occurrence, instance), interval in intervals.items()
+        if instance or occurrence not in overridden
+    )
+    _cache[os.path.abspath(path)] = (key, result)
+    return result
+
+
+def _minute_text(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def intervals_by_date(intervals) -> Tuple[Dict[datetime.date, List[dict]], set]:
+    """Split intervals into per-date windows; returns (windows by date, all-day dates)."""
+    windows: Dict[datetime.date, List[dict]] = {}
+    all_day_dates = set()
+    for begin, end, all_day in intervals:
+        day = begin.date()
+        while _as_datetime(day) < end:
+            day_start = _as_datetime(day)
+            if all_day:
+                all_day_dates.add(day)
+            else:
+                start_minute = max(0, int((begin - day_start).total_seconds() // 60))
+                end_seconds = (min(end, day_start + datetime.timedelta(days=1)) - day_start).total_seconds()
+                end_minute = min(MINUTES_PER_DAY, -int(-end_seconds // 60))  # round up
+                if end_minute > start_minute:
+                    # "00:00" as an end means midnight at the end of the day
+                    windows.setdefault(day, []).append({
+                        "start": _minute_text(start_minute),
+                        "end": _minute_text(end_minute % MINUTES_PER_DAY),
+                    })
+            day += datetime.timedelta(days=1)
+    return windows, all_day_dates
+
+
+def _base_entry(schedule_data: dict, date: datetime.date, exceptions: Dict[datetime.date, dict]):
+    """What the schedule says about a date before calendar events are added."""
+    if date in exceptions:
+        return exceptions[date]
+    for holiday in schedule_data.get("holidays", []):
+        if holiday.get("date") == f"{date.month:02d}-{date.day:02d}":
+            return holiday
+    return {"windows": schedule_data.get(DAYS[date.weekday()], [])}
+
+
+def merge_calendars(schedule_data: dict, base_dir: str, today: Optional[datetime.date] = None):
+    """
+    Merge the "calendars" of a config into its dated exceptions.
+
+    Args:
+        schedule_data: Parsed config.json contents
+        base_dir: Directory relative calendar paths are resolved against
+        today: Date the look-ahead window starts from (default: today)
+
+    Returns:
+        (merged schedule dict, calendar paths, epoch time after which the
+        window should be re-expanded)
+    """
+    today = today or datetime.date.today()
+    # Start a day early so events running past midnight into today are kept
+    window_start = datetime.datetime.combine(today - datetime.timedelta(days=1), datetime.time())
+    paths = []
+    intervals = []
+    shortest_horizon = None
+    for calendar in schedule_data.get("calendars", []):
+        path = calendar["path"]
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        paths.append(path)
+        horizon = int(calendar.get("horizon_days", DEFAULT_HORIZON_DAYS))
+        shortest_horizon = horizon if shortest_horizon is None else min(shortest_horizon, horizon)
+        try:
+            started = time.perf_counter()
+            found = import_calendar(path, window_start, horizon + 1, calendar.get("match"))
+            intervals += found
+            print(f"Calendar {os.path.basename(path)}: {len(found)} events in the next {horizon} days "
+                  f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        except OSError as e:
+            print(f"[WARNING] Could not read calendar {path}: {e}")
+        except Exception as e:
+            # One broken calendar must not take the rest of the schedule down
+            print(f"[WARNING] Skipping calendar {path}: {e!r}")
+
+    if not paths:
+        return schedule_data, paths, None
+
+    # Existing exceptions per date, so calendar windows add to them
+    exceptions: Dict[datetime.date, dict] = {}
+    for entry in schedule_data.get("exceptions", []):
+        first = datetime.date.fromisoformat(entry["date"])
+        last = datetime.date.fromisoformat(entry["until"]) if "until" in entry else first
+        day = first
+        while day <= last:
+            exceptions[day] = entry
+            day += datetime.timedelta(days=1)
+
+    windows, all_day_dates = intervals_by_date(intervals)
+    added = []
+    for date in sorted(set(windows) | all_day_dates):
+        if date in all_day_dates:
+            added.append({"date": date.isoformat(), "muted": True})
+            continue
+        base = _base_entry(schedule_data, date, exceptions)
+        if base.get("muted") is True:
+            continue
+        base_windows = [] if "muted" in base else base.get("windows", [])
+        if isinstance(base_windows, dict):
+            base_windows = [base_windows]
+        merged = base_windows + windows[date]
+        day_intervals(merged)  # validate before handing it to the compiler
+        added.append({"date": date.isoformat(), "windows": merged})
+
+    merged_data = dict(schedule_data)
+    merged_data["exceptions"] = list(schedule_data.get("exceptions", [])) + added
+    # Re-expand once half the shortest window has been used up
+    refresh_at = datetime.datetime.combine(today, datetime.time()) + datetime.timedelta(days=max(1, shortest_horizon // 2))
+    return merged_data, paths, refresh_at.timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the mute windows an .ics calendar produces")
+    parser.add_argument("path", help=".ics file")
+    parser.add_argument("--days", type=int, default=DEFAULT_HORIZON_DAYS, help="look-ahead window in days")
+    parser.add_argument("--match", action="append", help="only events whose summary contains this")
+    args = parser.parse_args()
+
+    window_start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    started = time.perf_counter()
+    intervals = import_calendar(args.path, window_start, args.days, args.match)
+    elapsed = time.perf_counter() - started
+    for begin, end, all_day in intervals:
+        if all_day:
+            print(f"{begin:%Y-%m-%d %a}  all day" + (f" (to {end - datetime.timedelta(days=1):%Y-%m-%d})"
+                                                      if end - begin > datetime.timedelta(days=1) else ""))
+        else:
+            print(f"{begin:%Y-%m-%d %a}  {begin:%H:%M} - {end:%H:%M}")
+    print(f"\n{len(intervals)} intervals in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
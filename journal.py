@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Event Journal
+
+Append-only record of what Auto Mute did: schedule transitions, enforcements
+(including re-mutes after the user unmuted during a mute window), pause /
+resume toggles and daemon start/stop. It answers questions like "how many
+hours was this machine muted last month, and how often was it overridden?"
+without keeping anything but the current state in memory.
+
+Layout of the journal directory:
+
+    events-000001.jsonl.gz   closed, compacted segments
+    events-000002.jsonl      the segment being appended to
+    rollup.json              daily totals, segment index and replay position
+
+Writes are buffered and appended in batches (every few seconds, when the
+buffer fills, and on close). The active segment is rotated once it exceeds
+max_bytes; closed segments are compacted (gzip) and deleted once they are
+older than retention_days. Deleting segments loses individual events but not
+totals, because the daily rollups are updated incrementally as each event is
+recorded and are kept for good. Queries over months of history therefore
+read rollup.json only; listing individual events reads just the segments
+whose time range overlaps the query.
+
+rollup.json is saved after each flush together with the (segment, offset) it
+covers, so after a crash the events written past that point are replayed
+into the rollups on the next start.
+
+Usage:
+    journal = Journal("journal")
+    journal.record("transition", muted=True)
+    journal.close()
+
+    python journal.py summary --month 2026-09
+    python journal.py summary --from 2026-09-01 --to 2026-09-30 --daily
+    python journal.py events --since 2026-10-01 --kind override
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIRECTORY = os.path.join(SCRIPT_DIR, "journal")
+ROLLUP_FILE = "rollup.json"
+ROLLUP_VERSION = 1
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_RETENTION_DAYS = 365
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_FLUSH_RECORDS = 256
+
+# Event kinds and the daily counter each one increments
+KIND_COUNTERS = {
+    "transition": None,  # counted as "mutes" / "unmutes" below
+    "enforce": "enforcements",
+    "override": "overrides",
+    "toggle": None,      # counted as "pauses" / "resumes" below
+    "start": "starts",
+    "stop": None,
+}
+DAY_FIELDS = ("muted_seconds", "mutes", "unmutes", "enforcements", "overrides",
+              "pauses", "resumes", "starts", "events")
+
+_SEGMENT_NAME = re.compile(r"^events-(\d{6})\.jsonl(\.gz)?$")
+
+
+def segment_name(sequence: int, compressed: bool = False) -> str:
+    return f"events-{sequence:06d}.jsonl" + (".gz" if compressed else "")
+
+
+def _local_date(t: float) -> str:
+    return datetime.datetime.fromtimestamp(t).date().isoformat()
+
+
+def _next_local_midnight(t: float) -> float:
+    day = datetime.datetime.fromtimestamp(t).date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(day, datetime.time()).timestamp()
+
+
+def _atomic_write(path: str, text: str):
+    """Write to a temp file in the same directory, then rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".rollup-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class Rollup:
+    """
+    Daily totals maintained incrementally from the event stream.
+
+    Muted time is accumulated from "transition" events: the machine counts as
+    muted from a transition to muted until the next transition, a pause, a
+    stop, or (after a crash) the next start, split at local midnight.
+    """
+
+    def __init__(self, data: Optional[dict] = None):
+        data = data or {}
+        self.days: Dict[str, Dict[str, float]] = data.get("days", {})
+        state = data.get("state", {})
+        self.muted_since: Optional[float] = state.get("muted_since")
+        self.last_time: Optional[float] = state.get("last_time")
+        self.segment: int = state.get("segment", 1)
+        self.offset: int = state.get("offset", 0)
+        # sequence -> {"first": t, "last": t, "events": n, "compressed": bool}
+        self.segments: Dict[int, dict] = {int(key): value for key, value in data.get("segments", {}).items()}
+
+    def to_dict(self) -> dict:
+        return {
+            "version": ROLLUP_VERSION,
+            "days": self.days,
+            "state": {
+                "muted_since": self.muted_since,
+                "last_time": self.last_time,
+                "segment": self.segment,
+                "offset": self.offset,
+            },
+            "segments": {str(key): value for key, value in sorted(self.segments.items())},
+        }
+
+    def _day(self, date: str) -> Dict[str, float]:
+        day = self.days.get(date)
+        if day is None:
+            day = self.days[date] = dict.fromkeys(DAY_FIELDS, 0)
+        return day
+
+    def _add_muted(self, start: float, end: float):
+        while start < end:
+            boundary = min(end, _next_local_midnight(start))
+            self._day(_local_date(start))["muted_seconds"] += boundary - start
+            start = boundary
+
+    def _end_muted(self, t: float):
+        if self.muted_since is not None:
+            self._add_muted(self.muted_since, t)
+            self.muted_since = None
+
+    def apply(self, record: dict, sequence: int):
+        """Fold one event into the totals and the segment index."""
+        t = record["t"]
+        kind = record["kind"]
+        day = self._day(_local_date(t))
+        day["events"] += 1
+        counter = KIND_COUNTERS.get(kind)
+        if counter:
+            day[counter] += 1
+
+        if kind == "transition":
+            self._end_muted(t)
+            if record.get("muted"):
+                day["mutes"] += 1
+                self.muted_since = t
+            else:
+                day["unmutes"] += 1
+        elif kind == "toggle":
+            if record.get("enabled"):
+                day["resumes"] += 1
+            else:
+                day["pauses"] += 1
+                self._end_muted(t)
+        elif kind == "stop":
+            self._end_muted(t)
+        elif kind == "start" and self.muted_since is not None:
+            # No stop was recorded (crash): only count up to the last event seen
+            self._end_muted(max(self.muted_since, self.last_time or self.muted_since))
+
+        self.last_time = t
+        entry = self.segments.setdefault(sequence, {"first": t, "last": t, "events": 0, "compressed": False})
+        entry["last"] = t
+        entry["events"] += 1
+
+    def summary(self, first: datetime.date, last: datetime.date, now: Optional[float] = None) -> dict:
+        """
+        Totals for the local dates first..last (inclusive).
+
+        Args:
+            first: First date
+            last: Last date
+            now: If given and a mute is still open, count it up to this time
+
+        Returns:
+            {"from", "to", "totals": {...}, "days": {date: {...}}}
+        """
+        days = {}
+        first_key, last_key = first.isoformat(), last.isoformat()
+        for date, values in self.days.items():
+            if first_key <= date <= last_key:
+                days[date] = dict(values)
+        if now is not None and self.muted_since is not None and self.muted_since < now:
+            start = self.muted_since
+            while start < now:
+                boundary = min(now, _next_local_midnight(start))
+                date = _local_date(start)
+                if first_key <= date <= last_key:
+                    days.setdefault(date, dict.fromkeys(DAY_FIELDS, 0))["muted_seconds"] += boundary - start
+                start = boundary
+        totals = dict.fromkeys(DAY_FIELDS, 0)
+        for values in days.values():
+            for field in DAY_FIELDS:
+                totals[field] += values.get(field, 0)
+        return {"from": first_key, "to": last_key, "totals": totals, "days": dict(sorted(days.items()))}
+
+
+def load_rollup(directory: str) -> Rollup:
+    """Read rollup.json from a journal directory (empty if missing or unreadable)."""
+    path = os.path.join(directory, ROLLUP_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return Rollup()
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Could not read {path}, rebuilding totals: {e}")
+        return Rollup()
+    if data.get("version") != ROLLUP_VERSION:
+        print(f"[WARNING] Unknown rollup version in {path}, rebuilding totals")
+        return Rollup()
+    return Rollup(data)
+
+
+def list_segments(directory: str) -> Dict[int, str]:
+    """Map segment sequence numbers to file names (compressed preferred)."""
+    segments: Dict[int, str] = {}
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return segments
+    for name in names:
+        match = _SEGMENT_NAME.match(name)
+        if match:
+            sequence = int(match.group(1))
+            if sequence not in segments or match.group(2):
+                segments[sequence] = name
+    return segments
+
+
+def _read_segment(path: str, offset: int = 0) -> Iterator[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        if offset:
+            f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn final write
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class Journal:
+    """
+    Buffered, rotating, append-only event journal with daily rollups.
+
+    Attributes:
+        written: Events written to disk so far
+        flushes: Number of batched writes
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES,
+                 retention_days: int = DEFAULT_RETENTION_DAYS, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_records: int = DEFAULT_FLUSH_RECORDS, clock: Callable[[], float] = time.time,
+                 background: bool = True):
+        """
+        Open (or create) a journal and replay anything rollup.json missed.
+
+        Args:
+            directory: Journal directory
+            max_bytes: Rotate the active segment past this size
+            retention_days: Delete closed segments older than this (0 keeps all)
+            flush_interval: Seconds between background flushes
+            flush_records: Flush as soon as this many events are buffered
+            clock: Source of event timestamps (epoch seconds)
+            background: Flush from a daemon thread; otherwise only when the
+                buffer fills, on flush() and on close()
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.clock = clock
+        self.written = 0
+        self.flushes = 0
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.rollup = load_rollup(directory)
+        self._recover()
+        self._file = open(os.path.join(directory, segment_name(self.rollup.segment)), "ab")
+        self._size = self._file.tell()
+        self.rollup.offset = self._size
+
+        self.record("start")
+        if background:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _recover(self):
+        """Fold events written after the last rollup save back into the totals."""
+        segments = list_segments(self.directory)
+        rollup = self.rollup
+        if not rollup.segments and not rollup.days and segments:
+            # Lost or new-format rollup: rebuild from the oldest segment still on disk
+            rollup.segment, rollup.offset = min(segments), 0
+        replayed = 0
+        for sequence in sorted(s for s in segments if s >= rollup.segment):
+            name = segments[sequence]
+            offset = rollup.offset if sequence == rollup.segment else 0
+            position = offset
+            for record in _read_segment(os.path.join(self.directory, name), offset):
+                rollup.apply(record, sequence)
+                replayed += 1
+            if not name.endswith(".gz"):
+                position = _drop_torn_tail(os.path.join(self.directory, name))
+            rollup.segment, rollup.offset = sequence, position
+        if replayed:
+            print(f"[WARNING] Replayed {replayed} journal events missing from {ROLLUP_FILE}")
+        if segments.get(rollup.segment, "").endswith(".gz"):
+            # Never append to a compacted segment
+            rollup.segment, rollup.offset = rollup.segment + 1, 0
+
+    def record(self, kind: str, t: Optional[float] = None, **fields):
+        """
+        Append an event (buffered) and update the daily totals.
+
+        Args:
+            kind: "transition", "enforce", "override", "toggle", "start" or "stop"
+            t: Epoch time (default: now)
+            **fields: Extra JSON-serializable fields, e.g. muted=True
+        """
+        event = {"t": round(self.clock() if t is None else t, 3), "kind": kind}
+        event.update(fields)
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.rollup.apply(event, self.rollup.segment)
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.flush_records
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered events, rotate/compact if needed and save rollup.json."""
+        with self._write_lock:
+            with self._lock:
+                if not self._buffer or self._file is None:
+                    return
+                data = "".join(self._buffer).encode("utf-8")
+                count = len(self._buffer)
+                self._buffer = []
+                # Rollups already include these events; snapshot before the
+                # next record() adds more
+                self._size += len(data)
+                self.rollup.offset = self._size
+                snapshot = json.dumps(self.rollup.to_dict(), separators=(",", ":"))
+                rotate = self._size >= self.max_bytes
+                if rotate:
+                    self.rollup.segment += 1
+                    self.rollup.offset = 0
+            try:
+                self._file.write(data)
+                self._file.flush()
+                self.written += count
+                self.flushes += 1
+                if rotate:
+                    self._file.close()
+                    self._file = open(os.path.join(self.directory, segment_name(self.rollup.segment)), "ab")
+                    self._size = 0
+                    with self._lock:
+                        snapshot = json.dumps(self.rollup.to_dict(), separators=(",", ":"))
+                _atomic_write(os.path.join(self.directory, ROLLUP_FILE), snapshot)
+                if rotate:
+                    self.compact()
+            except OSError as e:
+                print(f"[WARNING] Failed to write journal: {e}")
+
+    def compact(self) -> int:
+        """
+        Compress closed segments and delete those past retention.
+
+        Returns:
+            Number of segments compressed or deleted
+        """
+        changed = 0
+        cutoff = self.clock() - self.retention_days * 86400 if self.retention_days else None
+        for sequence, name in sorted(list_segments(self.directory).items()):
+            if sequence >= self.rollup.segment:
+                continue
+            path = os.path.join(self.directory, name)
+            entry = self.rollup.segments.get(sequence)
+            try:
+                if cutoff is not None and entry is not None and entry["last"] < cutoff:
+                    os.remove(path)
+                    with self._lock:
+                        self.rollup.segments.pop(sequence, None)
+                    changed += 1
+                elif not name.endswith(".gz"):
+                    _compress(path)
+                    with self._lock:
+                        if entry is not None:
+                            entry["compressed"] = True
+                    changed += 1
+            except OSError as e:
+                print(f"[WARNING] Failed to compact {name}: {e}")
+        if changed:
+            with self._lock:
+                snapshot = json.dumps(self.rollup.to_dict(), separators=(",", ":"))
+            _atomic_write(os.path.join(self.directory, ROLLUP_FILE), snapshot)
+        return changed
+
+    def summary(self, first: datetime.date, last: datetime.date) -> dict:
+        """Daily totals for first..last, counting a mute that is still open."""
+        with self._lock:
+            return self.rollup.summary(first, last, now=self.clock())
+
+    def close(self):
+        """Record a stop event, write everything out and stop the flush thread."""
+        if self._file is None:
+            return
+        self.record("stop")
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self.flush()
+        with self._write_lock:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+
+def _drop_torn_tail(path: str) -> int:
+    """Cut a partial last line (a write torn by a crash) so appends start on a fresh line; returns the size."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            print(f"[WARNING] Dropped a torn event at the end of {os.path.basename(path)}")
+        return f.seek(0, os.SEEK_END)
+
+
+def _compress(path: str):
+    """Replace a segment with its gzip-compressed copy."""
+    temp_path = path + ".gz.tmp"
+    with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=6) as target:
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            target.write(chunk)
+    os.replace(temp_path, path + ".gz")
+    os.remove(path)
+
+
+def read_events(directory: str = DEFAULT_DIRECTORY, since: Optional[float] = None,
+                until: Optional[float] = None, kinds: Optional[set] = None) -> Iterator[dict]:
+    """
+    Yield events in time order, skipping segments outside [since, until).
+
+    Args:
+        directory: Journal directory
+        since: Epoch time lower bound
+        until: Epoch time upper bound (exclusive)
+        kinds: Only these event kinds
+    """
+    index = load_rollup(directory).segments
+    for sequence, name in sorted(list_segments(directory).items()):
+        entry = index.get(sequence)
+        if entry is not None:
+            if since is not None and entry["last"] < since:
+                continue
+            if until is not None and entry["first"] >= until:
+                continue
+        for record in _read_segment(os.path.join(directory, name)):
+            t = record.get("t", 0)
+            if since is not None and t < since:
+                continue
+            if until is not None and t >= until:
+                continue
+            if kinds and record.get("kind") not in kinds:
+                continue
+            yield record
+
+
+def _format_hours(seconds: float) -> str:
+    return f"{seconds / 3600:.1f} h"
+
+
+def format_summary(report: dict, daily: bool = False) -> str:
+    """Human-readable summary report."""
+    totals = report["totals"]
+    lines = [
+        f"Auto Mute journal {report['from']} .. {report['to']}",
+        f"  Muted:        {_format_hours(totals['muted_seconds'])}",
+        f"  Mutes:        {totals['mutes']}   Unmutes: {totals['unmutes']}",
+        f"  Overrides:    {totals['overrides']} (restored after a manual change)",
+        f"  Enforcements: {totals['enforcements']}",
+        f"  Pauses:       {totals['pauses']}   Resumes: {totals['resumes']}",
+        f"  Starts:       {totals['starts']}",
+    ]
+    if daily and report["days"]:
+        lines.append("")
+        lines.append(f"  {'Date':<10}  {'Muted':>8}  {'Overrides':>9}  {'Pauses':>6}")
+        for date, values in report["days"].items():
+            lines.append(f"  {date:<10}  {_format_hours(values['muted_seconds']):>8}  "
+                         f"{values['overrides']:>9}  {values['pauses']:>6}")
+    return "\n".join(lines)
+
+
+def _month_range(month: str):
+    first = datetime.date.fromisoformat(month + "-01")
+    following = (first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return first, following - datetime.timedelta(days=1)
+
+
+def _epoch(date: Optional[datetime.date]) -> Optional[float]:
+    return datetime.datetime.combine(date, datetime.time()).timestamp() if date else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Auto Mute event journal")
+    parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help="journal directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = commands.add_parser("summary", help="muted hours and counts from the daily rollups")
+    summary_parser.add_argument("--month", help="YYYY-MM (default: current month)")
+    summary_parser.add_argument("--from", dest="first", type=datetime.date.fromisoformat, help="first date")
+    summary_parser.add_argument("--to", dest="last", type=datetime.date.fromisoformat, help="last date")
+    summary_parser.add_argument("--daily", action="store_true", help="show one line per day")
+    summary_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    events_parser = commands.add_parser("events", help="list individual events")
+    events_parser.add_argument("--since", type=datetime.date.fromisoformat, help="first date")
+    events_parser.add_argument("--until", type=datetime.date.fromisoformat, help="stop before this date")
+    events_parser.add_argument("--kind", action="append", choices=sorted(KIND_COUNTERS), help="only this kind")
+    events_parser.add_argument("--limit", type=int, default=0, help="stop after this many events")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        if args.first or args.last:
+            today = datetime.date.today()
+            first, last = args.first or today.replace(day=1), args.last or today
+        else:
+            first, last = _month_range(args.month or datetime.date.today().strftime("%Y-%m"))
+        report = load_rollup(args.dir).summary(first, last, now=time.time())
+        print(json.dumps(report, indent=2) if args.json else format_summary(report, args.daily))
+    else:
+        shown = 0
+        for record in read_events(args.dir, _epoch(args.since), _epoch(args.until),
+                                  set(args.kind) if args.kind else None):
+            at = datetime.datetime.fromtimestamp(record.pop("t")).strftime("%Y-%m-%d %H:%M:%S")
+            kind = record.pop("kind")
+            extra = " ".join(f"{key}={value}" for key, value in record.items())
+            print(f"{at}  {kind:<10} {extra}".rstrip())
+            shown += 1
+            if args.limit and shown >= args.limit:
+                break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Auto Mute - Metrics
+
+Low-overhead in-process instrumentation: call counts, latency histograms,
+failure counts and last-error timestamps for the hot path (checks, audio
+get/set, config loads, notifications), plus plain event counters.
+
+MetricsWriter periodically writes the registry atomically to a JSON file and
+a Prometheus text-format file, so enforcement lag and COM failure rates can be
+inspected on machines running under pythonw.exe.
+
+Usage:
+    import metrics
+
+    with metrics.timer("audio_get_mute"):
+        backend.get_mute()
+    metrics.failure("audio_get_mute", error)
+    metrics.increment("endpoint_mute_events")
+    metrics.observe("transition_lag_seconds", 0.002)
+
+    metrics.MetricsWriter("metrics.json", "metrics.prom").start()
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+    0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0,
+)
+
+
+class OperationStats:
+    """Counts, failures and a latency histogram for one operation."""
+
+    __slots__ = ("calls", "failures", "last_error", "last_error_time", "bucket_counts", "total_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_error_time: Optional[float] = None
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def fail(self, error):
+        self.failures += 1
+        self.last_error = str(error)
+        self.last_error_time = time.time()
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_error_time": self.last_error_time,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else None,
+            "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], self.bucket_counts)),
+        }
+
+
+class _Timer:
+    """Context manager timing one call; exceptions count as failures."""
+
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+        if exc is not None:
+            self.registry.failure(self.name, exc)
+        return False
+
+
+class MetricsRegistry:
+    """Thread-safe collection of operation stats and event counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, OperationStats] = {}
+        self._counters: Dict[str, int] = {}
+        self.started = time.time()
+
+    def _operation(self, name: str) -> OperationStats:
+        stats = self._operations.get(name)
+        if stats is None:
+            stats = self._operations.setdefault(name, OperationStats())
+        return stats
+
+    def timer(self, name: str) -> _Timer:
+        """Time a block: `with registry.timer("name"): ...`."""
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """Record a latency sample (also counts as a call)."""
+        with self._lock:
+            self._operation(name).observe(seconds)
+
+    def failure(self, name: str, error):
+        """Record a failed call and remember the error."""
+        with self._lock:
+            self._operation(name).fail(error)
+
+    def increment(self, name: str, amount: int = 1):
+        """Increase an event counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of all metrics."""
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "started": self.started,
+                "pid": os.getpid(),
+                "operations": {name: stats.snapshot() for name, stats in sorted(self._operations.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_prometheus(self, snapshot: Optional[dict] = None) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        snapshot = snapshot or self.snapshot()
+        operations = snapshot["operations"]
+        lines: List[str] = []
+
+        lines.append("# TYPE auto_mute_calls_total counter")
+        lines += [f'auto_mute_calls_total{{op="{name}"}} {op["calls"]}' for name, op in operations.items()]
+        lines.append("# TYPE auto_mute_failures_total counter")
+        lines += [f'auto_mute_failures_total{{op="{name}"}} {op["failures"]}' for name, op in operations.items()]
+        lines.append("# TYPE auto_mute_last_error_timestamp_seconds gauge")
+        lines += [
+            f'auto_mute_last_error_timestamp_seconds{{op="{name}"}} {op["last_error_time"]}'
+            for name, op in operations.items() if op["last_error_time"] is not None
+        ]
+
+        lines.append("# TYPE auto_mute_latency_seconds histogram")
+        for name, op in operations.items():
+            cumulative = 0
+            for bound, count in op["buckets"].items():
+                cumulative += count
+                lines.append(f'auto_mute_latency_seconds_bucket{{op="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'auto_mute_latency_seconds_sum{{op="{name}"}} {op["total_seconds"]}')
+            lines.append(f'auto_mute_latency_seconds_count{{op="{name}"}} {op["calls"]}')
+
+        lines.append("# TYPE auto_mute_events_total counter")
+        lines += [f'auto_mute_events_total{{event="{name}"}} {value}' for name, value in snapshot["counters"].items()]
+        lines.append("# TYPE auto_mute_start_time_seconds gauge")
+        lines.append(f"auto_mute_start_time_seconds {snapshot['started']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        """Atomically write the current metrics to the given files."""
+        snapshot = self.snapshot()
+        if json_path:
+            _atomic_write(json_path, json.dumps(snapshot, indent=2))
+        if prometheus_path:
+            _atomic_write(prometheus_path, self.to_prometheus(snapshot))
+
+
+def _atomic_write(path: str, text: str):
+    """Write to a temp file in the same directory, then rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class MetricsWriter:
+    """Background thread writing a registry to disk every `interval` seconds."""
+
+    def __init__(self, json_path: str, prometheus_path: Optional[str] = None,
+                 interval: float = 60.0, registry: Optional[MetricsRegistry] = None):
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self.registry = registry or default_registry
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and write a final snapshot."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self._write()
+
+    def _write(self):
+        try:
+            self.registry.write(self.json_path, self.prometheus_path)
+        except Exception as e:
+            print(f"[WARNING] Failed to write metrics: {e}")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._write()
+
+
+# Process-wide registry used by the module-level helpers
+default_registry = MetricsRegistry()
+timer = default_registry.timer
+observe = default_registry.observe
+failure = default_registry.failure
+increment = default_registry.increment
+snapshot = default_registry.snapshot
@@ -0,0 +1,514 @@
+"""
+Auto Mute - Transition Scheduler
+
+Runs the mute check at schedule boundaries instead of polling every second.
+The scheduler computes the next start/end transition from the compiled
+schedule, waits on a single event until that moment and enforces the new
+state as soon as it wakes. Toggles, config changes and shutdown set the event
+so the loop reacts immediately. With a lead (the volume fade length) it
+also wakes that long before each mute boundary so the fade can start.
+
+Boundaries come from schedule_index.iter_transitions() as absolute times,
+so DST gaps and folds do not shift or drop them, and SystemClock also arms
+an absolute wall-clock alarm (a waitable timer on Windows, a timerfd on
+Linux) so a boundary that passes during suspend or a clock step is enforced
+as soon as the machine resumes. On every wake the scheduler compares
+wall-clock and monotonic progress; a divergence (suspend, NTP step, DST
+change) is logged and the state is re-evaluated immediately. None of this
+adds periodic wakeups.
+
+The clock is injectable, so wakeups per day, transition lag and clock jumps
+can be measured on any platform with VirtualClock. WakeDebouncer rate-limits
+wakeups triggered by endpoint change notifications when the user keeps
+unmuting.
+
+Usage:
+    from mute_scheduler import MuteScheduler
+
+    scheduler = MuteScheduler(core.check_mute_time, core.get_compiled_schedule)
+    scheduler.run()  # blocks until scheduler.stop()
+"""
+
+import collections
+import datetime
+import errno
+import os
+import select
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+import metrics
+from schedule_index import iter_transitions
+
+
+class WallClockAlarm:
+    """
+    Fires a callback at an absolute wall-clock time.
+
+    Unlike a monotonic timeout, the alarm follows clock steps and fires right
+    after resume if its time passed while the machine was suspended. Uses a
+    waitable timer on Windows and a timerfd on Linux; create() returns None
+    elsewhere.
+    """
+
+    @classmethod
+    def create(cls) -> Optional["WallClockAlarm"]:
+        try:
+            if sys.platform == "win32":
+                return _WindowsAlarm()
+            if sys.platform.startswith("linux"):
+                return _TimerfdAlarm()
+        except Exception as e:
+            print(f"[WARNING] Wall-clock alarm unavailable: {e}")
+        return None
+
+    def __init__(self):
+        self._event: Optional[threading.Event] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def arm(self, epoch_seconds: float, event: threading.Event):
+        """Set `event` at the given time.time() value."""
+        self._event = event
+        self._set(epoch_seconds)
+
+    def disarm(self):
+        self._set(None)
+
+    def _fire(self):
+        event = self._event
+        if event is not None:
+            event.set()
+
+    def _set(self, epoch_seconds: Optional[float]):
+        raise NotImplementedError
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class _WindowsAlarm(WallClockAlarm):
+    """Absolute waitable timer (adjusted for time changes, signaled on resume)."""
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateWaitableTimerW.restype = wintypes.HANDLE
+        kernel32.CreateWaitableTimerW.argtypes = (ctypes.c_void_p, wintypes.BOOL, wintypes.LPCWSTR)
+        kernel32.SetWaitableTimer.argtypes = (
+            wintypes.HANDLE, ctypes.POINTER(ctypes.c_longlong), wintypes.LONG,
+            ctypes.c_void_p, ctypes.c_void_p, wintypes.BOOL,
+        )
+        kernel32.CancelWaitableTimer.argtypes = (wintypes.HANDLE,)
+        kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+        kernel32.WaitForSingleObject.restype = wintypes.DWORD
+
+        self._ctypes = ctypes
+        self._kernel32 = kernel32
+        # Synchronization timer: resets itself once the wait is satisfied
+        self._timer = kernel32.CreateWaitableTimerW(None, False, None)
+        if not self._timer:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self._thread.start()
+
+    def _set(self, epoch_seconds: Optional[float]):
+        if epoch_seconds is None:
+            self._kernel32.CancelWaitableTimer(self._timer)
+            return
+        # Positive due times are absolute UTC FILETIMEs (100 ns since 1601)
+        due = self._ctypes.c_longlong(int((epoch_seconds + 11644473600) * 10_000_000))
+        self._kernel32.SetWaitableTimer(self._timer, self._ctypes.byref(due), 0, None, None, False)
+
+    def _run(self):
+        INFINITE, WAIT_OBJECT_0 = 0xFFFFFFFF, 0
+        while self._kernel32.WaitForSingleObject(self._timer, INFINITE) == WAIT_OBJECT_0:
+            self._fire()
+
+
+class _TimerfdAlarm(WallClockAlarm):
+    """CLOCK_REALTIME timerfd that is also woken when the clock is set."""
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        import ctypes.util
+
+        class timespec(ctypes.Structure):
+            _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+        class itimerspec(ctypes.Structure):
+            _fields_ = [("it_interval", timespec), ("it_value", timespec)]
+
+        self._ctypes = ctypes
+        self._itimerspec = itimerspec
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        CLOCK_REALTIME = 0
+        self._fd = self._libc.timerfd_create(CLOCK_REALTIME, os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "timerfd_create failed")
+        self._thread.start()
+
+    def _set(self, epoch_seconds: Optional[float]):
+        TFD_TIMER_ABSTIME, TFD_TIMER_CANCEL_ON_SET = 1, 2
+        spec = self._itimerspec()
+        if epoch_seconds is not None:
+            # A zero it_value would disarm, so never pass exactly 0
+            spec.it_value.tv_sec = int(epoch_seconds)
+            spec.it_value.tv_nsec = max(1, int((epoch_seconds % 1) * 1e9))
+        flags = TFD_TIMER_ABSTIME | TFD_TIMER_CANCEL_ON_SET
+        self._libc.timerfd_settime(self._fd, flags, self._ctypes.byref(spec), None)
+
+    def _run(self):
+        while True:
+            select.select([self._fd], [], [])
+            try:
+                os.read(self._fd, 8)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                # ECANCELED: the clock was set; wake so the loop re-evaluates
+                if e.errno != errno.ECANCELED:
+                    raise
+            self._fire()
+
+
+class SystemClock:
+    """Real wall clock and blocking waits, backed by a wall-clock alarm."""
+
+    def __init__(self, wall_alarm: bool = True):
+        self._use_alarm = wall_alarm
+        self._alarm: Optional[WallClockAlarm] = None
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def wait(self, event: threading.Event, timeout: Optional[float]) -> bool:
+        alarm = None
+        if timeout is not None and self._use_alarm:
+            if self._alarm is None:
+                self._alarm = WallClockAlarm.create()
+                self._use_alarm = self._alarm is not None
+            alarm = self._alarm
+        if alarm is None:
+            return event.wait(timeout)
+        alarm.arm(time.time() + timeout, event)
+        try:
+            return event.wait(timeout)
+        finally:
+            alarm.disarm()
+
+
+class VirtualClock:
+    """
+    Simulated clock for measuring the scheduler without real waiting.
+
+    A wait that is not interrupted advances virtual time by the full timeout
+    plus an optional simulated wakeup latency. jump() steps the wall clock
+    without moving the monotonic clock, like a suspend, an NTP step or a DST
+    change; a wait ends early once the wall clock passes its deadline, as
+    SystemClock's wall-clock alarm would.
+    """
+
+    def __init__(self, start: datetime.datetime, wakeup_latency: float = 0.0):
+        self._now = start
+        self._monotonic = 0.0
+        self._jumps = []  # (monotonic time, seconds), sorted
+        self.wakeup_latency = wakeup_latency
+
+    def now(self) -> datetime.datetime:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def advance(self, seconds: float):
+        """Move virtual time forward (local wall time follows DST like a real clock)."""
+        moved = self._now.astimezone() + datetime.timedelta(seconds=seconds)
+        if self._now.tzinfo:
+            self._now = moved.astimezone(self._now.tzinfo)
+        else:
+            # fromtimestamp() sets `fold` in a repeated hour, as datetime.now() does
+            self._now = datetime.datetime.fromtimestamp(moved.timestamp())
+        self._monotonic += seconds
+
+    def jump(self, seconds: float, after: float = 0.0):
+        """
+        Step the wall clock by `seconds` (may be negative).
+
+        Args:
+            seconds: Size of the step
+            after: Apply the step this many (monotonic) seconds from now,
+                i.e. during a later wait
+        """
+        if after <= 0:
+            self._now += datetime.timedelta(seconds=seconds)
+        else:
+            self._jumps.append((self._monotonic + after, seconds))
+            self._jumps.sort()
+
+    def wait(self, event: threading.Event, timeout: Optional[float]) -> bool:
+        if event.is_set():
+            return True
+        if timeout is None:
+            # Nothing would ever wake us in a simulation
+            raise RuntimeError("VirtualClock cannot wait without a timeout")
+
+        wake_at = self._monotonic + timeout
+        wall_deadline = self._now + datetime.timedelta(seconds=timeout)
+        while self._jumps and self._jumps[0][0] <= wake_at:
+            at, seconds = self._jumps.pop(0)
+            self.advance(at - self._monotonic)
+            self._now += datetime.timedelta(seconds=seconds)
+            # The wall-clock alarm fires at the deadline, whichever clock gets there first
+            until_wall = (wall_deadline - self._now).total_seconds()
+            wake_at = self._monotonic + max(0.0, min(wake_at - self._monotonic, until_wall))
+        self.advance(wake_at - self._monotonic + self.wakeup_latency)
+        return event.is_set()
+
+
+class MuteScheduler:
+    """
+    Event-driven replacement for the minute polling loop.
+
+    Attributes:
+        wakeups: Number of times the loop has woken up
+        transition_lags: Recent lag samples (seconds) between a schedule
+            boundary and the check that enforced it
+        last_wake_reason: Reason passed to the most recent wake() call
+        clock_jumps: Number of wall/monotonic divergences detected
+        last_clock_jump: Size in seconds of the most recent one
+    """
+
+    def __init__(
+        self,
+        check: Callable[[datetime.datetime], None],
+        get_schedule: Callable,
+        clock=None,
+        max_wait: Optional[float] = 60.0,
+        heartbeat: Optional[Callable[[Optional[float]], None]] = None,
+        jump_threshold: float = 5.0,
+        lead: Optional[Callable[[], float]] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            check: Called with the current datetime to evaluate and enforce
+            get_schedule: Returns the current CompiledSchedule
+            clock: SystemClock (default) or VirtualClock
+            max_wait: Upper bound on a single wait in seconds, so a manual
+                unmute is still corrected between transitions. None waits
+                only for transitions and wake() calls.
+            heartbeat: Called with the upcoming wait timeout before each
+                wait, so a supervisor can tell a hung loop from a long sleep
+            jump_threshold: Seconds of wall/monotonic divergence (or of
+                oversleeping) during one wait that count as a clock jump
+            lead: Returns how many seconds before a mute boundary to wake
+                as well (the volume fade-out length), or None
+        """
+        self.check = check
+        self.get_schedule = get_schedule
+        self.clock = clock or SystemClock()
+        self.max_wait = max_wait
+        self.heartbeat = heartbeat
+        self.jump_threshold = jump_threshold
+        self.lead = lead
+
+        self.wakeups = 0
+        self.transition_lags = collections.deque(maxlen=256)
+        self.last_wake_reason = None
+        self.clock_jumps = 0
+        self.last_clock_jump: Optional[float] = None
+
+        self._event = threading.Event()
+        self._running = False
+        self._stopped = False
+        self._pending_boundary: Optional[datetime.datetime] = None
+        self._started_monotonic: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def wake(self, reason: str = "wake"):
+        """Interrupt the current wait and re-evaluate immediately."""
+        self.last_wake_reason = reason
+        self._event.set()
+
+    def stop(self):
+        """Stop the loop after the current iteration."""
+        self._stopped = True
+        self.wake("stop")
+
+    def _next_timeout(self, now: datetime.datetime) -> Optional[float]:
+        """Seconds until the next boundary, capped by max_wait."""
+        self._pending_boundary = None
+        now = now.astimezone()
+        try:
+            transition = next(iter_transitions(self.get_schedule(), now), None)
+        except Exception as e:
+            print(f"[ERROR] Could not compute next transition: {e}")
+            transition = None
+
+        timeout = self.max_wait
+        if transition:
+            at, muted = transition
+            until = max(0.0, (at - now).total_seconds())
+            lead = self.lead() if self.lead is not None and muted else 0.0
+            if lead and until > lead:
+                # Wake early so check() can start the fade-out; the wake after it is the boundary
+                if timeout is None or until - lead <= timeout:
+                    timeout = until - lead
+            elif timeout is None or until <= timeout:
+                self._pending_boundary = at
+                timeout = until
+        return timeout
+
+    def run_once(self):
+        """Evaluate, enforce and wait for the next boundary or wake()."""
+        now = self.clock.now()
+        if self._started_monotonic is None:
+            self._started_monotonic = self.clock.monotonic()
+
+        if self._pending_boundary is not None and now.astimezone() >= self._pending_boundary:
+            lag = (now.astimezone() - self._pending_boundary).total_seconds()
+            self.transition_lags.append(lag)
+            metrics.observe("transition_lag", lag)
+
+        self.check(now)
+        timeout = self._next_timeout(now)
+        if self.heartbeat is not None:
+            self.heartbeat(timeout)
+
+        wall_before = self.clock.now()
+        monotonic_before = self.clock.monotonic()
+        # Clear after waking so a wake() that lands during check() is not lost
+        self.clock.wait(self._event, timeout)
+        self._event.clear()
+        self.wakeups += 1
+        metrics.increment("scheduler_wakeups")
+        self._detect_clock_jump(wall_before, monotonic_before, timeout)
+
+    def _detect_clock_jump(self, wall_before: datetime.datetime, monotonic_before: float,
+                           timeout: Optional[float]):
+        """Compare wall and monotonic progress across a wait."""
+        slept = self.clock.monotonic() - monotonic_before
+        # Naive local difference, so a DST change also counts as a jump
+        jump = (self.clock.now() - wall_before).total_seconds() - slept
+        overslept = timeout is not None and slept - timeout > self.jump_threshold
+        if abs(jump) <= self.jump_threshold and not overslept:
+            return
+
+        # The next run_once() re-evaluates right away and re-arms the wait
+        self.clock_jumps += 1
+        self.last_clock_jump = jump if abs(jump) > self.jump_threshold else slept - timeout
+        self._pending_boundary = None  # not a scheduling lag
+        self.last_wake_reason = "clock"
+        metrics.increment("clock_jumps")
+        print(f"[WARNING] Clock jumped {self.last_clock_jump:+.0f}s "
+              f"(suspend, time change or DST); re-evaluating")
+
+    def run(self):
+        """Run until stop() is called."""
+        self._running = True
+        try:
+            while not self._stopped:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"[ERROR] Scheduler error: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    self.clock.wait(self._event, 5)  # Wait before retrying
+        finally:
+            self._running = False
+
+    def stats(self) -> dict:
+        """
+        Summarize wakeups and transition lag.
+
+        Returns:
+            Dictionary with wakeups, wakeups_per_day and lag figures in seconds
+        """
+        elapsed = 0.0
+        if self._started_monotonic is not None:
+            elapsed = self.clock.monotonic() - self._started_monotonic
+        lags = list(self.transition_lags)
+        return {
+            "wakeups": self.wakeups,
+            "elapsed_seconds": elapsed,
+            "wakeups_per_day": self.wakeups * 86400 / elapsed if elapsed else None,
+            "transitions": len(lags),
+            "max_lag_seconds": max(lags) if lags else None,
+            "mean_lag_seconds": sum(lags) / len(lags) if lags else None,
+            "clock_jumps": self.clock_jumps,
+        }
+
+
+class WakeDebouncer:
+    """
+    Rate-limits wakeups caused by repeated fights with the user.
+
+    The first `burst` triggers within `window` seconds wake the scheduler
+    immediately. Further triggers are delayed with exponential backoff (up to
+    `max_delay`) and coalesced into a single pending timer.
+    """
+
+    def __init__(
+        self,
+        wake: Callable[[str], None],
+        burst: int = 3,
+        window: float = 10.0,
+        max_delay: float = 30.0,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        self.wake = wake
+        self.burst = burst
+        self.window = window
+        self.max_delay = max_delay
+        self.monotonic = monotonic
+        self.delayed = 0
+
+        self._times = collections.deque(maxlen=64)
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def _delay(self) -> float:
+        now = self.monotonic()
+        while self._times and now - self._times[0] > self.window:
+            self._times.popleft()
+        self._times.append(now)
+
+        excess = len(self._times) - self.burst
+        if excess <= 0:
+            return 0.0
+        return min(self.max_delay, 0.5 * 2 ** (excess - 1))
+
+    def trigger(self, reason: str = "endpoint"):
+        """Wake now, or schedule a single delayed wake if fighting."""
+        with self._lock:
+            delay = self._delay()
+            if delay == 0.0:
+                self.wake(reason)
+                return
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self.delayed += 1
+            metrics.increment("enforce_debounced")
+            self._timer = threading.Timer(delay, self.wake, args=(reason,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """Cancel a pending delayed wake."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,133 @@
+"""
+Auto Mute - Shared State
+
+The daemon's mutable state (paused or not, the mute state it last enforced,
+the state the schedule currently wants) is touched from the keyboard hook
+thread, the tray menu thread, the endpoint notification thread and the
+scheduler thread. MuteState keeps it behind one lock:
+
+- snapshot() returns all fields at once, consistent with each other
+- toggle() is an atomic read-modify-write, so concurrent toggles are never
+  lost or applied twice
+- every change bumps `version` and is announced to listeners and to
+  wait_for_change() callers; the core uses this to wake the scheduler, so a
+  toggle applies within milliseconds instead of at the next boundary
+
+Listeners run outside the lock, one event at a time and in version order:
+the changing thread delivers the queued events, and a thread that changes
+the state while another is delivering leaves its event to that thread. A
+listener may therefore change the state itself without deadlocking.
+
+Usage:
+    state = MuteState()
+    state.add_listener(lambda old, new, source: scheduler.wake("toggle"))
+    state.toggle("hotkey")
+    if state.snapshot().enabled: ...
+"""
+
+import collections
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+
+class StateSnapshot(NamedTuple):
+    """
+    Consistent view of MuteState.
+
+    Attributes:
+        enabled: Auto-mute is active (not paused)
+        muted: Mute state at the last check, None if unknown or paused
+        desired: Mute state the schedule wants, None if paused or unknown
+        version: Incremented on every change
+    """
+    enabled: bool
+    muted: Optional[bool]
+    desired: Optional[bool]
+    version: int
+
+
+class MuteState:
+    """Lock-protected daemon state with change notifications."""
+
+    def __init__(self, enabled: bool = True):
+        self._condition = threading.Condition(threading.Lock())
+        self._snapshot = StateSnapshot(enabled, None, None, 0)
+        self._listeners: List[Callable[[StateSnapshot, StateSnapshot, str], None]] = []
+        self._pending = collections.deque()
+        self._delivering = False
+
+    def snapshot(self) -> StateSnapshot:
+        """Return the current state (an immutable tuple, safe to keep)."""
+        return self._snapshot
+
+    @property
+    def enabled(self) -> bool:
+        return self._snapshot.enabled
+
+    @property
+    def muted(self) -> Optional[bool]:
+        return self._snapshot.muted
+
+    @property
+    def desired(self) -> Optional[bool]:
+        return self._snapshot.desired
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def add_listener(self, callback: Callable[[StateSnapshot, StateSnapshot, str], None]):
+        """Call callback(old, new, source) after every change."""
+        with self._condition:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback):
+        with self._condition:
+            self._listeners = [listener for listener in self._listeners if listener is not callback]
+
+    def toggle(self, source: str = "toggle") -> StateSnapshot:
+        """Flip enabled atomically; returns the new state."""
+        return self._change(lambda current: {"enabled": not current.enabled}, source)
+
+    def set_enabled(self, enabled: bool, source: str = "set") -> StateSnapshot:
+        return self._change(lambda current: {"enabled": bool(enabled)}, source)
+
+    def update(self, source: str = "check", **fields) -> StateSnapshot:
+        """Set muted and/or desired; no event is sent if nothing changes."""
+        return self._change(lambda current: fields, source)
+
+    def wait_for_change(self, version: int, timeout: Optional[float] = None) -> StateSnapshot:
+        """Block until the version differs from `version` (or timeout); returns the state."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._snapshot.version != version, timeout)
+            return self._snapshot
+
+    def _change(self, compute, source: str) -> StateSnapshot:
+        with self._condition:
+            old = self._snapshot
+            new = old._replace(**compute(old))
+            if new == old:
+                return old
+            new = new._replace(version=old.version + 1)
+            self._snapshot = new
+            self._condition.notify_all()
+            self._pending.append((old, new, source))
+            if self._delivering:
+                return new
+            self._delivering = True
+        self._deliver()
+        return new
+
+    def _deliver(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._delivering = False
+                    return
+                old, new, source = self._pending.popleft()
+                listeners = self._listeners
+            for listener in listeners:
+                try:
+                    listener(old, new, source)
+                except Exception as e:
+                    print(f"[WARNING] State listener failed: {e}")
@@ -0,0 +1,233 @@
+"""
+Auto Mute - Notification Dispatcher
+
+Desktop notifications are handed to a single background worker so a slow or
+hung toast never stalls the scheduler or the keyboard hook thread.
+
+The dispatcher:
+- never blocks the caller (post() only updates an in-memory queue)
+- coalesces bursts: messages with the same key replace each other while
+  waiting, so five quick toggles become one toast
+- rate-limits deliveries to one every `min_interval` seconds
+- drops messages older than `max_age` seconds instead of showing stale news
+- skips repeats of the text last shown for a key within `repeat_interval`
+
+Usage:
+    from notifications import NotificationDispatcher, PlyerNotifier
+
+    dispatcher = NotificationDispatcher(PlyerNotifier())
+    dispatcher.post("Auto-Mute Toggle", "Auto-mute is now PAUSED", key="toggle")
+"""
+
+import collections
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+
+class PlyerNotifier:
+    """Shows notifications with plyer (imported on first use)."""
+
+    def __init__(self, timeout: int = 5):
+        self.timeout = timeout
+        self._notify = None
+
+    def __call__(self, title: str, message: str):
+        if self._notify is None:
+            from plyer import notification
+            self._notify = notification.notify
+        self._notify(title=title, message=message, timeout=self.timeout)
+
+
+class FakeNotifier:
+    """
+    Records notifications instead of showing them.
+
+    Attributes:
+        delivered: (title, message) pairs in delivery order
+        delay: Seconds each delivery blocks, to mimic a hung toast
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.delivered: List[Tuple[str, str]] = []
+
+    def __call__(self, title: str, message: str):
+        if self.delay:
+            time.sleep(self.delay)
+        self.delivered.append((title, message))
+
+
+class NotificationDispatcher:
+    """Single-worker, coalescing, rate-limited notification queue."""
+
+    def __init__(
+        self,
+        notifier: Callable[[str, str], None],
+        min_interval: float = 2.0,
+        max_age: float = 30.0,
+        repeat_interval: float = 30.0,
+        coalesce_window: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+        background: bool = True,
+    ):
+        """
+        Initialize the dispatcher (the worker starts on the first post).
+
+        Args:
+            notifier: Callable(title, message) that shows a notification
+            min_interval: Minimum seconds between two deliveries
+            max_age: Messages waiting longer than this are dropped
+            repeat_interval: Identical text for the same key is not repeated
+                within this many seconds
+            coalesce_window: Seconds to wait for a burst to settle
+            clock: Monotonic time source (seconds)
+            background: Deliver from a worker thread; otherwise only when
+                deliver_due() is called
+        """
+        self.notifier = notifier
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.repeat_interval = repeat_interval
+        self.coalesce_window = coalesce_window
+        self.clock = clock
+        self.background = background
+
+        self.posted = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+        self._pending: "collections.OrderedDict[object, tuple]" = collections.OrderedDict()
+        self._last_shown: Dict[object, tuple] = {}
+        self._last_delivery = float("-inf")
+        self._anonymous = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._busy = False
+
+    def post(self, title: str, message: str, key=None):
+        """
+        Queue a notification without blocking.
+
+        Args:
+            title: Notification title
+            message: Notification body
+            key: Messages sharing a key coalesce; None never coalesces
+        """
+        if key is None:
+            key = ("anonymous", next(self._anonymous))
+        with self._condition:
+            if key in self._pending:
+                self.coalesced += 1
+                metrics.increment("notifications_coalesced")
+            self._pending[key] = (title, message, self.clock())
+            self.posted += 1
+            if self.background and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def deliver_due(self) -> int:
+        """
+        Deliver the messages that are due by the clock, without waiting.
+
+        This is how a dispatcher created with background=False makes progress.
+
+        Returns:
+            Number of notifications shown
+        """
+        delivered = self.delivered
+        while True:
+            with self._condition:
+                if not self._pending or self.clock() < self._ready_at():
+                    break
+                key, (title, message, posted_at) = self._pending.popitem(last=False)
+            self._deliver(*self._screen(key, title, message, posted_at))
+        return self.delivered - delivered
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until the queue is empty (e.g. before exiting). Returns True if it drained."""
+        if not self.background:
+            self.deliver_due()
+            return not self._pending
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self):
+        """Stop the worker; undelivered messages are discarded."""
+        with self._condition:
+            self._stopping = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def _ready_at(self) -> float:
+        # Let bursts settle and respect the rate limit; posts meanwhile coalesce
+        first_posted = next(iter(self._pending.values()))[2]
+        return max(first_posted + self.coalesce_window, self._last_delivery + self.min_interval)
+
+    def _next(self):
+        """Block until a message may be delivered; return (key, title, message) or None."""
+        with self._condition:
+            while not self._pending and not self._stopping:
+                self._condition.wait()
+            if self._stopping:
+                return None
+
+            ready_at = self._ready_at()
+            while not self._stopping and self.clock() < ready_at:
+                self._condition.wait(ready_at - self.clock())
+            if self._stopping or not self._pending:
+                return None
+
+            key, (title, message, posted_at) = self._pending.popitem(last=False)
+            self._busy = True
+        return self._screen(key, title, message, posted_at)
+
+    def _screen(self, key, title: str, message: str, posted_at: float):
+        """Drop stale messages and recent repeats; returns (key, title, message), title None if dropped."""
+        if self.clock() - posted_at > self.max_age:
+            self.dropped += 1
+            metrics.increment("notifications_dropped_stale")
+            return key, None, None
+
+        shown = self._last_shown.get(key)
+        if shown and shown[0] == (title, message) and self.clock() - shown[1] < self.repeat_interval:
+            self.dropped += 1
+            metrics.increment("notifications_dropped_repeat")
+            return key, None, None
+        return key, title, message
+
+    def _deliver(self, key, title: Optional[str], message: Optional[str]):
+        try:
+            if title is not None:
+                with metrics.timer("notification"):
+                    self.notifier(title, message)
+                self.delivered += 1
+                self._last_shown[key] = ((title, message), self.clock())
+                self._last_delivery = self.clock()
+        except Exception as e:
+            print(f"[WARNING] Failed to send notification: {e}")
+        finally:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                if self._stopping:
+                    return
+                continue
+            self._deliver(*item)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Fleet Schedule Fetch
+
+Lets many machines share one schedule published over HTTP(S) instead of a
+hand-copied config.json on each. Set "remote_config_url" in the local
+config's "settings"; the daemon then polls that URL and uses the schedule it
+serves, while the local file keeps the per-machine settings.
+
+- Requests are conditional (If-None-Match / If-Modified-Since), so an
+  unchanged schedule costs a 304 with no body, and nothing is re-parsed:
+  the cached copy on disk is left untouched, so ConfigCache's stat signature
+  does not change either.
+- Polls are spread out: each interval is randomized by +/- jitter, a machine
+  that already has a cached copy waits a random part of an interval before
+  its first poll, and failures back off exponentially (honouring
+  Retry-After), so a fleet rebooting together does not hit the server at
+  once.
+- The last good copy is kept in config.remote.json (validated before it is
+  written, written atomically), so machines keep enforcing their schedule
+  when the server is down or the laptop is offline.
+
+The effective config is the fetched document with the local "settings"
+layered on top (local values win, and the URL itself always comes from the
+local file).
+
+`serve` runs a small stand-in server with ETag / Last-Modified support for
+trying this out or testing against.
+
+Usage:
+    # config.json
+    {"settings": {"remote_config_url": "https://intranet/auto-mute/lab.json"}}
+
+    python remote_config.py serve fleet.json --port 8765
+    python remote_config.py fetch http://localhost:8765/ --cache config.remote.json
+"""
+
+import argparse
+import email.utils
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+
+from schedule_index import CompiledSchedule
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_FILE = os.path.join(SCRIPT_DIR, "config.remote.json")
+
+DEFAULT_INTERVAL = 300.0
+DEFAULT_JITTER = 0.2
+DEFAULT_TIMEOUT = 10.0
+MAX_BACKOFF = 3600.0
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# Fetch results
+UPDATED = "updated"              # new schedule written to the cache
+NOT_MODIFIED = "not_modified"    # 304
+UNCHANGED = "unchanged"          # 200 with the same bytes we already have
+ERROR = "error"
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write to a temp file in the same directory, then rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".remote-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def effective_config(local: dict, cache_path: str = DEFAULT_CACHE_FILE) -> dict:
+    """
+    Merge the cached fleet schedule with the local config.
+
+    Args:
+        local: Parsed local config.json
+        cache_path: Last good fetched document
+
+    Returns:
+        The fetched document with the local settings layered on top, or the
+        local config itself if nothing has been fetched yet
+    """
+    remote = _read_json(cache_path)
+    if remote is None:
+        return local
+    merged = dict(remote)
+    settings = dict(remote.get("settings") or {})
+    settings.update(local.get("settings") or {})
+    merged["settings"] = settings
+    return merged
+
+
+class RemoteConfigFetcher:
+    """
+    Polls a schedule URL with conditional requests and caches it on disk.
+
+    Attributes:
+        stats: Counts of requests, results and bytes downloaded
+        failures: Consecutive failed fetches (drives the backoff)
+    """
+
+    def __init__(self, url: str, cache_path: str = DEFAULT_CACHE_FILE, interval: float = DEFAULT_INTERVAL,
+                 jitter: float = DEFAULT_JITTER, timeout: float = DEFAULT_TIMEOUT,
+                 on_update: Optional[Callable[[], None]] = None,
+                 urlopen: Callable = urllib.request.urlopen, rng: Optional[random.Random] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            url: Schedule URL (http or https)
+            cache_path: Where the last good copy is kept; its ETag and
+                Last-Modified go to cache_path + ".meta"
+            interval: Mean seconds between polls
+            jitter: Fraction by which each interval is randomized
+            timeout: Socket timeout per request
+            on_update: Called after a new schedule was written to the cache
+            urlopen: urllib.request.urlopen or a stand-in
+            rng: Random source for the jitter (seed it for reproducible runs)
+        """
+        self.url = url
+        self.cache_path = cache_path
+        self.meta_path = cache_path + ".meta"
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.on_update = on_update
+        self.urlopen = urlopen
+        self.rng = rng or random.Random()
+        self.failures = 0
+        self.stats = {"requests": 0, UPDATED: 0, NOT_MODIFIED: 0, UNCHANGED: 0, ERROR: 0, "bytes": 0}
+
+        self._retry_after: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_meta(self) -> dict:
+        meta = _read_json(self.meta_path) or {}
+        # Validators for another URL, or without the file they describe, are useless
+        if meta.get("url") != self.url or not os.path.exists(self.cache_path):
+            return {}
+        return meta
+
+    def _request(self, meta: dict) -> urllib.request.Request:
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip",
+                   "User-Agent": "auto-mute-fleet/1"}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return urllib.request.Request(self.url, headers=headers)
+
+    def fetch(self) -> str:
+        """
+        Poll the URL once.
+
+        Returns:
+            UPDATED, NOT_MODIFIED, UNCHANGED or ERROR
+        """
+        meta = self._load_meta()
+        self.stats["requests"] += 1
+        self._retry_after = None
+        try:
+            with self.urlopen(self._request(meta), timeout=self.timeout) as response:
+                body = response.read(MAX_BODY_BYTES + 1)
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self.failures = 0
+                self.stats[NOT_MODIFIED] += 1
+                return NOT_MODIFIED
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+            if retry_after and retry_after.isdigit():
+                self._retry_after = float(retry_after)
+            return self._fail(f"HTTP {e.code}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return self._fail(getattr(e, "reason", e))
+
+        self.stats["bytes"] += len(body)
+        if len(body) > MAX_BODY_BYTES:
+            return self._fail("response too large")
+        if headers.get("Content-Encoding") == "gzip":
+            try:
+                body = gzip.decompress(body)
+            except (OSError, EOFError) as e:
+                return self._fail(f"invalid response: {e}")
+        return self.store(body, headers, meta)
+
+    def store(self, body: bytes, headers, meta: Optional[dict] = None) -> str:
+        """
+        Validate a schedule document and make it the cached copy.
+
+        Used for fetched responses and for schedules pushed by the fleet
+        controller (see fleet_controller.py).
+
+        Args:
+            body: JSON document
+            headers: Mapping with the "ETag" / "Last-Modified" to remember
+            meta: Current validators (default: read from disk)
+
+        Returns:
+            UPDATED, UNCHANGED or ERROR
+        """
+        if meta is None:
+            meta = self._load_meta()
+        digest = hashlib.sha256(body).hexdigest()
+        if digest == meta.get("sha256"):
+            # Same bytes as the cached copy: skip the write and the reparse
+            self.failures = 0
+            self.stats[UNCHANGED] += 1
+            if headers.get("ETag") != meta.get("etag"):
+                self._save_meta(headers, digest)
+            return UNCHANGED
+        try:
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("not a JSON object")
+            CompiledSchedule(data)
+        except ValueError as e:
+            # Keep serving the last good copy
+            return self._fail(f"invalid schedule: {e}")
+
+        try:
+            _atomic_write(self.cache_path, body)
+            self._save_meta(headers, digest)
+        except OSError as e:
+            return self._fail(f"cannot write {self.cache_path}: {e}")
+        self.failures = 0
+        self.stats[UPDATED] += 1
+        if self.on_update:
+            try:
+                self.on_update()
+            except Exception as e:
+                print(f"[WARNING] Fleet schedule listener failed: {e}")
+        return UPDATED
+
+    @property
+    def etag(self) -> Optional[str]:
+        """ETag of the cached copy, if it came from this URL."""
+        return self._load_meta().get("etag")
+
+    def _save_meta(self, headers, digest: str):
+        meta = {
+            "url": self.url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "sha256": digest,
+            "fetched_at": time.time(),
+        }
+        _atomic_write(self.meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+
+    def _fail(self, reason) -> str:
+        self.failures += 1
+        self.stats[ERROR] += 1
+        cached = "using the cached copy" if os.path.exists(self.cache_path) else "no cached copy yet"
+        print(f"[WARNING] Fleet schedule fetch failed ({reason}); {cached}")
+        return ERROR
+
+    def next_delay(self) -> float:
+        """Seconds until the next poll: jittered interval, or jittered backoff after failures."""
+        if self.failures:
+            base = min(MAX_BACKOFF, self.interval * 2 ** (self.failures - 1))
+            delay = self.rng.uniform(base / 2, base)
+            if self._retry_after is not None:
+                delay = max(delay, self._retry_after)
+            return delay
+        return self.interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def first_delay(self) -> float:
+        """Fetch at once without a cached copy; otherwise spread restarts over an interval."""
+        if not os.path.exists(self.cache_path):
+            return 0.0
+        return self.rng.uniform(0, self.interval)
+
+    def start(self):
+        """Poll in a daemon thread until stop()."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _run(self):
+        delay = self.first_delay()
+        while not self._stop_event.wait(delay):
+            try:
+                self.fetch()
+            except Exception as e:
+                # One bad poll must not end polling
+                self._fail(f"unexpected error: {e!r}")
+            delay = self.next_delay()
+
+
+class ScheduleServer:
+    """
+    Stand-in HTTP server for one schedule file, with ETag / Last-Modified.
+
+    The file is re-read on each request, so editing it publishes a new
+    schedule. Attributes count full responses and 304s.
+    """
+
+    def __init__(self, path: str, host: str = "127.0.0.1", port: int = 0):
+        self.path = path
+        self.full_responses = 0
+        self.not_modified = 0
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _respond(self, handler):
+        try:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            mtime = int(os.path.getmtime(self.path))
+        except OSError:
+            handler.send_error(404)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        last_modified = email.utils.formatdate(mtime, usegmt=True)
+
+        if_none_match = handler.headers.get("If-None-Match")
+        if_modified_since = handler.headers.get("If-Modified-Since")
+        fresh = False
+        if if_none_match is not None:
+            fresh = etag in [tag.strip() for tag in if_none_match.split(",")]
+        elif if_modified_since:
+            try:
+                fresh = email.utils.parsedate_to_datetime(if_modified_since).timestamp() >= mtime
+            except (TypeError, ValueError):
+                fresh = False
+        if fresh:
+            self.not_modified += 1
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+
+        if "gzip" in handler.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.full_responses += 1
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.send_header("ETag", etag)
+        handler.send_header("Last-Modified", last_modified)
+        if encoding:
+            handler.send_header("Content-Encoding", encoding)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet schedule fetch and stand-in server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="serve a schedule file with ETag support")
+    serve_parser.add_argument("path", help="schedule JSON to publish")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+
+    fetch_parser = commands.add_parser("fetch", help="poll a URL once and update the cache")
+    fetch_parser.add_argument("url")
+    fetch_parser.add_argument("--cache", default=DEFAULT_CACHE_FILE, help="cache file (default: config.remote.json)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = ScheduleServer(args.path, args.host, args.port)
+        print(f"Serving {args.path} at {server.url} (Ctrl+C to stop)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+        return 0
+
+    fetcher = RemoteConfigFetcher(args.url, args.cache)
+    result = fetcher.fetch()
+    print(f"{result}: {fetcher.stats['bytes']} bytes")
+    return 0 if result != ERROR else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,472 @@
+"""
+Auto Mute - Schedule Index
+
+Compiles the schedule from config.json into lookup tables. Once compiled,
+"should the system be muted at T?" is a table lookup (plus a hash lookup for
+dated overrides) and "when is the next mute/unmute transition after T?" is a
+binary search. iter_transitions() turns that into a lazy, DST-aware timeline
+of upcoming changes.
+
+Schedule format (the original one-window-per-day form still works):
+
+    "Monday": {"start": "22:00", "end": "07:00"},
+    "Tuesday": [{"start": "12:00", "end": "13:00"}, {"start": "22:00", "end": "07:00"}],
+    "exceptions": [
+        {"date": "2026-12-24", "windows": [{"start": "18:00", "end": "07:00"}]},
+        {"date": "2026-08-03", "until": "2026-08-14", "muted": false}
+    ],
+    "holidays": [
+        {"date": "12-25", "muted": true}
+    ]
+
+A dated exception (optionally spanning to "until") or a recurring holiday
+("MM-DD") replaces that date's weekday windows with its own "windows", or
+with a whole day muted/unmuted ("muted"). Exceptions win over holidays.
+
+Every window applies to its own date's 24 hours, like the original overnight
+handling: 22:00-07:00 mutes 00:00-07:00 and 22:00-24:00 of the same day, and
+start == end mutes the whole day. Overlapping windows are merged.
+
+Usage:
+    from schedule_index import CompiledSchedule
+
+    compiled = CompiledSchedule(load_schedule())
+    compiled.is_muted_at(datetime.datetime.now())
+    for at, muted in itertools.islice(iter_transitions(compiled), 5):
+        print(at.isoformat(), "mute" if muted else "unmute")
+"""
+
+import bisect
+import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# How far next_transition() looks ahead before giving up (covers yearly holidays)
+SEARCH_HORIZON_DAYS = 400
+
+# iter_transitions() samples the UTC offset this often to find DST changes
+OFFSET_PROBE_STEP = datetime.timedelta(hours=6)
+
+
+def parse_time(timestr):
+    """
+    Parse HH:MM time string to minutes since midnight.
+
+    Raises:
+        ValueError: If it is not an HH:MM string between 00:00 and 24:00
+    """
+    try:
+        hour, minute = map(int, timestr.split(":"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time (expected HH:MM): {timestr!r}")
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time (expected HH:MM): {timestr!r}")
+    return hour * 60 + minute
+
+
+def minute_of_week(moment: datetime.datetime) -> int:
+    """Return the slot index (0 = Monday 00:00) for a datetime."""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def day_intervals(windows) -> List[Tuple[int, int]]:
+    """
+    Normalize a day's windows into merged, sorted [start, end) minute ranges.
+
+    Args:
+        windows: One {"start", "end"} dict or a list of them
+
+    Raises:
+        ValueError: If a window or its start/end time cannot be parsed
+    """
+    if isinstance(windows, dict):
+        windows = [windows]
+    if not isinstance(windows, list):
+        raise ValueError(f"Invalid window (expected {{\"start\", \"end\"}} or a list of them): {windows!r}")
+    intervals = []
+    for window in windows:
+        if not isinstance(window, dict) or "start" not in window or "end" not in window:
+            raise ValueError(f"Invalid window (expected {{\"start\", \"end\"}}): {window!r}")
+        start_minutes = parse_time(window["start"])
+        end_minutes = parse_time(window["end"])
+        # Handle overnight ranges
+        if start_minutes < end_minutes:
+            intervals.append((start_minutes, end_minutes))
+        else:
+            intervals.append((start_minutes, MINUTES_PER_DAY))
+            if end_minutes > 0:
+                intervals.append((0, end_minutes))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DayProfile:
+    """
+    One day's mute state: the state at midnight and the minutes it toggles.
+
+    Attributes:
+        muted_at_midnight: State at 00:00
+        toggles: Sorted minutes (1..1439) where the state flips
+    """
+
+    __slots__ = ("muted_at_midnight", "toggles")
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        self.muted_at_midnight = bool(intervals) and intervals[0][0] == 0
+        self.toggles = [
+            boundary for interval in intervals for boundary in interval
+            if 0 < boundary < MINUTES_PER_DAY
+        ]
+
+    def is_muted_at(self, minute: int) -> bool:
+        return self.muted_at_midnight ^ (bisect.bisect_right(self.toggles, minute) & 1 == 1)
+
+    @property
+    def muted_at_end(self) -> bool:
+        return self.muted_at_midnight ^ (len(self.toggles) & 1 == 1)
+
+    def minutes(self) -> bytes:
+        """The day as 1,440 bytes, one per minute (1 = muted)."""
+        row = bytearray()
+        state = self.muted_at_midnight
+        previous = 0
+        for toggle in self.toggles + [MINUTES_PER_DAY]:
+            row += (b"\x01" if state else b"\x00") * (toggle - previous)
+            state, previous = not state, toggle
+        return bytes(row)
+
+
+def _override_profile(entry: dict) -> DayProfile:
+    if not isinstance(entry, dict):
+        raise ValueError(f"Schedule override must be an object: {entry!r}")
+    if "windows" in entry:
+        return DayProfile(day_intervals(entry["windows"]))
+    if "muted" in entry:
+        return DayProfile([(0, MINUTES_PER_DAY)] if entry["muted"] else [])
+    raise ValueError(f"Schedule override needs \"windows\" or \"muted\": {entry}")
+
+
+def _parse_date(text: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(text)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {text!r}")
+
+
+def _parse_month_day(text: str) -> Tuple[int, int]:
+    try:
+        month, day = map(int, text.split("-"))
+        datetime.date(2000, month, day)  # leap year, so 02-29 is accepted
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid holiday (expected MM-DD): {text!r}")
+    return month, day
+
+
+class CompiledSchedule:
+    """
+    Week bitmap plus dated overrides built from a schedule dictionary.
+
+    The weekly windows are folded into a minute-of-week bitmap; exceptions
+    and holidays are stored per date as DayProfiles with sorted date keys, so
+    point queries stay O(1)/O(log n) and next-transition queries only visit a
+    handful of days even with thousands of exceptions.
+
+    Attributes:
+        bitmap: 10,080 bytes, one per minute of the week (1 = muted)
+        transitions: Sorted slot indices where the weekly state changes
+        scheduled_days: Weekday indices that have an entry in the config
+        exceptions: DayProfile per dated exception
+        holidays: DayProfile per recurring (month, day)
+        dependencies: Extra files the schedule was built from (see ics_import.py)
+        expires: Epoch time after which it should be rebuilt, or None
+        source: The config it was compiled from, after merging in a fleet
+            schedule (see remote_config.py), or None
+    """
+
+    def __init__(self, schedule_data: dict):
+        """
+        Compile a schedule dictionary.
+
+        Args:
+            schedule_data: Parsed config.json contents
+
+        Raises:
+            ValueError: If a time, date, window or override cannot be parsed
+        """
+        try:
+            self._compile(schedule_data)
+        except (KeyError, TypeError, AttributeError) as e:
+            # Entries of the wrong shape (a string where a list belongs, ...)
+            raise ValueError(f"Malformed schedule: {e!r}") from e
+
+    def _compile(self, schedule_data: dict):
+        self.dependencies: List[str] = []
+        self.expires: Optional[float] = None
+        self.source: Optional[dict] = None
+        self.bitmap = bytearray(MINUTES_PER_WEEK)
+        scheduled_days = set()
+        self._weekday_profiles = []
+
+        for day_index, day in enumerate(DAYS):
+            intervals = []
+            if day in schedule_data:
+                scheduled_days.add(day_index)
+                intervals = day_intervals(schedule_data[day])
+            base = day_index * MINUTES_PER_DAY
+            for start, end in intervals:
+                self._fill(base + start, base + end)
+            self._weekday_profiles.append(DayProfile(intervals))
+
+        self.scheduled_days = frozenset(scheduled_days)
+        self.transitions = [
+            slot for slot in range(MINUTES_PER_WEEK)
+            if self.bitmap[slot] != self.bitmap[slot - 1]
+        ]
+
+        self.exceptions: Dict[datetime.date, DayProfile] = {}
+        for entry in schedule_data.get("exceptions", []):
+            profile = _override_profile(entry)
+            first = _parse_date(entry.get("date"))
+            last = _parse_date(entry["until"]) if "until" in entry else first
+            for offset in range((last - first).days + 1):
+                self.exceptions[first + datetime.timedelta(days=offset)] = profile
+        self._exception_ordinals = sorted(date.toordinal() for date in self.exceptions)
+
+        self.holidays: Dict[Tuple[int, int], DayProfile] = {}
+        for entry in schedule_data.get("holidays", []):
+            self.holidays[_parse_month_day(entry.get("date"))] = _override_profile(entry)
+        self._holiday_keys = sorted(self.holidays)
+
+    def _fill(self, start_slot: int, end_slot: int):
+        """Mark slots [start_slot, end_slot) as muted."""
+        if end_slot > start_slot:
+            self.bitmap[start_slot:end_slot] = b"\x01" * (end_slot - start_slot)
+
+    def _override(self, date: datetime.date) -> Optional[DayProfile]:
+        """Return the exception or holiday profile for a date, if any."""
+        if self.exceptions:
+            profile = self.exceptions.get(date)
+            if profile is not None:
+                return profile
+        if self.holidays:
+            return self.holidays.get((date.month, date.day))
+        return None
+
+    def _profile(self, date: datetime.date) -> DayProfile:
+        return self._override(date) or self._weekday_profiles[date.weekday()]
+
+    def _next_override(self, date: datetime.date) -> Optional[datetime.date]:
+        """Return the first date on or after `date` with an exception or holiday."""
+        candidates = []
+        index = bisect.bisect_left(self._exception_ordinals, date.toordinal())
+        if index < len(self._exception_ordinals):
+            candidates.append(datetime.date.fromordinal(self._exception_ordinals[index]))
+        if self._holiday_keys:
+            start = bisect.bisect_left(self._holiday_keys, (date.month, date.day))
+            # Walk forward (wrapping into later years) past Feb 29 in non-leap years
+            for step in range(len(self._holiday_keys) * 5):
+                position = start + step
+                year = date.year + position // len(self._holiday_keys)
+                month, day = self._holiday_keys[position % len(self._holiday_keys)]
+                try:
+                    candidates.append(datetime.date(year, month, day))
+                    break
+                except ValueError:
+                    continue
+        return min(candidates) if candidates else None
+
+    def override_dates(self, first: datetime.date, last: datetime.date) -> Iterator[datetime.date]:
+        """Yield the dates in [first, last] that have an exception or holiday."""
+        if not (self.exceptions or self.holidays):
+            return
+        day = self._next_override(first)
+        while day is not None and day <= last:
+            yield day
+            day = self._next_override(day + datetime.timedelta(days=1))
+
+    def day_minutes(self, date: datetime.date) -> bytes:
+        """
+        The mute state of every minute of a date, as is_muted_at() sees it.
+
+        Returns:
+            1,440 bytes, 1 = muted (a slice of the bitmap unless overridden)
+        """
+        profile = self._override(date) if self.exceptions or self.holidays else None
+        if profile is not None:
+            return profile.minutes()
+        base = date.weekday() * MINUTES_PER_DAY
+        return bytes(self.bitmap[base:base + MINUTES_PER_DAY])
+
+    def has_day(self, moment: datetime.datetime) -> bool:
+        """Return True if the config has an entry for the moment's weekday or date."""
+        if moment.weekday() in self.scheduled_days:
+            return True
+        return (bool(self.exceptions) or bool(self.holidays)) and self._override(moment.date()) is not None
+
+    def is_muted_at(self, moment: datetime.datetime) -> bool:
+        """Return True if the schedule says the system should be muted."""
+        if self.exceptions or self.holidays:
+            profile = self._override(moment.date())
+            if profile is not None:
+                return profile.is_muted_at(moment.hour * 60 + moment.minute)
+        return self.bitmap[minute_of_week(moment)] == 1
+
+    def next_transition(self, moment: datetime.datetime) -> Optional[Tuple[datetime.datetime, bool]]:
+        """
+        Find the next mute state change strictly after a moment.
+
+        Args:
+            moment: Naive local datetime to search from
+
+        Returns:
+            Tuple of (datetime of the change, muted state after it), or None
+            if the schedule does not change state within SEARCH_HORIZON_DAYS
+        """
+        if not (self.exceptions or self.holidays):
+            return self._next_weekly_transition(moment)
+
+        date = moment.date()
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        profile = self._profile(date)
+        index = bisect.bisect_right(profile.toggles, moment.hour * 60 + moment.minute)
+        if index < len(profile.toggles):
+            muted = profile.muted_at_midnight ^ ((index + 1) & 1 == 1)
+            return midnight + datetime.timedelta(minutes=profile.toggles[index]), muted
+
+        state = profile.muted_at_end
+        quiet_weekdays = set()
+        day = date
+        last_day = date + datetime.timedelta(days=SEARCH_HORIZON_DAYS)
+        while day < last_day:
+            day += datetime.timedelta(days=1)
+            override = self._override(day)
+            if override is None and len(quiet_weekdays) == 7:
+                # Every weekday stays in this state all day: skip to the next override
+                day = self._next_override(day)
+                if day is None or day > last_day:
+                    return None
+                override = self._override(day)
+
+            profile = override or self._weekday_profiles[day.weekday()]
+            at = midnight + datetime.timedelta(days=(day - date).days)
+            if profile.muted_at_midnight != state:
+                return at, profile.muted_at_midnight
+            if profile.toggles:
+                return at + datetime.timedelta(minutes=profile.toggles[0]), not state
+            if override is None:
+                quiet_weekdays.add(day.weekday())
+        return None
+
+    def _next_weekly_transition(self, moment: datetime.datetime) -> Optional[Tuple[datetime.datetime, bool]]:
+        if not self.transitions:
+            return None
+
+        slot = minute_of_week(moment)
+        index = bisect.bisect_right(self.transitions, slot)
+        if index < len(self.transitions):
+            target = self.transitions[index]
+        else:
+            target = self.transitions[0] + MINUTES_PER_WEEK
+
+        at = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=target - slot)
+        return at, self.bitmap[target % MINUTES_PER_WEEK] == 1
+
+
+class Transition(NamedTuple):
+    """A mute state change at an absolute moment."""
+    at: datetime.datetime
+    muted: bool
+
+
+def _in_zone(instant: datetime.datetime, tz) -> datetime.datetime:
+    # Without a tz, astimezone() applies the system's local rules for that instant
+    return instant.astimezone(tz) if tz is not None else instant.astimezone()
+
+
+def _next_offset_change(instant: datetime.datetime, tz, limit: datetime.datetime) -> Optional[datetime.datetime]:
+    """First whole second in (instant, limit] at which the zone's UTC offset changes, or None."""
+    offset = _in_zone(instant, tz).utcoffset()
+    low = instant
+    while low < limit:
+        high = min(low + OFFSET_PROBE_STEP, limit)
+        if _in_zone(high, tz).utcoffset() == offset:
+            low = high
+            continue
+        # Bisect on whole seconds between the last probe with the old offset and this one
+        low_second, high_second = int(low.timestamp()), int(high.timestamp()) + 1
+        while high_second - low_second > 1:
+            middle = (low_second + high_second) // 2
+            moment = datetime.datetime.fromtimestamp(middle, datetime.timezone.utc)
+            if _in_zone(moment, tz).utcoffset() == offset:
+                low_second = middle
+            else:
+                high_second = middle
+        return datetime.datetime.fromtimestamp(high_second, datetime.timezone.utc)
+    return None
+
+
+def iter_transitions(schedule: CompiledSchedule, start: Optional[datetime.datetime] = None,
+                     tz=None) -> Iterator[Transition]:
+    """
+    Lazily yield upcoming mute state changes as time-zone-aware datetimes.
+
+    The schedule is written in wall-clock time, so each stretch of constant
+    UTC offset is searched with next_transition() and mapped to absolute
+    time. Across a DST change the state just before and after it is
+    compared: a window starting inside a spring-forward gap takes effect
+    when the gap ends, and windows inside a fall-back fold happen twice,
+    exactly as a wall-clock check would see them. Nothing is precomputed;
+    each step costs one next_transition() plus a few offset probes.
+
+    Args:
+        schedule: CompiledSchedule to walk
+        start: Moment to search from (naive = local time; default now)
+        tz: tzinfo the schedule is written in (default: system local time)
+
+    Yields:
+        Transition(at, muted) strictly after start, in order. Stops once
+        nothing changes for SEARCH_HORIZON_DAYS.
+    """
+    if start is None:
+        start = datetime.datetime.now(datetime.timezone.utc)
+    elif start.tzinfo is None:
+        start = start.astimezone(tz) if tz is None else start.replace(tzinfo=tz)
+    cursor = start.astimezone(datetime.timezone.utc)
+    horizon = datetime.timedelta(days=SEARCH_HORIZON_DAYS)
+    give_up = cursor + horizon
+
+    while cursor < give_up:
+        local = _in_zone(cursor, tz)
+        found = schedule.next_transition(local.replace(tzinfo=None))
+        limit = give_up
+        at = None
+        if found:
+            # Where the wall-clock transition lands if the offset stays the same
+            at = (found[0] - local.utcoffset()).replace(tzinfo=datetime.timezone.utc)
+            limit = min(limit, at)
+
+        change = _next_offset_change(cursor, tz, limit)
+        if change is None:
+            if at is None:
+                return
+            yield Transition(_in_zone(at, tz), found[1])
+            cursor, give_up = at, at + horizon
+            continue
+
+        before = _in_zone(change - datetime.timedelta(seconds=1), tz).replace(tzinfo=None)
+        after = _in_zone(change, tz)
+        muted = schedule.is_muted_at(after.replace(tzinfo=None))
+        if muted != schedule.is_muted_at(before):
+            yield Transition(after, muted)
+            give_up = change + horizon
+        cursor = change
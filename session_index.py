@@ -0,0 +1,344 @@
+"""
+Auto Mute - Per-Application Session Index
+
+Lets quiet hours mute specific applications (browsers, media players) while
+leaving others (conferencing, alarms) audible.
+
+Audio sessions are kept in a SessionIndex keyed by process name. Providers
+feed it incrementally as sessions appear and disappear, so enforcement only
+looks at the process names that match the rules instead of enumerating every
+session on every check.
+
+config.json:
+    "app_rules": {
+        "mute": ["chrome.exe", "firefox.exe", "spotify.exe"],
+        "keep": ["Teams.exe"]
+    }
+
+Patterns are case-insensitive shell wildcards ("*player*.exe"); "keep" wins
+over "mute".
+"""
+
+import fnmatch
+import itertools
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class AppRules:
+    """Compiled mute/keep process-name patterns with memoized matching."""
+
+    def __init__(self, rules: dict):
+        """
+        Args:
+            rules: The "app_rules" section of config.json
+        """
+        self.mute_patterns = [pattern.lower() for pattern in rules.get("mute", [])]
+        self.keep_patterns = [pattern.lower() for pattern in rules.get("keep", [])]
+        self._cache: Dict[str, bool] = {}
+
+    def __bool__(self):
+        return bool(self.mute_patterns)
+
+    def matches(self, process_name: str) -> bool:
+        """Return True if sessions of this process should be muted."""
+        name = process_name.lower()
+        result = self._cache.get(name)
+        if result is None:
+            result = (
+                any(fnmatch.fnmatchcase(name, pattern) for pattern in self.mute_patterns)
+                and not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.keep_patterns)
+            )
+            self._cache[name] = result
+        return result
+
+
+class SessionIndex:
+    """
+    Audio sessions grouped by lower-cased process name.
+
+    Session handles only need get_mute() and set_mute(mute). The index is
+    updated from provider callbacks (any thread) and read by the scheduler.
+
+    Attributes:
+        on_added: Optional callback(session_id, process_name) run after a
+            session is added, e.g. to mute a player opened during quiet hours
+        on_removed: Optional callback(session_id) run after a known session
+            is removed
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_process: Dict[str, Dict[str, object]] = {}
+        self._process_of: Dict[str, str] = {}
+        self._match_cache = None  # (rules, [(session_id, handle), ...])
+        self.on_added = None
+        self.on_removed = None
+
+    def __len__(self):
+        return len(self._process_of)
+
+    def session_added(self, session_id: str, process_name: str, handle):
+        """Add (or replace) a session."""
+        name = process_name.lower()
+        with self._lock:
+            old_name = self._process_of.get(session_id)
+            if old_name is not None and old_name != name:
+                self._discard(session_id)
+            self._by_process.setdefault(name, {})[session_id] = handle
+            self._process_of[session_id] = name
+            self._match_cache = None
+        if self.on_added:
+            self.on_added(session_id, name)
+
+    def session_removed(self, session_id: str):
+        """Forget a session that has expired."""
+        with self._lock:
+            known = session_id in self._process_of
+            self._discard(session_id)
+        if known and self.on_removed:
+            self.on_removed(session_id)
+
+    def _discard(self, session_id: str):
+        name = self._process_of.pop(session_id, None)
+        if name is None:
+            return
+        sessions = self._by_process.get(name)
+        if sessions is not None:
+            sessions.pop(session_id, None)
+            if not sessions:
+                del self._by_process[name]
+        self._match_cache = None
+
+    def process_names(self) -> List[str]:
+        with self._lock:
+            return list(self._by_process)
+
+    def matching(self, rules: AppRules) -> List[tuple]:
+        """
+        Return (session_id, handle) pairs whose process matches the rules.
+
+        The result is cached until a session is added or removed or different
+        rules are passed in.
+        """
+        with self._lock:
+            cached = self._match_cache
+            if cached is not None and cached[0] is rules:
+                return cached[1]
+            result = [
+                (session_id, handle)
+                for name, sessions in self._by_process.items() if rules.matches(name)
+                for session_id, handle in sessions.items()
+            ]
+            self._match_cache = (rules, result)
+            return result
+
+
+class _PycawSession:
+    """Adapter exposing get_mute/set_mute on a pycaw AudioSession."""
+
+    def __init__(self, session):
+        self._volume = session.SimpleAudioVolume
+
+    def get_mute(self) -> bool:
+        return bool(self._volume.GetMute())
+
+    def set_mute(self, mute: bool):
+        self._volume.SetMute(mute, None)
+
+
+class PycawSessionProvider:
+    """
+    Feeds a SessionIndex from Windows audio sessions.
+
+    Registers an IAudioSessionNotification so new sessions are added as they
+    are created, and an IAudioSessionEvents sink on every session so it is
+    removed when it expires or is disconnected (device removed, format
+    change). A session whose call fails is also pruned.
+    """
+
+    # AudioSessionState values
+    STATE_EXPIRED = 2
+
+    def __init__(self):
+        self._manager = None
+        self._notification = None
+        self._events_class = None
+        self._lock = threading.Lock()
+        # session id -> (IAudioSessionControl2, events sink) of live sessions
+        self._watched: Dict[str, tuple] = {}
+        # Sinks of ended sessions, unregistered later: not allowed inside their own callback
+        self._ended: List[tuple] = []
+
+    @staticmethod
+    def _describe(session):
+        process = session.Process
+        name = process.name() if process is not None else "System Sounds"
+        session_id = getattr(session, "InstanceIdentifier", None) or f"pid-{session.ProcessId}"
+        return session_id, name
+
+    def start(self, index: SessionIndex):
+        """Register for new sessions, then load the current ones."""
+        try:
+            self._register(index)
+        except Exception as e:
+            print(f"[WARNING] Session notifications unavailable, using snapshots only: {e}")
+        self.sync(index)
+
+    def sync(self, index: SessionIndex):
+        """Full re-enumeration (only needed at startup or if notifications fail)."""
+        from pycaw.pycaw import AudioUtilities
+
+        for session in AudioUtilities.GetAllSessions():
+            self._add(index, session)
+
+    def _add(self, index: SessionIndex, session):
+        session_id, name = self._describe(session)
+        self._unregister_ended()
+        try:
+            self._watch(index, session, session_id)
+        except Exception as e:
+            print(f"[WARNING] Session expiry events unavailable for {name}: {e}")
+        index.session_added(session_id, name, _PycawSession(session))
+
+    def _watch(self, index: SessionIndex, session, session_id: str):
+        """Remove the session from the index when Windows ends it."""
+        with self._lock:
+            if session_id in self._watched:
+                return
+        if self._events_class is None:
+            self._events_class = self._make_events_class()
+        control = session._ctl
+        sink = self._events_class(self, index, session_id)
+        control.RegisterAudioSessionNotification(sink)
+        with self._lock:
+            self._watched[session_id] = (control, sink)
+
+    def _session_ended(self, index: SessionIndex, session_id: str):
+        with self._lock:
+            watched = self._watched.pop(session_id, None)
+            if watched is not None:
+                self._ended.append(watched)
+        index.session_removed(session_id)
+
+    def _unregister_ended(self):
+        with self._lock:
+            ended, self._ended = self._ended, []
+        for control, sink in ended:
+            try:
+                control.UnregisterAudioSessionNotification(sink)
+            except Exception:
+                pass  # the session is gone either way
+
+    def _make_events_class(self):
+        from comtypes import COMObject
+        try:
+            from pycaw.api.audiopolicy import IAudioSessionEvents
+        except ImportError:
+            from pycaw.pycaw import IAudioSessionEvents
+
+        class _SessionEvents(COMObject):
+            _com_interfaces_ = [IAudioSessionEvents]
+
+            def __init__(self, provider, index, session_id):
+                super().__init__()
+                self._provider = provider
+                self._index = index
+                self._session_id = session_id
+
+            def OnStateChanged(self, new_state):
+                if new_state == PycawSessionProvider.STATE_EXPIRED:
+                    self._provider._session_ended(self._index, self._session_id)
+                return 0
+
+            def OnSessionDisconnected(self, reason):
+                self._provider._session_ended(self._index, self._session_id)
+                return 0
+
+        return _SessionEvents
+
+    def _register(self, index: SessionIndex):
+        import ctypes
+        from comtypes import CLSCTX_ALL, COMObject
+        from pycaw.pycaw import AudioSession, AudioUtilities, IAudioSessionControl2, IAudioSessionManager2
+        try:
+            from pycaw.api.audiopolicy import IAudioSessionNotification
+        except ImportError:
+            from pycaw.pycaw import IAudioSessionNotification
+
+        provider = self
+
+        class _SessionCreated(COMObject):
+            _com_interfaces_ = [IAudioSessionNotification]
+
+            def OnSessionCreated(self, new_session):
+                try:
+                    session = AudioSession(new_session.QueryInterface(IAudioSessionControl2))
+                    provider._add(index, session)
+                except Exception as e:
+                    print(f"[WARNING] Could not index new audio session: {e}")
+                return 0
+
+        speakers = AudioUtilities.GetSpeakers()
+        interface = speakers.Activate(IAudioSessionManager2._iid_, CLSCTX_ALL, None)
+        manager = ctypes.cast(interface, ctypes.POINTER(IAudioSessionManager2))
+        notification = _SessionCreated()
+        manager.RegisterSessionNotification(notification)
+        self._manager = manager
+        self._notification = notification
+
+
+class FakeSession:
+    """In-memory session handle."""
+
+    def __init__(self, muted: bool = False):
+        self.muted = muted
+        self.set_calls = 0
+
+    def get_mute(self) -> bool:
+        return self.muted
+
+    def set_mute(self, mute: bool):
+        self.set_calls += 1
+        self.muted = bool(mute)
+
+
+class FakeSessionProvider:
+    """
+    Simulated session source for exercising the index off Windows.
+
+    spawn() and close() emit the same incremental events a real provider would
+    (close() stands for both expiry and disconnection).
+    """
+
+    def __init__(self, process_names: Optional[Iterable[str]] = None):
+        self.sessions: Dict[str, FakeSession] = {}
+        self._names: Dict[str, str] = {}
+        self._ids = itertools.count()
+        self._index: Optional[SessionIndex] = None
+        for name in process_names or []:
+            self.spawn(name)
+
+    def start(self, index: SessionIndex):
+        self._index = index
+        self.sync(index)
+
+    def sync(self, index: SessionIndex):
+        for session_id, session in list(self.sessions.items()):
+            index.session_added(session_id, self._names[session_id], session)
+
+    def spawn(self, process_name: str, muted: bool = False) -> str:
+        """Start a session for a process and return its ID."""
+        session_id = f"fake-session-{next(self._ids)}"
+        self.sessions[session_id] = FakeSession(muted)
+        self._names[session_id] = process_name
+        if self._index is not None:
+            self._index.session_added(session_id, process_name, self.sessions[session_id])
+        return session_id
+
+    def close(self, session_id: str):
+        """End a session."""
+        self.sessions.pop(session_id, None)
+        self._names.pop(session_id, None)
+        if self._index is not None:
+            self._index.session_removed(session_id)
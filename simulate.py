@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Schedule Simulator
+
+Answers "what would this schedule do?" for a whole year in well under a
+second, without waiting for real time to pass or touching the audio device.
+
+Nothing here re-implements the schedule. The report is built from the same
+production code the daemon runs:
+
+- the minute grid comes from CompiledSchedule.day_minutes() (the tables
+  behind is_muted_at()), evaluated in batches: whole days are gathered from
+  the week bitmap with NumPy when it is installed, or joined as bytes
+  otherwise, and a random sample is cross-checked against is_muted_at()
+- muted hours and transitions come from iter_transitions(), so DST gaps and
+  folds count in real time
+- enforcement is replayed by running auto_mute_core.check_mute_time under
+  MuteScheduler with a VirtualClock and a FakeAudioBackend, and the fake
+  device state is compared with the schedule on every wake
+
+Anomalies reported: windows with start == end (which mute the whole day),
+overlapping windows, very short mute/unmute periods, transitions moved by
+DST, mutes lasting more than a day, exceptions that are already in the past,
+and any disagreement between the code paths above.
+
+Usage:
+    python simulate.py                              # config.json, next 365 days
+    python simulate.py --config new.json --start 2027-01-01 --days 90
+    python simulate.py --config new.json --compare config.json   # what-if diff
+    python simulate.py --json
+"""
+
+import argparse
+import collections
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import List
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from schedule_index import CompiledSchedule, DAYS, MINUTES_PER_DAY, day_intervals, iter_transitions
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(SCRIPT_DIR, "config.json")
+
+# Mute or unmute periods shorter than this are reported
+SHORT_PERIOD_MINUTES = 5
+
+# Minutes of the grid cross-checked against is_muted_at() one by one
+CROSS_CHECK_SAMPLES = 5000
+
+
+def load_config(path: str, start: datetime.date) -> dict:
+    """Read a config file, merging its calendars for the simulated period."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("calendars"):
+        import ics_import
+        data, _paths, _expires = ics_import.merge_calendars(data, os.path.dirname(os.path.abspath(path)), start)
+    return data
+
+
+def minute_grid(compiled: CompiledSchedule, start: datetime.date, days: int, use_numpy: bool = True):
+    """
+    Wall-clock mute state for every minute of a period.
+
+    Args:
+        compiled: Schedule to evaluate
+        start: First date
+        days: Number of dates
+        use_numpy: Use NumPy if it is installed
+
+    Returns:
+        A (days, 1440) uint8 array with NumPy, else `days * 1440` bytes
+    """
+    last = start + datetime.timedelta(days=days - 1)
+    if numpy is not None and use_numpy:
+        week = numpy.frombuffer(bytes(compiled.bitmap), dtype=numpy.uint8).reshape(7, MINUTES_PER_DAY)
+        grid = week[(start.weekday() + numpy.arange(days)) % 7]
+        for date in compiled.override_dates(start, last):
+            grid[(date - start).days] = numpy.frombuffer(compiled.day_minutes(date), dtype=numpy.uint8)
+        return grid
+    return b"".join(compiled.day_minutes(start + datetime.timedelta(days=offset)) for offset in range(days))
+
+
+def grid_summary(grid, start: datetime.date, days: int) -> dict:
+    """Muted wall-clock minutes overall, per weekday and per month, plus flips."""
+    if numpy is not None and isinstance(grid, numpy.ndarray):
+        per_day = grid.sum(axis=1, dtype=numpy.int64).tolist()
+        flat = grid.reshape(-1)
+        flips = int(numpy.count_nonzero(flat[1:] != flat[:-1]))
+    else:
+        per_day = [grid[offset * MINUTES_PER_DAY:(offset + 1) * MINUTES_PER_DAY].count(1) for offset in range(days)]
+        # Bytes are 0/1, so each differing neighbour leaves exactly one set bit
+        flips = bin(int.from_bytes(grid[1:], "big") ^ int.from_bytes(grid[:-1], "big")).count("1")
+
+    by_weekday = collections.Counter()
+    by_month = collections.Counter()
+    for offset, minutes in enumerate(per_day):
+        date = start + datetime.timedelta(days=offset)
+        by_weekday[DAYS[date.weekday()]] += minutes
+        by_month[f"{date:%Y-%m}"] += minutes
+    return {
+        "muted_minutes": sum(per_day),
+        "flips": flips,
+        "muted_hours_by_weekday": {day: by_weekday[day] / 60 for day in DAYS},
+        "muted_hours_by_month": {month: minutes / 60 for month, minutes in sorted(by_month.items())},
+    }
+
+
+def cross_check(compiled: CompiledSchedule, grid, start: datetime.date, days: int, samples: int) -> int:
+    """Compare random grid cells with is_muted_at(); returns the number of disagreements."""
+    rng = random.Random(0)
+    flat = grid.reshape(-1) if numpy is not None and isinstance(grid, numpy.ndarray) else grid
+    mismatches = 0
+    for _ in range(samples):
+        index = rng.randrange(days * MINUTES_PER_DAY)
+        moment = datetime.datetime.combine(start, datetime.time()) + datetime.timedelta(minutes=index)
+        if bool(flat[index]) != compiled.is_muted_at(moment):
+            mismatches += 1
+    return mismatches
+
+
+def timeline(compiled: CompiledSchedule, start: datetime.datetime, end: datetime.datetime):
+    """Real-time (DST-correct) transitions in [start, end) and the initial state."""
+    initial = compiled.is_muted_at(start.replace(tzinfo=None))
+    transitions = []
+    for transition in iter_transitions(compiled, start):
+        if transition.at >= end:
+            break
+        transitions.append(transition)
+    return initial, transitions
+
+
+def replay(config: dict, start: datetime.datetime, end: datetime.datetime) -> dict:
+    """
+    Run the daemon's check_mute_time over the period on a virtual clock.
+
+    app_rules and multi-device muting are left out: the fake backend models
+    the default device only. Volume fades are too, since the fader ramps in
+    real time and would race the virtual clock.
+    """
+    import auto_mute_core as core
+    from audio_backend import FakeAudioBackend
+    from config_cache import ConfigCache
+    from mute_scheduler import MuteScheduler, VirtualClock
+
+    directory = tempfile.mkdtemp(prefix="auto_mute_sim_")
+    saved = (core.config_cache, core.audio_backend, core.notifications_enabled, core.state.enabled,
+             core._volume_fader)
+    try:
+        path = os.path.join(directory, "config.json")
+        replayed = {key: value for key, value in config.items() if key not in ("app_rules", "calendars")}
+        replayed["settings"] = dict(config.get("settings", {}), mute_all_devices=False, fade_seconds=0)
+        with open(path, "w") as f:
+            json.dump(replayed, f)
+
+        backend = FakeAudioBackend()
+        core.config_cache = ConfigCache(path, compile=CompiledSchedule)
+        core.set_audio_backend(backend)
+        core._volume_fader = None
+        core.notifications_enabled = False
+        core.state.set_enabled(True, "simulate")
+
+        wrong = []
+
+        def check(now):
+            core.check_mute_time(now)
+            wrong.append(backend.muted != core.get_compiled_schedule().is_muted_at(now))
+
+        clock = VirtualClock(start.replace(tzinfo=None))
+        scheduler = MuteScheduler(check, core.get_compiled_schedule, clock=clock, max_wait=None)
+        stop = end.replace(tzinfo=None)
+        # DST changes are logged as clock jumps; they are counted instead
+        with contextlib.redirect_stdout(io.StringIO()):
+            while clock.now() < stop:
+                scheduler.run_once()
+        return {
+            "wakeups": scheduler.wakeups,
+            "clock_jumps": scheduler.clock_jumps,
+            "mute_changes": sum(1 for _at, _muted, source in backend.history if source != "user"),
+            "wrong_state_checks": sum(wrong),
+        }
+    finally:
+        core.config_cache, core.audio_backend, core.notifications_enabled, enabled, core._volume_fader = saved
+        core.state.set_enabled(enabled, "simulate")
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def config_anomalies(config: dict, start: datetime.date) -> List[dict]:
+    """Suspicious windows in the config itself."""
+    anomalies = []
+
+    def check_windows(where: str, windows):
+        windows = [windows] if isinstance(windows, dict) else windows
+        for window in windows:
+            if window.get("start") == window.get("end"):
+                anomalies.append({"kind": "zero_length_window", "where": where,
+                                  "detail": f"{window['start']}-{window['end']} mutes the whole day"})
+        raw = sum(end - begin for window in windows for begin, end in day_intervals([window]))
+        merged = sum(end - begin for begin, end in day_intervals(windows))
+        if raw > merged:
+            anomalies.append({"kind": "overlapping_windows", "where": where,
+                              "detail": f"{raw - merged} minutes covered twice"})
+
+    for day in DAYS:
+        if day in config:
+            check_windows(day, config[day])
+    for entry in config.get("exceptions", []):
+        if "windows" in entry:
+            check_windows(f"exception {entry['date']}", entry["windows"])
+        if datetime.date.fromisoformat(entry.get("until", entry["date"])) < start:
+            anomalies.append({"kind": "past_exception", "where": f"exception {entry['date']}",
+                              "detail": "ends before the simulated period"})
+    for entry in config.get("holidays", []):
+        if "windows" in entry:
+            check_windows(f"holiday {entry['date']}", entry["windows"])
+    return anomalies
+
+
+def timeline_anomalies(initial: bool, transitions, start, end) -> List[dict]:
+    """
+    Short periods, long mutes and transitions moved by DST.
+
+    Weekly repeats are folded into one entry with a count.
+    """
+    found = collections.OrderedDict()
+
+    def add(kind: str, at: datetime.datetime, detail: str):
+        key = (kind, f"{at:%a %H:%M}", detail)
+        if key in found:
+            found[key]["count"] += 1
+        else:
+            found[key] = {"kind": kind, "first": at, "count": 1}
+
+    edges = [(start, initial)] + [(at, muted) for at, muted in transitions] + [(end, None)]
+    for (at, muted), (next_at, _) in zip(edges, edges[1:]):
+        minutes = (next_at - at).total_seconds() / 60
+        if at != start and next_at != end and minutes < SHORT_PERIOD_MINUTES:
+            add("short_period", at, f"{'muted' if muted else 'unmuted'} for only {minutes:.0f} min")
+        if muted and minutes > 24 * 60:
+            add("long_mute", at, f"muted for {minutes / 60:.1f} hours")
+    for at, muted in transitions:
+        before = (at - datetime.timedelta(seconds=1)).astimezone()
+        if before.utcoffset() != at.utcoffset():
+            add("dst_shift", at, f"{'mute' if muted else 'unmute'} moved by the DST change")
+
+    anomalies = []
+    for (kind, when, detail), entry in found.items():
+        where = f"{entry['first']:%Y-%m-%d %H:%M %Z}"
+        if entry["count"] > 1:
+            where = f"{when} ({entry['count']} times from {entry['first']:%Y-%m-%d})"
+        anomalies.append({"kind": kind, "where": where, "detail": detail, "count": entry["count"]})
+    return anomalies
+
+
+def simulate(config: dict, start: datetime.date, days: int, use_numpy: bool = True,
+             replay_core: bool = True) -> dict:
+    """
+    Simulate a config over a period.
+
+    Args:
+        config: Parsed config (calendars already merged)
+        start: First simulated date (local midnight)
+        days: Length of the period
+        use_numpy: Use NumPy for the minute grid if available
+        replay_core: Also replay check_mute_time on a virtual clock
+
+    Returns:
+        Report dictionary (see format_report)
+    """
+    started = time.perf_counter()
+    compiled = CompiledSchedule(config)
+    begin = datetime.datetime.combine(start, datetime.time()).astimezone()
+    end = datetime.datetime.combine(start + datetime.timedelta(days=days), datetime.time()).astimezone()
+
+    grid = minute_grid(compiled, start, days, use_numpy)
+    summary = grid_summary(grid, start, days)
+    initial, transitions = timeline(compiled, begin, end)
+
+    muted_seconds = 0.0
+    edges = [(begin, initial)] + [(at, muted) for at, muted in transitions] + [(end, None)]
+    for (at, muted), (next_at, _) in zip(edges, edges[1:]):
+        if muted:
+            muted_seconds += (next_at - at).total_seconds()
+
+    anomalies = config_anomalies(config, start) + timeline_anomalies(initial, transitions, begin, end)
+    mismatches = cross_check(compiled, grid, start, days, CROSS_CHECK_SAMPLES)
+    if mismatches:
+        anomalies.append({"kind": "drift", "where": "minute grid",
+                          "detail": f"{mismatches} of {CROSS_CHECK_SAMPLES} sampled minutes disagree with is_muted_at()"})
+
+    report = {
+        "start": start.isoformat(),
+        "days": days,
+        "grid_backend": "numpy" if numpy is not None and use_numpy else "bytes",
+        "muted_hours": muted_seconds / 3600,
+        "muted_fraction": muted_seconds / (end - begin).total_seconds(),
+        "transitions": len(transitions),
+        "mutes": sum(1 for transition in transitions if transition.muted),
+        "unmutes": sum(1 for transition in transitions if not transition.muted),
+        "wall_clock": summary,
+        "anomalies": anomalies,
+    }
+    if replay_core:
+        report["replay"] = replay(config, begin, end)
+        if report["replay"]["wrong_state_checks"]:
+            anomalies.append({"kind": "drift", "where": "check_mute_time replay",
+                              "detail": f"{report['replay']['wrong_state_checks']} checks left the device in the wrong state"})
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def format_report(report: dict, title: str) -> str:
+    lines = [
+        f"{title}: {report['days']} days from {report['start']}",
+        f"  Muted: {report['muted_hours']:.1f} h ({report['muted_fraction']:.1%} of the time)",
+        f"  Transitions: {report['transitions']} ({report['mutes']} mutes, {report['unmutes']} unmutes)",
+        "  Muted hours by weekday: " + ", ".join(
+            f"{day[:3]} {hours:.0f}" for day, hours in report["wall_clock"]["muted_hours_by_weekday"].items()),
+    ]
+    if "replay" in report:
+        replay_report = report["replay"]
+        lines.append(f"  Replay: {replay_report['wakeups']} wakeups, {replay_report['mute_changes']} device changes, "
+                     f"{replay_report['wrong_state_checks']} wrong-state checks")
+    if report["anomalies"]:
+        lines.append(f"  Anomalies ({len(report['anomalies'])}):")
+        for anomaly in report["anomalies"][:20]:
+            lines.append(f"    [{anomaly['kind']}] {anomaly['where']}: {anomaly['detail']}")
+        if len(report["anomalies"]) > 20:
+            lines.append(f"    ... {len(report['anomalies']) - 20} more")
+    else:
+        lines.append("  Anomalies: none")
+    lines.append(f"  Simulated in {report['seconds'] * 1000:.0f} ms ({report['grid_backend']} grid)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a mute schedule without waiting for real time")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="config to simulate (default: config.json)")
+    parser.add_argument("--compare", help="second config to compare against (what-if)")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="first date (YYYY-MM-DD, default today)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--no-numpy", action="store_true", help="use the pure-Python grid")
+    parser.add_argument("--no-replay", action="store_true", help="skip replaying check_mute_time")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    reports = {}
+    for label, path in (("config", args.config), ("compare", args.compare)):
+        if path is None:
+            continue
+        try:
+            config = load_config(path, args.start)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Cannot load {path}: {e}")
+            sys.exit(1)
+        reports[label] = simulate(config, args.start, args.days, not args.no_numpy, not args.no_replay)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(format_report(reports["config"], args.config))
+    if "compare" in reports:
+        print()
+        print(format_report(reports["compare"], args.compare))
+        new, old = reports["config"], reports["compare"]
+        print(f"\nWhat-if ({os.path.basename(args.config)} vs {os.path.basename(args.compare)}):")
+        print(f"  Muted hours: {new['muted_hours'] - old['muted_hours']:+.1f}")
+        print(f"  Transitions: {new['transitions'] - old['transitions']:+d}")
+        print(f"  Anomalies: {len(new['anomalies']) - len(old['anomalies']):+d}")
+
+
+if __name__ == "__main__":
+    main()
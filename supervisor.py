@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Auto Mute - Supervisor
+
+Keeps the Auto-Mute daemon running. Replaces restart_watchdog.bat, which
+polled `tasklist` every 30 seconds and was fooled by any pythonw.exe.
+
+The supervisor launches the daemon as a child process and tracks it by PID:
+a waiter thread blocks on the process handle, so a crash is noticed the
+moment it happens without spawning anything. The daemon's scheduler loop
+also writes a heartbeat file before each wait, stating when it expects to
+wake next; if that deadline passes by more than `heartbeat_grace` seconds
+the child is considered hung and is restarted.
+
+A child that exits with code 0 was asked to quit (tray menu "Exit") and is
+not restarted; the supervisor stops with it. Other exits and hangs are
+restarted with exponential backoff. A crash loop (`crash_limit` exits within
+`crash_window` seconds) pauses restarts for `crash_pause` seconds. Every
+start, exit and restart is logged with its reason to watchdog.log.
+
+Usage:
+    pythonw supervisor.py                      # supervise auto_mute.py --tray
+    python supervisor.py --log watchdog.log -- python auto_mute.py
+
+    # Dummy child (any platform): crashes every 2 s
+    python supervisor.py --log /tmp/wd.log -- python -c "import time; time.sleep(2); raise SystemExit(1)"
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_FILE = os.path.join(SCRIPT_DIR, "watchdog.log")
+DEFAULT_HEARTBEAT_FILE = os.path.join(SCRIPT_DIR, "heartbeat.json")
+
+# The supervisor tells the child where to write its heartbeat
+HEARTBEAT_ENV = "AUTO_MUTE_HEARTBEAT"
+
+
+class HeartbeatWriter:
+    """Written by the daemon's scheduler loop before each wait."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.beats = 0
+
+    @classmethod
+    def from_environment(cls) -> Optional["HeartbeatWriter"]:
+        """Return a writer if running under the supervisor, else None."""
+        path = os.environ.get(HEARTBEAT_ENV)
+        return cls(path) if path else None
+
+    def beat(self, timeout: Optional[float]):
+        """
+        Record that the loop is alive.
+
+        Args:
+            timeout: Seconds until the loop will wake up again at the latest
+                (None if it only wakes for events)
+        """
+        now = time.time()
+        data = {
+            "pid": os.getpid(),
+            "time": now,
+            "deadline": now + timeout if timeout is not None else None,
+        }
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+            self.beats += 1
+        except OSError as e:
+            print(f"[WARNING] Failed to write heartbeat: {e}")
+
+
+def read_heartbeat(path: str) -> Optional[dict]:
+    """Return the last heartbeat, or None if missing or unreadable."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Supervisor:
+    """
+    Runs a child command and restarts it when it exits or stops beating.
+
+    Attributes:
+        restarts: Number of restarts so far
+        last_reason: Reason for the most recent restart
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        log_file: str = DEFAULT_LOG_FILE,
+        heartbeat_file: Optional[str] = DEFAULT_HEARTBEAT_FILE,
+        heartbeat_grace: float = 60.0,
+        startup_grace: float = 120.0,
+        check_interval: float = 5.0,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 300.0,
+        stable_after: float = 300.0,
+        crash_limit: int = 5,
+        crash_window: float = 120.0,
+        crash_pause: float = 900.0,
+    ):
+        """
+        Initialize the supervisor.
+
+        Args:
+            command: Child command line
+            log_file: File restart reasons are appended to
+            heartbeat_file: Heartbeat file the child writes (None disables
+                hang detection)
+            heartbeat_grace: Seconds a heartbeat deadline may be overdue
+            startup_grace: Seconds a new child has to write its first heartbeat
+            check_interval: Seconds between heartbeat checks (exits are
+                detected immediately regardless)
+            backoff_initial: First restart delay; doubles for each
+                consecutive quick failure
+            backoff_max: Upper bound on the restart delay
+            stable_after: A child running this long resets the backoff
+            crash_limit: Exits within crash_window that count as a crash loop
+            crash_window: Seconds over which exits are counted
+            crash_pause: Restart delay once a crash loop is detected
+        """
+        self.command = command
+        self.log_file = log_file
+        self.heartbeat_file = heartbeat_file
+        self.heartbeat_grace = heartbeat_grace
+        self.startup_grace = startup_grace
+        self.check_interval = check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.crash_limit = crash_limit
+        self.crash_window = crash_window
+        self.crash_pause = crash_pause
+
+        self.restarts = 0
+        self.last_reason: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._failures = 0
+        self._exit_times = collections.deque(maxlen=max(crash_limit, 1))
+        self._started_at = 0.0
+        self._grace_until = 0.0
+
+    def log(self, message: str):
+        """Append a timestamped line to the log file (and print it)."""
+        line = f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] {message}"
+        print(line)
+        try:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+    def stop(self):
+        """Stop supervising and terminate the child."""
+        self._stopping = True
+        self._wake.set()
+
+    def _start_child(self) -> bool:
+        env = dict(os.environ)
+        if self.heartbeat_file:
+            env[HEARTBEAT_ENV] = self.heartbeat_file
+            try:
+                os.remove(self.heartbeat_file)
+            except OSError:
+                pass
+        try:
+            self.process = subprocess.Popen(self.command, env=env, cwd=SCRIPT_DIR)
+        except OSError as e:
+            self.process = None
+            self.last_reason = f"failed to start: {e}"
+            return False
+
+        self._started_at = time.monotonic()
+        self._grace_until = self._started_at + self.startup_grace
+        self._wake.clear()
+        process = self.process
+
+        # Blocks on the process handle, so exits are seen immediately
+        def wait_for_exit():
+            process.wait()
+            self._wake.set()
+
+        threading.Thread(target=wait_for_exit, daemon=True).start()
+        self.log(f"Started Auto-Mute (PID {process.pid})")
+        return True
+
+    def _heartbeat_problem(self) -> Optional[str]:
+        """Return a reason if the child's heartbeat is missing or overdue."""
+        if not self.heartbeat_file or time.monotonic() < self._grace_until:
+            return None
+        heartbeat = read_heartbeat(self.heartbeat_file)
+        if heartbeat is None or heartbeat.get("pid") != self.process.pid:
+            return f"no heartbeat within {self.startup_grace:.0f}s of start"
+        deadline = heartbeat.get("deadline")
+        if deadline is not None:
+            overdue = time.time() - deadline
+            if overdue > self.heartbeat_grace:
+                return f"heartbeat overdue by {overdue:.0f}s (loop hung)"
+        return None
+
+    def _watch(self) -> Optional[str]:
+        """Wait until the child exits or hangs; return the reason (None on stop or a clean exit)."""
+        last_wall, last_monotonic = time.time(), time.monotonic()
+        while True:
+            self._wake.wait(self.check_interval)
+            if self._stopping:
+                return None
+
+            code = self.process.poll()
+            if code == 0:
+                self.last_reason = "exited normally"
+                self.log("Auto-Mute exited normally, not restarting")
+                return None
+            if code is not None:
+                return f"exited with code {code}"
+
+            # After sleep/resume or a clock change, give the child time to catch up
+            wall, monotonic = time.time(), time.monotonic()
+            if abs((wall - last_wall) - (monotonic - last_monotonic)) > 30:
+                self.log("Clock jump or resume from sleep detected")
+                self._grace_until = monotonic + self.heartbeat_grace
+            last_wall, last_monotonic = wall, monotonic
+
+            problem = self._heartbeat_problem()
+            if problem:
+                self._terminate_child()
+                return problem
+
+    def _terminate_child(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def _restart_delay(self) -> float:
+        """Exponential backoff, reset after a stable run, paused on a crash loop."""
+        now = time.monotonic()
+        if self._started_at and now - self._started_at >= self.stable_after:
+            self._failures = 0
+        self._failures += 1
+
+        self._exit_times.append(now)
+        if len(self._exit_times) >= self.crash_limit and now - self._exit_times[0] <= self.crash_window:
+            self.log(f"Crash loop detected ({len(self._exit_times)} exits in "
+                     f"{now - self._exit_times[0]:.0f}s), pausing {self.crash_pause:.0f}s")
+            self._exit_times.clear()
+            return self.crash_pause
+        return min(self.backoff_max, self.backoff_initial * 2 ** (self._failures - 1))
+
+    def run(self):
+        """Supervise until stop() is called or the child exits cleanly."""
+        self.log(f"Supervisor started (PID {os.getpid()}): {' '.join(self.command)}")
+        try:
+            while not self._stopping:
+                reason = self._watch() if self._start_child() else self.last_reason
+                if reason is None:
+                    break
+                self.last_reason = reason
+                self.log(f"Auto-Mute stopped: {reason}")
+                delay = self._restart_delay()
+                self.log(f"Restarting in {delay:.1f}s")
+                deadline = time.monotonic() + delay
+                while not self._stopping and time.monotonic() < deadline:
+                    self._wake.wait(deadline - time.monotonic())
+                    self._wake.clear()
+                if self._stopping:
+                    break
+                self.restarts += 1
+        finally:
+            self._terminate_child()
+            self.log("Supervisor stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep Auto-Mute running")
+    parser.add_argument("--log", default=DEFAULT_LOG_FILE, help="log file (default: watchdog.log)")
+    parser.add_argument("--heartbeat", default=DEFAULT_HEARTBEAT_FILE, help="heartbeat file")
+    parser.add_argument("--no-heartbeat", action="store_true", help="only restart on exit, not on hangs")
+    parser.add_argument("--heartbeat-grace", type=float, default=60.0)
+    parser.add_argument("--backoff-max", type=float, default=300.0)
+    parser.add_argument("command", nargs="*", help="child command (default: auto_mute.py --tray)")
+    args = parser.parse_args()
+
+    command = args.command or [sys.executable, os.path.join(SCRIPT_DIR, "auto_mute.py"), "--tray"]
+    supervisor = Supervisor(
+        command,
+        log_file=args.log,
+        heartbeat_file=None if args.no_heartbeat else args.heartbeat,
+        heartbeat_grace=args.heartbeat_grace,
+        backoff_max=args.backoff_max,
+    )
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
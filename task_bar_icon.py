@@ -6,6 +6,9 @@ Shows visual indicators for:
 - Auto-mute enabled/disabled state
 - Active/paused status
 
+Icons are rendered once per state and size and cached; pystray is only
+updated when the state or tooltip text actually changes.
+
 Usage:
     from task_bar_icon import TaskBarIcon
     
@@ -14,11 +17,35 @@ Usage:
 """
 
 import threading
-import time
 from typing import Callable, Optional
 from PIL import Image, ImageDraw
 import pystray
 from pystray import MenuItem as item
+from mute_scheduler import MuteScheduler
+
+# Base size the icon artwork is drawn at
+ICON_SIZE = 64
+
+# Sizes pre-rendered for the common DPI scales (16px at 100% ... 32px at 200%)
+ICON_SIZES = (16, 20, 24, 32, 40, 48, 64)
+
+# Upcoming mute/unmute events listed by "Show Status"
+STATUS_UPCOMING_EVENTS = 3
+
+
+def _tray_icon_size() -> int:
+    """Return the notification-area icon size for the current DPI."""
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+        # Without DPI awareness Windows reports 16px and scales our bitmap up
+        if user32.IsProcessDPIAware():
+            size = user32.GetSystemMetrics(49)  # SM_CXSMICON
+            if size in ICON_SIZES:
+                return size
+    except Exception:
+        pass
+    return ICON_SIZE
 
 
 class TaskBarIcon:
@@ -29,7 +56,9 @@ class TaskBarIcon:
         core_module: Reference to the auto_mute_core module
         icon: pystray.Icon instance
         _scheduler_thread: Background thread for running scheduled tasks
+        _scheduler: MuteScheduler driving the checks
         _running: Flag to control the scheduler thread
+        icon_renders: Number of icon images drawn (stays flat in steady state)
     """
     
     def __init__(self, core_module):
@@ -42,8 +71,16 @@ class TaskBarIcon:
         self.core = core_module
         self.icon: Optional[pystray.Icon] = None
         self._scheduler_thread: Optional[threading.Thread] = None
+        self._scheduler: Optional[MuteScheduler] = None
         self._running = False
         
+        # Rendered icons keyed by (enabled, size) and what pystray currently shows
+        self._icon_cache = {}
+        self._icon_size = _tray_icon_size()
+        self._shown_enabled: Optional[bool] = None
+        self._shown_tooltip: Optional[str] = None
+        self.icon_renders = 0
+        
     def _create_icon_image(self, enabled: bool) -> Image.Image:
         """
         Create an icon image based on the current state.
@@ -153,11 +190,48 @@ class TaskBarIcon:
         
         return image
     
+    def _get_icon_image(self, enabled: bool, size: Optional[int] = None) -> Image.Image:
+        """
+        Return the cached icon for a state, rendering it on first use.
+        
+        Args:
+            enabled: Whether auto-mute is currently enabled
+            size: Pixel size (defaults to the tray size for the current DPI)
+            
+        Returns:
+            PIL Image object for the icon
+        """
+        size = size or self._icon_size
+        image = self._icon_cache.get((enabled, size))
+        if image is None:
+            if size == ICON_SIZE:
+                image = self._create_icon_image(enabled)
+            else:
+                image = self._get_icon_image(enabled, ICON_SIZE).resize((size, size), Image.LANCZOS)
+            self._icon_cache[(enabled, size)] = image
+            self.icon_renders += 1
+        return image
+    
+    def _prerender_icons(self):
+        """Render every state at every DPI size up front."""
+        for enabled in (True, False):
+            for size in ICON_SIZES:
+                self._get_icon_image(enabled, size)
+    
     def _update_icon(self):
-        """Update the icon to reflect current state."""
-        if self.icon:
-            self.icon.icon = self._create_icon_image(self.core.auto_mute_enabled)
-            self.icon.title = self._get_tooltip()
+        """Update the icon to reflect current state, touching pystray only on changes."""
+        if not self.icon:
+            return
+        
+        enabled = self.core.state.enabled
+        if enabled != self._shown_enabled:
+            self.icon.icon = self._get_icon_image(enabled)
+            self._shown_enabled = enabled
+        
+        tooltip = self._get_tooltip()
+        if tooltip != self._shown_tooltip:
+            self.icon.title = tooltip
+            self._shown_tooltip = tooltip
     
     def _get_tooltip(self) -> str:
         """
@@ -166,8 +240,21 @@ class TaskBarIcon:
         Returns:
             Tooltip string
         """
-        status = "Enabled" if self.core.auto_mute_enabled else "Paused"
-        return f"Auto-Mute - {status}"
+        status = "Enabled" if self.core.state.enabled else "Paused"
+        tooltip = f"Auto-Mute - {status}"
+        
+        if self.core.state.enabled:
+            # Only the first step of the lazy timeline is computed
+            try:
+                transition = next(self.core.upcoming_transitions(), None)
+            except Exception:
+                transition = None
+            if transition:
+                at, muted = transition
+                action = "Mutes" if muted else "Unmutes"
+                tooltip += f" ({action} {at.strftime('%a %H:%M')})"
+        
+        return tooltip
     
     def _toggle_auto_mute(self, icon, item):
         """
@@ -177,21 +264,23 @@ class TaskBarIcon:
             icon: pystray.Icon instance
             item: MenuItem that was clicked
         """
-        self.core.auto_mute_enabled = not self.core.auto_mute_enabled
-        status = "ENABLED" if self.core.auto_mute_enabled else "PAUSED"
+        # The state change wakes the scheduler, which applies it right away
+        enabled = self.core.toggle_auto_mute("tray")
+        status = "ENABLED" if enabled else "PAUSED"
         
         self.core.send_notification(
             "Auto-Mute Toggle",
-            f"Auto-mute is now {status}"
+            f"Auto-mute is now {status}",
+            key="toggle"
         )
         
         # Update icon appearance
         self._update_icon()
     
-    def _check_mute_time_wrapper(self):
+    def _check_mute_time_wrapper(self, now=None):
         """Wrapper for check_mute_time that updates icon after check."""
         try:
-            self.core.check_mute_time()
+            self.core.check_mute_time(now)
             # Update icon in case state changed
             self._update_icon()
         except Exception as e:
@@ -206,32 +295,28 @@ class TaskBarIcon:
         comtypes.CoInitialize()
         
         try:
-            # Clear any existing scheduled jobs first
-            self.core.schedule.clear()
-            
-            # Schedule the check to run every minute
-            self.core.schedule.every(1).minutes.do(self._check_mute_time_wrapper)
-            
-            # Run initial check
-            self._check_mute_time_wrapper()
+            # Wait for schedule boundaries instead of polling every second
+            self._scheduler = MuteScheduler(
+                self._check_mute_time_wrapper,
+                self.core.get_compiled_schedule,
+                heartbeat=self.core.get_heartbeat(),
+                lead=self.core.get_fade_lead,
+            )
+            self.core.active_scheduler = self._scheduler
             
-            # Keep running scheduled tasks
-            while self._running:
-                try:
-                    self.core.schedule.run_pending()
-                    time.sleep(1)
-                except Exception as e:
-                    print(f"[ERROR] Scheduler error: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    time.sleep(5)  # Wait before retrying
+            # Endpoint notifications replace polling between transitions
+            if self.core.enable_mute_events():
+                self._scheduler.max_wait = None
+            if not self._running:
+                self._scheduler.stop()
+            self._scheduler.run()
         except Exception as e:
             print(f"[ERROR] Scheduler thread crashed: {e}")
             import traceback
             traceback.print_exc()
         finally:
-            # Cleanup scheduler
-            self.core.schedule.clear()
+            self.core.active_scheduler = None
+            self.core.release_audio_thread()
             # Cleanup COM when thread exits
             comtypes.CoUninitialize()
     
@@ -244,13 +329,23 @@ class TaskBarIcon:
             item: MenuItem that was clicked
         """
         import datetime
-        status = "Enabled" if self.core.auto_mute_enabled else "Paused"
+        import itertools
+        status = "Enabled" if self.core.state.enabled else "Paused"
         current_time = datetime.datetime.now().strftime("%H:%M")
+        audio_stats = self.core.get_audio_backend().stats()
         
-        self.core.send_notification(
-            "Auto-Mute Status",
-            f"Status: {status}\nTime: {current_time}"
-        )
+        lines = [f"Status: {status}", f"Time: {current_time}"]
+        try:
+            upcoming = list(itertools.islice(self.core.upcoming_transitions(), STATUS_UPCOMING_EVENTS))
+        except Exception as e:
+            print(f"[WARNING] Could not compute upcoming transitions: {e}")
+            upcoming = []
+        for at, muted in upcoming:
+            # %Z shows the DST/standard abbreviation, so a change in between is visible
+            lines.append(f"{'Mute' if muted else 'Unmute'}: {at.strftime('%a %H:%M %Z')}")
+        lines.append(f"Audio activations: {audio_stats['activations_per_hour']:.1f}/hour")
+        
+        self.core.send_notification("Auto-Mute Status", "\n".join(lines))
     
     def _open_schedule_gui(self, icon, item):
         """
@@ -310,6 +405,8 @@ class TaskBarIcon:
     def _stop(self):
         """Stop the scheduler thread."""
         self._running = False
+        if self._scheduler:
+            self._scheduler.stop()
         if self._scheduler_thread and self._scheduler_thread.is_alive():
             self._scheduler_thread.join(timeout=2)
     
@@ -328,11 +425,13 @@ class TaskBarIcon:
             self._scheduler_thread.start()
             
             # Create and run the system tray icon (blocks until stopped)
-            icon_image = self._create_icon_image(self.core.auto_mute_enabled)
+            self._prerender_icons()
+            self._shown_enabled = self.core.state.enabled
+            self._shown_tooltip = self._get_tooltip()
             self.icon = pystray.Icon(
                 name="Auto-Mute",
-                icon=icon_image,
-                title=self._get_tooltip(),
+                icon=self._get_icon_image(self._shown_enabled),
+                title=self._shown_tooltip,
                 menu=self._create_menu()
             )
             
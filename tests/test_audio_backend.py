@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from audio_backend import FakeAudioBackend, PycawBackend
+
+
+class StubEndpoint:
+    """Stands in for an activated IAudioEndpointVolume."""
+
+    def __init__(self, backend, device_id):
+        self.backend = backend
+        self.device_id = device_id
+        self.released = False
+
+    def _check(self):
+        assert not self.released, "call on a released handle"
+        if self.backend.stale.pop(self.device_id, False):
+            raise OSError("audio service restarted")
+
+    def GetMute(self):
+        self._check()
+        return self.backend.muted.get(self.device_id, False)
+
+    def SetMute(self, mute, context):
+        self._check()
+        self.backend.muted[self.device_id] = bool(mute)
+
+    def Release(self):
+        self.released = True
+
+
+class StubPycawBackend(PycawBackend):
+    """PycawBackend with the COM endpoint factory replaced by StubEndpoint."""
+
+    def __init__(self, endpoint_ids=("speakers",)):
+        self.endpoint_ids = list(endpoint_ids)
+        self.muted = {}
+        self.stale = {}
+        self.activated = []
+        super().__init__()
+
+    def _register_device_listener(self):
+        pass
+
+    def _worker_init(self):
+        pass
+
+    def _activate(self, device_id=None):
+        endpoint = StubEndpoint(self, device_id or "default")
+        self.activated.append((threading.current_thread().name, endpoint))
+        return endpoint, endpoint
+
+    def list_endpoints(self):
+        return self.endpoint_ids
+
+
+def in_thread(target, name):
+    thread = threading.Thread(target=target, name=name)
+    thread.start()
+    thread.join()
+
+
+def test_handle_is_activated_once_per_thread():
+    backend = StubPycawBackend()
+    for _ in range(50):
+        backend.set_mute(not backend.get_mute())
+    assert backend.stats()["activations"] == 1
+    assert (backend.stats()["get_calls"], backend.stats()["set_calls"]) == (50, 50)
+
+    def check_twice():
+        backend.get_mute()
+        backend.get_mute()
+
+    in_thread(check_twice, "hook")
+    in_thread(check_twice, "scheduler")
+    assert backend.stats()["activations"] == 3
+    assert [name for name, _endpoint in backend.activated] == ["MainThread", "hook", "scheduler"]
+
+
+def test_device_change_reactivates_and_releases():
+    backend = StubPycawBackend()
+    backend.set_mute(True)
+    first = backend.activated[-1][1]
+    backend.invalidate()  # default device changed
+    assert backend.get_mute()
+    assert first.released and len(backend.activated) == 2
+    assert backend.stats()["activations"] == 2
+
+
+def test_stale_handle_is_retried_once():
+    backend = StubPycawBackend()
+    backend.get_mute()
+    backend.stale["default"] = True
+    backend.set_mute(True)
+    assert backend.muted["default"] and backend.activated[0][1].released
+    assert backend.stats()["activations"] == 2
+
+
+def test_release_drops_the_thread_handles():
+    backend = StubPycawBackend(["speakers", "headset"])
+    backend.get_mute()
+    backend.get_device_mute("headset")
+    backend.release()
+    assert all(endpoint.released for _name, endpoint in backend.activated)
+    backend.get_mute()
+    assert backend.stats()["activations"] == 3
+
+
+def test_fan_out_keeps_handles_per_worker():
+    backend = StubPycawBackend(["speakers", "headset", "hdmi"])
+    backend.max_workers = 1
+    for mute in (True, False, True):
+        results = backend.set_mute_all(mute)
+        assert [result.device_id for result in results] == backend.endpoint_ids
+        assert all(result.ok for result in results)
+    assert backend.muted == {"speakers": True, "headset": True, "hdmi": True}
+    assert backend.stats()["activations"] == 3
+    backend.shutdown()
+
+
+def test_fake_backend_counts_activations():
+    backend = FakeAudioBackend()
+    for _ in range(10):
+        backend.get_mute()
+    assert backend.stats()["activations"] == 1
+    backend.fail_next = 1
+    with pytest.raises(OSError):
+        backend.set_mute(True)
+    backend.set_mute(True)
+    backend.invalidate()
+    assert backend.get_mute()
+    # First use, after the failure and after invalidate()
+    assert backend.stats()["activations"] == 3
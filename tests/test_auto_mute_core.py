@@ -0,0 +1,53 @@
+import datetime
+import json
+
+import pytest
+
+import auto_mute_core as core
+from audio_backend import FakeAudioBackend
+from config_cache import ConfigCache
+from journal import Journal
+
+MONDAY_NIGHT = datetime.datetime(2026, 1, 5, 23, 0)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """The core on a temporary config, a fake backend and a journal."""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"Monday": {"start": "22:00", "end": "07:00"},
+                                "settings": {"show_notifications": False}}))
+    saved = (core.config_cache, core.audio_backend, core.notifications_enabled, core._journal, core._volume_fader)
+    backend = FakeAudioBackend()
+    core.config_cache = ConfigCache(str(path), compile=core.compile_schedule)
+    core.set_audio_backend(backend)
+    core.notifications_enabled = False
+    core._volume_fader = None
+    core._journal = Journal(str(tmp_path / "journal"), background=False)
+    core.state.set_enabled(True, "test")
+    core.state.update(desired=None, muted=None)
+    try:
+        yield backend
+    finally:
+        core._journal.close()
+        core.config_cache, core.audio_backend, core.notifications_enabled, core._journal, core._volume_fader = saved
+        core.state.update(desired=None, muted=None)
+
+
+def transitions():
+    # Events are stamped with the real time, not the simulated one
+    return sum(day["mutes"] + day["unmutes"] for day in core._journal.rollup.days.values())
+
+
+def test_unreadable_mute_state_does_not_repeat_the_transition(daemon):
+    daemon.failing_devices.add(daemon.default_device)
+    for minute in range(3):
+        core.check_mute_time(MONDAY_NIGHT + datetime.timedelta(minutes=minute))
+    assert transitions() == 1
+    assert core.state.desired is True and core.state.muted is None
+
+    # Once the device answers again the state is enforced without another transition
+    daemon.failing_devices.clear()
+    core.check_mute_time(MONDAY_NIGHT + datetime.timedelta(minutes=3))
+    assert daemon.muted and core.state.muted is True
+    assert transitions() == 1
@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+import config_cache
+from config_cache import CONFIG_VERSION_KEY, ConfigCache, ConfigWatcher, write_config
+
+SCHEDULE = {"Monday": {"start": "22:00", "end": "07:00"}}
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_write_config_stamps_increasing_versions(tmp_path):
+    path = tmp_path / "config.json"
+    assert write_config(str(path), SCHEDULE) == 1
+    assert read(path) == dict(SCHEDULE, **{CONFIG_VERSION_KEY: 1})
+    # The stale version a caller read earlier is superseded
+    assert write_config(str(path), dict(SCHEDULE, **{CONFIG_VERSION_KEY: 1})) == 2
+    # A newer version in the data wins over the file's
+    assert write_config(str(path), dict(SCHEDULE, **{CONFIG_VERSION_KEY: 10})) == 11
+    assert read(path)[CONFIG_VERSION_KEY] == 11
+    assert os.listdir(tmp_path) == ["config.json"]  # no temp files left behind
+
+
+def test_write_config_over_an_invalid_file(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{half written")
+    assert write_config(str(path), SCHEDULE) == 1
+    assert read(path)["Monday"] == SCHEDULE["Monday"]
+
+
+def test_write_config_syncs_the_file_and_the_directory(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(config_cache.os, "fsync", lambda fd: synced.append(os.fstat(fd)) or real_fsync(fd))
+    write_config(str(tmp_path / "config.json"), SCHEDULE)
+    assert synced[0].st_size > 0  # the temp file, before the rename
+    if hasattr(os, "O_DIRECTORY"):
+        assert len(synced) == 2
+        assert synced[1].st_ino == os.stat(tmp_path).st_ino
+
+
+def test_write_config_retries_a_locked_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    real_replace = os.replace
+    failures = []
+
+    def locked_twice(source, target):
+        if len(failures) < 2:
+            failures.append(target)
+            raise PermissionError("in use")
+        real_replace(source, target)
+
+    monkeypatch.setattr(config_cache.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(config_cache.os, "replace", locked_twice)
+    assert write_config(str(path), SCHEDULE) == 1
+    assert len(failures) == 2 and read(path)[CONFIG_VERSION_KEY] == 1
+
+
+def test_write_config_gives_up_and_cleans_up(tmp_path, monkeypatch):
+    def always_locked(source, target):
+        raise PermissionError("in use")
+
+    monkeypatch.setattr(config_cache.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(config_cache.os, "replace", always_locked)
+    with pytest.raises(PermissionError):
+        write_config(str(tmp_path / "config.json"), SCHEDULE)
+    assert os.listdir(tmp_path) == []
+
+
+def test_written_version_is_what_the_cache_reports(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(str(path), SCHEDULE)
+    cache = ConfigCache(str(path))
+    assert cache.get()["Monday"] == SCHEDULE["Monday"] and cache.config_version == 1
+    version = write_config(str(path), cache.get())
+    assert cache.apply_push(version) == 2
+
+
+class Compiled:
+    """Compiled form that records the data it was built from."""
+
+    def __init__(self, data):
+        if "Monday" not in data:
+            raise ValueError("no Monday")
+        self.monday = data["Monday"]
+        self.dependencies = data.get("dependencies", [])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(str(path), SCHEDULE)
+    cache = ConfigCache(str(path), compile=Compiled)
+    cache.changes = []
+    cache.add_listener(lambda: cache.changes.append(cache.version))
+    return cache
+
+
+def test_reloads_when_the_file_changes(cache):
+    assert cache.get_compiled().monday == SCHEDULE["Monday"]
+    write_config(cache.path, {"Monday": {"start": "23:00", "end": "06:00"}})
+    assert cache.refresh()
+    assert cache.get_compiled().monday["start"] == "23:00"
+    assert cache.version == 2 and cache.config_version == 2
+    assert cache.changes == [1, 2]
+
+
+def test_no_reload_while_the_signature_is_unchanged(cache):
+    cache.get()
+    for _ in range(5):
+        assert not cache.refresh()
+        cache.get_compiled()
+    assert cache.loads == 1 and cache.changes == [1]
+
+
+def test_malformed_file_keeps_the_last_good_config(cache, capsys):
+    good = cache.get_compiled()
+    with open(cache.path, "w") as f:
+        f.write('{"Monday": ')
+    assert not cache.refresh()
+    assert not cache.refresh()  # the bad file is not parsed again
+    assert cache.get_compiled() is good and cache.changes == [1]
+    assert capsys.readouterr().out.count("Ignoring invalid config") == 1
+
+    # Valid JSON that does not compile is rejected the same way
+    write_config(cache.path, {"Tuesday": SCHEDULE["Monday"]})
+    assert not cache.refresh()
+    assert cache.get_compiled() is good
+    assert "no Monday" in capsys.readouterr().out
+
+    write_config(cache.path, SCHEDULE)
+    assert cache.refresh() and cache.get_compiled() is not good
+
+
+def test_nothing_loaded_yet(tmp_path):
+    path = tmp_path / "config.json"
+    with pytest.raises(FileNotFoundError):
+        ConfigCache(str(path)).get()
+    path.write_text("[")
+    with pytest.raises(ValueError, match="is invalid"):
+        ConfigCache(str(path)).get()
+
+
+def test_dependency_change_reloads(cache, tmp_path):
+    calendar = tmp_path / "holidays.ics"
+    calendar.write_text("BEGIN:VCALENDAR\n")
+    write_config(cache.path, dict(SCHEDULE, dependencies=[str(calendar)]))
+    cache.get()
+    assert not cache.refresh()
+    calendar.write_text("BEGIN:VCALENDAR\nEND:VCALENDAR\n")
+    assert cache.refresh() and cache.loads == 2
+
+
+@pytest.mark.parametrize("mode", ["inotify", "polling"])
+def test_watcher_picks_up_saves(cache, mode, monkeypatch):
+    if mode == "polling":
+        monkeypatch.setattr(ConfigWatcher, "_open_inotify", lambda self: None)
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux only")
+    cache.get()
+    reloaded = threading.Event()
+    cache.add_listener(reloaded.set)
+    watcher = ConfigWatcher(cache, poll_interval=0.01)
+    watcher.start()
+    try:
+        assert watcher.mode == mode
+        write_config(cache.path, {"Monday": {"start": "21:00", "end": "07:00"}})
+        assert reloaded.wait(5)
+        assert cache.get_compiled().monday["start"] == "21:00"
+    finally:
+        watcher.stop()
+    assert not watcher._thread.is_alive()
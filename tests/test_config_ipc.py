@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+from config_ipc import ConfigServer, notify_daemon
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses a Unix socket path")
+
+
+@pytest.fixture
+def server(tmp_path):
+    pushed = []
+
+    def on_push(version):
+        pushed.append(version)
+        return version
+
+    server = ConfigServer(on_push, address=str(tmp_path / "ipc.sock"), key_file=str(tmp_path / "ipc.key"))
+    assert server.start()
+    server.pushed = pushed
+    yield server
+    server.stop()
+
+
+def test_push_reaches_the_daemon(server):
+    assert oct(os.stat(server.key_file).st_mode & 0o777) == "0o600"
+    reply = notify_daemon(7, server.address, server.key_file)
+    assert reply == {"ok": True, "version": 7}
+    assert notify_daemon(8, server.address, server.key_file) == {"ok": True, "version": 8}
+    assert server.pushed == [7, 8] and server.pushes == 2
+
+
+def test_wrong_key_is_rejected(server, tmp_path):
+    wrong_key = tmp_path / "wrong.key"
+    wrong_key.write_bytes(os.urandom(32))
+    assert notify_daemon(7, server.address, str(wrong_key)) is None
+    assert server.pushes == 0
+    # The server keeps listening afterwards
+    assert notify_daemon(7, server.address, server.key_file) == {"ok": True, "version": 7}
+
+
+def test_failed_push_is_reported(tmp_path):
+    def on_push(version):
+        raise ValueError("invalid config")
+
+    server = ConfigServer(on_push, address=str(tmp_path / "ipc.sock"), key_file=str(tmp_path / "ipc.key"))
+    assert server.start()
+    try:
+        assert notify_daemon(3, server.address, server.key_file) == {"ok": False, "error": "invalid config"}
+    finally:
+        server.stop()
+
+
+def test_no_daemon_listening(server, tmp_path):
+    address, key_file = server.address, server.key_file
+    server.stop()
+    assert not os.path.exists(key_file)
+    assert notify_daemon(7, address, key_file) is None
+    assert notify_daemon(7, str(tmp_path / "missing.sock"), str(tmp_path / "missing.key")) is None
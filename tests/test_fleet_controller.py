@@ -0,0 +1,84 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import fleet_controller
+
+SCHEDULE = {"Monday": {"start": "22:00", "end": "07:00"}}
+
+
+@pytest.mark.parametrize("group", ["..", ".", "..\\..\\Users\\Public\\evil", "a/b", "", "x" * 65, "lab name"])
+def test_publish_rejects_unsafe_group_names(tmp_path, group):
+    controller = fleet_controller.FleetController(str(tmp_path))
+    with pytest.raises(ValueError):
+        controller.publish(group, SCHEDULE)
+    assert os.listdir(tmp_path) == []
+
+
+def test_publish_writes_inside_schedules_dir(tmp_path):
+    controller = fleet_controller.FleetController(str(tmp_path))
+    controller.publish("lab-2.west", SCHEDULE)
+    assert os.listdir(tmp_path) == ["lab-2.west.json"]
+
+
+def test_loopback_detection():
+    assert fleet_controller.is_loopback("127.0.0.1")
+    assert fleet_controller.is_loopback("::1")
+    assert fleet_controller.is_loopback("localhost")
+    assert not fleet_controller.is_loopback("0.0.0.0")
+    assert not fleet_controller.is_loopback("192.168.1.10")
+
+
+async def _request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload or b"null")
+
+
+def test_put_schedule_over_http(tmp_path):
+    async def scenario():
+        controller = fleet_controller.FleetController(str(tmp_path))
+        await controller.start("127.0.0.1", 0)
+        try:
+            body = json.dumps(SCHEDULE).encode()
+            bad = await _request(controller.port, "PUT", "/schedule/..%5C..%5Cevil", body)
+            good = await _request(controller.port, "PUT", "/schedule/lab", body)
+        finally:
+            await controller.close()
+        return bad, good
+
+    (bad_status, bad_reply), (good_status, good_reply) = asyncio.run(scenario())
+    assert bad_status == 400 and "invalid group" in bad_reply["error"]
+    assert good_status == 200 and good_reply["group"] == "lab" and good_reply["pushed_to"] == 0
+    assert os.listdir(tmp_path) == ["lab.json"]
+
+
+@pytest.mark.parametrize("body", [{"Monday": {"start": "22:00"}}, {"Monday": "22:00"}, {"exceptions": [7]}, [SCHEDULE]])
+def test_put_malformed_schedule_gets_400(tmp_path, body):
+    async def scenario():
+        controller = fleet_controller.FleetController(str(tmp_path))
+        await controller.start("127.0.0.1", 0)
+        try:
+            return await _request(controller.port, "PUT", "/schedule/lab", json.dumps(body).encode())
+        finally:
+            await controller.close()
+
+    status, reply = asyncio.run(scenario())
+    assert status == 400 and reply["error"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_broken_group_files_are_skipped(tmp_path, capsys):
+    (tmp_path / "lab.json").write_text(json.dumps(SCHEDULE))
+    (tmp_path / "office.json").write_text(json.dumps({"Monday": {"start": "22:00"}}))
+    (tmp_path / "truncated.json").write_text('{"Monday": {"start": "22:00", ')
+    controller = fleet_controller.FleetController(str(tmp_path))
+    assert sorted(controller.schedules) == ["lab"]
+    warnings = capsys.readouterr().out
+    assert "Skipping schedule" in warnings and "office.json" in warnings and "truncated.json" in warnings
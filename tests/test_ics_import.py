@@ -0,0 +1,131 @@
+import datetime
+import os
+import shutil
+
+import pytest
+
+import ics_import
+from schedule_index import CompiledSchedule
+from conftest import FIXTURES
+
+WINDOW_START = datetime.datetime(2026, 1, 1)
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    ics_import._cache.clear()
+    yield
+    ics_import._cache.clear()
+
+
+def test_weekly_rule_with_exdate_and_moved_instance():
+    intervals = ics_import.import_calendar(fixture("weekly.ics"), WINDOW_START, 60)
+    starts = [begin for begin, _end, _all_day in intervals]
+    assert starts == [
+        datetime.datetime(2026, 1, 5, 9, 0),
+        datetime.datetime(2026, 1, 13, 14, 0),  # moved from the 12th
+        datetime.datetime(2026, 1, 14, 9, 0),
+        datetime.datetime(2026, 1, 19, 9, 0),
+        datetime.datetime(2026, 1, 21, 9, 0),
+    ]
+    assert all(end - begin == datetime.timedelta(hours=1) for begin, end, _all_day in intervals)
+
+
+def test_yearly_all_day_events_inside_horizon_only():
+    intervals = ics_import.import_calendar(fixture("holidays.ics"), WINDOW_START, 30)
+    assert intervals == [
+        (datetime.datetime(2026, 1, 1), datetime.datetime(2026, 1, 2), True),
+        (datetime.datetime(2026, 1, 2), datetime.datetime(2026, 1, 4), True),
+    ]
+
+
+def test_match_filters_by_summary():
+    intervals = ics_import.import_calendar(fixture("weekly.ics"), WINDOW_START, 60, match=["moved"])
+    assert [begin for begin, _end, _all_day in intervals] == [datetime.datetime(2026, 1, 13, 14, 0)]
+
+
+def test_unknown_byday_is_rejected_by_parse_rule():
+    with pytest.raises(ics_import.UnsupportedRule):
+        ics_import.parse_rule("FREQ=WEEKLY;BYDAY=XX")
+    with pytest.raises(ics_import.UnsupportedRule):
+        ics_import.parse_rule("FREQ=MONTHLY;BYDAY=1XX")
+    assert ics_import.parse_rule("FREQ=MONTHLY;BYDAY=-1fr")["BYDAY"] == "-1FR"
+
+
+def test_broken_events_are_skipped_not_fatal(capsys):
+    intervals = ics_import.import_calendar(fixture("broken.ics"), WINDOW_START, 60)
+    # BYDAY=XX and BYMONTHDAY=32 fall back to the first occurrence, the
+    # unparsable start is dropped and February 30th never happens
+    assert [begin for begin, _end, _all_day in intervals] == [
+        datetime.datetime(2026, 1, 5, 18, 0),
+        datetime.datetime(2026, 1, 7, 13, 0),
+        datetime.datetime(2026, 1, 8, 18, 0),
+    ]
+    assert "[WARNING]" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("rule", ["FREQ=MONTHLY;BYMONTHDAY=32", "FREQ=MONTHLY;BYMONTHDAY=0",
+                                  "FREQ=MONTHLY;BYMONTHDAY=-32", "FREQ=YEARLY;BYMONTH=13",
+                                  "FREQ=YEARLY;BYMONTH=-1", "FREQ=MONTHLY;BYDAY=54MO", "FREQ=MONTHLY;BYDAY=0FR",
+                                  "FREQ=YEARLY;BYSETPOS=400", "FREQ=YEARLY;BYYEARDAY=367"])
+def test_out_of_range_rule_parts_are_rejected(rule):
+    with pytest.raises(ics_import.UnsupportedRule):
+        ics_import.parse_rule(rule)
+
+
+def test_rule_that_never_matches_stops_searching():
+    rule = ics_import.parse_rule("FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=30")
+    start = datetime.datetime(2026, 1, 9, 18, 0)
+    assert list(ics_import._candidates(start, rule, None)) == []
+    # Leap days are still found across the non-leap years in between
+    leap = ics_import.parse_rule("FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29")
+    window_end = datetime.datetime(2033, 1, 1)
+    occurrences = list(ics_import.iter_occurrences(start, leap, start, window_end))
+    assert [moment.year for moment in occurrences] == [2028, 2032]
+
+
+def test_results_are_cached_by_file_hash(tmp_path):
+    path = tmp_path / "weekly.ics"
+    shutil.copy(fixture("weekly.ics"), path)
+    first = ics_import.import_calendar(str(path), WINDOW_START, 60)
+    assert ics_import.import_calendar(str(path), WINDOW_START, 60) is first
+
+    path.write_text(path.read_text().replace("COUNT=6", "COUNT=2"))
+    changed = ics_import.import_calendar(str(path), WINDOW_START, 60)
+    assert changed is not first
+    # Jan 5 and 7 remain (7 excluded); the moved instance stands on its own
+    assert [begin.day for begin, _end, _all_day in changed] == [5, 13]
+
+
+def test_merge_survives_missing_and_broken_calendars(monkeypatch):
+    real_import = ics_import.import_calendar
+
+    def import_calendar(path, *args):
+        if path.endswith("exploding.ics"):
+            raise KeyError("XX")
+        return real_import(path, *args)
+
+    monkeypatch.setattr(ics_import, "import_calendar", import_calendar)
+    config = {
+        "Monday": {"start": "22:00", "end": "07:00"},
+        "calendars": [
+            {"path": "missing.ics"},
+            {"path": "exploding.ics"},
+            {"path": "broken.ics"},
+            {"path": "holidays.ics"},
+        ],
+    }
+    merged, paths, expires = ics_import.merge_calendars(config, FIXTURES, today=datetime.date(2026, 1, 2))
+    assert len(paths) == 4 and expires is not None
+    by_date = {entry["date"]: entry for entry in merged["exceptions"]}
+    assert by_date["2026-01-02"] == {"date": "2026-01-02", "muted": True}
+    assert by_date["2026-01-05"]["windows"][-1] == {"start": "18:00", "end": "19:00"}
+
+    compiled = CompiledSchedule(merged)
+    assert compiled.is_muted_at(datetime.datetime(2026, 1, 3, 12, 0))
+    assert compiled.is_muted_at(datetime.datetime(2026, 1, 7, 14, 0))
+    assert not compiled.is_muted_at(datetime.datetime(2026, 1, 7, 16, 0))
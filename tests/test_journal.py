@@ -0,0 +1,110 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import journal
+from journal import Journal, list_segments, read_events
+
+DAY = datetime.date(2026, 3, 10)
+EVENING = datetime.datetime(2026, 3, 10, 20, 0).timestamp()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock(EVENING)
+
+
+def open_journal(path, clock, **options):
+    return Journal(str(path), clock=clock, background=False, **options)
+
+
+def test_events_are_appended_and_rolled_up(tmp_path, clock):
+    log = open_journal(tmp_path, clock)
+    log.record("transition", t=EVENING, muted=True)
+    log.record("enforce", t=EVENING + 60, muted=True, target="system volume")
+    log.record("override", t=EVENING + 60, muted=True, target="system volume")
+    log.record("transition", t=EVENING + 3600, muted=False)
+    log.record("toggle", t=EVENING + 4000, enabled=False, source="hotkey")
+    log.record("toggle", t=EVENING + 4100, enabled=True, source="hotkey")
+    clock.now = EVENING + 5000
+    log.close()
+
+    totals = journal.load_rollup(str(tmp_path)).summary(DAY, DAY)["totals"]
+    assert totals["muted_seconds"] == 3600
+    assert (totals["mutes"], totals["unmutes"]) == (1, 1)
+    assert (totals["enforcements"], totals["overrides"]) == (1, 1)
+    assert (totals["pauses"], totals["resumes"], totals["starts"]) == (1, 1, 1)
+    assert totals["events"] == 8
+    kinds = [event["kind"] for event in read_events(str(tmp_path))]
+    assert kinds == ["start", "transition", "enforce", "override", "transition", "toggle", "toggle", "stop"]
+    assert [event["kind"] for event in read_events(str(tmp_path), kinds={"override"})] == ["override"]
+
+
+def test_muted_time_is_split_at_midnight(tmp_path, clock):
+    log = open_journal(tmp_path, clock)
+    log.record("transition", t=datetime.datetime(2026, 3, 10, 22, 0).timestamp(), muted=True)
+    log.record("transition", t=datetime.datetime(2026, 3, 11, 7, 0).timestamp(), muted=False)
+    log.close()
+    days = journal.load_rollup(str(tmp_path)).summary(DAY, DAY + datetime.timedelta(days=1))["days"]
+    assert days["2026-03-10"]["muted_seconds"] == 2 * 3600
+    assert days["2026-03-11"]["muted_seconds"] == 7 * 3600
+
+
+def test_recovery_replays_events_after_the_rollup_and_drops_a_torn_line(tmp_path, clock, capsys):
+    log = open_journal(tmp_path, clock)
+    log.record("transition", t=EVENING, muted=True)
+    log.flush()
+    # Crash: one more event reached the segment but not rollup.json, the next was cut off
+    segment = tmp_path / journal.segment_name(1)
+    with open(segment, "ab") as f:
+        f.write(b'{"t":%.3f,"kind":"transition","muted":false}\n' % (EVENING + 600))
+        f.write(b'{"t":%.3f,"kind":"enfo' % (EVENING + 700))
+    log._file.close()
+
+    clock.now = EVENING + 900
+    log = open_journal(tmp_path, clock)
+    log.close()
+    output = capsys.readouterr().out
+    assert "Replayed 1 journal events" in output and "torn event" in output
+
+    totals = log.rollup.summary(DAY, DAY)["totals"]
+    assert totals["muted_seconds"] == 600
+    assert (totals["mutes"], totals["unmutes"], totals["enforcements"], totals["starts"]) == (1, 1, 0, 2)
+    # Appends after the recovery start on a fresh line, so nothing later is lost
+    kinds = [event["kind"] for event in read_events(str(tmp_path))]
+    assert kinds == ["start", "transition", "transition", "start", "stop"]
+
+
+def test_rotation_compacts_closed_segments_and_retention_keeps_totals(tmp_path, clock):
+    log = open_journal(tmp_path, clock, max_bytes=300, flush_records=1, retention_days=30)
+    for minute in range(0, 120, 10):
+        log.record("transition", t=EVENING + minute * 60, muted=minute % 20 == 0)
+    segments = list_segments(str(tmp_path))
+    assert len(segments) > 2
+    active = max(segments)
+    assert all(name.endswith(".gz") for sequence, name in segments.items() if sequence != active)
+    # Compressed segments read back in order
+    times = [event["t"] for event in read_events(str(tmp_path)) if event["kind"] == "transition"]
+    assert times == [EVENING + minute * 60 for minute in range(0, 120, 10)]
+    before = log.rollup.summary(DAY, DAY)["totals"]
+
+    # Two months later the old segments are deleted, but the daily totals stay
+    clock.now = EVENING + 60 * 86400
+    assert log.compact() > 0
+    assert set(list_segments(str(tmp_path))) == {active}
+    log.close()
+    after = journal.load_rollup(str(tmp_path)).summary(DAY, DAY)["totals"]
+    assert after["muted_seconds"] == before["muted_seconds"] == 6 * 600
+    assert after["mutes"] == before["mutes"] == 6
+    with open(tmp_path / journal.ROLLUP_FILE) as f:
+        assert set(json.load(f)["segments"]) == {str(active)}
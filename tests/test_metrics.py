@@ -0,0 +1,69 @@
+import json
+import os
+
+from conftest import FIXTURES
+from metrics import BUCKETS, MetricsRegistry, MetricsWriter
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    registry.observe("audio_get_mute", 0.002)
+    registry.observe("audio_get_mute", 0.5)  # on a bucket bound: counted as le="0.5"
+    registry.failure("audio_get_mute", RuntimeError("COM busy"))
+    registry.observe("check", 0.00003)
+    registry.increment("endpoint_mute_events", 3)
+    return registry
+
+
+def stable_snapshot(registry):
+    snapshot = registry.snapshot()
+    snapshot["started"] = 1700000000.0
+    snapshot["operations"]["audio_get_mute"]["last_error_time"] = 1700000100.5
+    return snapshot
+
+
+def test_prometheus_text_format():
+    registry = make_registry()
+    with open(os.path.join(FIXTURES, "metrics.prom")) as f:
+        assert registry.to_prometheus(stable_snapshot(registry)) == f.read()
+
+
+def test_json_snapshot():
+    snapshot = stable_snapshot(make_registry())
+    operation = snapshot["operations"]["audio_get_mute"]
+    assert list(snapshot["operations"]) == ["audio_get_mute", "check"]
+    assert (operation["calls"], operation["failures"], operation["last_error"]) == (2, 1, "COM busy")
+    assert operation["mean_seconds"] == 0.251
+    assert list(operation["buckets"]) == [str(bound) for bound in BUCKETS] + ["+Inf"]
+    assert operation["buckets"]["0.005"] == operation["buckets"]["0.5"] == 1
+    assert snapshot["operations"]["check"]["failures"] == 0
+    assert snapshot["counters"] == {"endpoint_mute_events": 3}
+    assert json.loads(json.dumps(snapshot)) == snapshot
+
+
+def test_timer_counts_exceptions_as_failures():
+    registry = MetricsRegistry()
+    try:
+        with registry.timer("audio_set_mute"):
+            raise OSError("device gone")
+    except OSError:
+        pass
+    registry.observe("audio_set_mute", 60.0)
+    operation = registry.snapshot()["operations"]["audio_set_mute"]
+    assert (operation["calls"], operation["failures"], operation["last_error"]) == (2, 1, "device gone")
+    assert operation["buckets"]["+Inf"] == 1
+
+
+def test_writer_exports_both_formats(tmp_path):
+    registry = make_registry()
+    json_path, prometheus_path = tmp_path / "metrics.json", tmp_path / "metrics.prom"
+    writer = MetricsWriter(str(json_path), str(prometheus_path), interval=60, registry=registry)
+    writer.start()
+    writer.stop()  # writes a final snapshot
+
+    with open(json_path) as f:
+        written = json.load(f)
+    assert written["operations"] == registry.snapshot()["operations"]
+    assert written["counters"] == {"endpoint_mute_events": 3}
+    assert prometheus_path.read_text() == registry.to_prometheus()
+    assert sorted(os.listdir(tmp_path)) == ["metrics.json", "metrics.prom"]
@@ -0,0 +1,89 @@
+import contextlib
+import datetime
+import io
+
+import pytest
+
+from mute_scheduler import MuteScheduler, VirtualClock
+from schedule_index import CompiledSchedule
+
+# Monday 2026-01-05 09:00 local time, far from any DST change
+START = datetime.datetime(2026, 1, 5, 9, 0)
+LUNCH = CompiledSchedule({"Monday": {"start": "12:00", "end": "13:00"}})
+
+
+def at(hour, minute=0, second=0.0):
+    return START.replace(hour=hour, minute=minute) + datetime.timedelta(seconds=second)
+
+
+def make_scheduler(clock, max_wait=None, schedule=LUNCH):
+    checks, timeouts = [], []
+    scheduler = MuteScheduler(checks.append, lambda: schedule, clock=clock, max_wait=max_wait,
+                              heartbeat=timeouts.append)
+    return scheduler, checks, timeouts
+
+
+def run(scheduler, times):
+    # Clock jumps are reported with a warning
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(times):
+            scheduler.run_once()
+
+
+def test_wakes_exactly_at_each_transition():
+    scheduler, checks, timeouts = make_scheduler(VirtualClock(START))
+    run(scheduler, 3)
+    assert checks == [at(9), at(12), at(13)]
+    # max_wait=None: no polling, the next wait runs to next Monday's window
+    assert timeouts == [3 * 3600, 3600, 7 * 86400 - 3600]
+    assert list(scheduler.transition_lags) == [0.0, 0.0]
+    assert scheduler.clock_jumps == 0
+
+
+def test_wakeup_latency_is_reported_as_transition_lag():
+    scheduler, checks, _timeouts = make_scheduler(VirtualClock(START, wakeup_latency=0.25))
+    run(scheduler, 3)
+    assert checks == [at(9), at(12, second=0.25), at(13, second=0.25)]
+    assert list(scheduler.transition_lags) == pytest.approx([0.25, 0.25])
+
+
+def test_max_wait_caps_each_wait():
+    scheduler, checks, timeouts = make_scheduler(VirtualClock(START), max_wait=3600)
+    run(scheduler, 5)
+    assert checks == [at(9), at(10), at(11), at(12), at(13)]
+    assert timeouts == [3600] * 5
+    assert list(scheduler.transition_lags) == [0.0, 0.0]
+
+
+def test_forward_clock_jump_wakes_and_reevaluates():
+    clock = VirtualClock(START)
+    # Suspended at 09:30 and resumed at 13:30, past the whole window
+    clock.jump(4 * 3600, after=1800)
+    scheduler, checks, _timeouts = make_scheduler(clock)
+    run(scheduler, 2)
+    assert checks == [at(9), at(13, 30)]
+    assert scheduler.clock_jumps == 1 and scheduler.last_clock_jump == 4 * 3600
+    assert scheduler.last_wake_reason == "clock"
+    # A missed boundary is not a scheduling lag
+    assert list(scheduler.transition_lags) == []
+
+
+def test_backward_clock_jump_keeps_the_boundary():
+    clock = VirtualClock(START)
+    clock.jump(-2 * 3600, after=600)
+    scheduler, checks, timeouts = make_scheduler(clock)
+    run(scheduler, 3)
+    # The first wait still ends on the monotonic clock, then the loop re-aims at 12:00
+    assert checks == [at(9), at(10), at(12)]
+    assert timeouts == [3 * 3600, 2 * 3600, 3600]
+    assert scheduler.clock_jumps == 1 and scheduler.last_clock_jump == -2 * 3600
+
+
+def test_wake_interrupts_the_wait():
+    clock = VirtualClock(START)
+    scheduler, checks, _timeouts = make_scheduler(clock)
+    scheduler.wake("toggle")
+    run(scheduler, 2)
+    # The pending wake ends the first wait at once
+    assert checks == [at(9), at(9)]
+    assert scheduler.last_wake_reason == "toggle"
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from mute_state import MuteState
+
+THREADS = 8
+TOGGLES = 2000
+
+
+def test_concurrent_toggles_are_not_lost_and_events_arrive_in_order():
+    state = MuteState(enabled=True)
+    events = []
+    state.add_listener(lambda old, new, source: events.append((old, new)))
+    torn = []
+    done = threading.Event()
+
+    def reader():
+        # Only toggles happen, so an even version always means enabled
+        while not done.is_set():
+            snapshot = state.snapshot()
+            if snapshot.enabled != (snapshot.version % 2 == 0):
+                torn.append(snapshot)
+            time.sleep(0)
+
+    barrier = threading.Barrier(THREADS)
+
+    def toggler():
+        barrier.wait()
+        for _ in range(TOGGLES):
+            state.toggle("test")
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    togglers = [threading.Thread(target=toggler) for _ in range(THREADS)]
+    for thread in readers + togglers:
+        thread.start()
+    for thread in togglers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    total = THREADS * TOGGLES
+    assert state.version == total
+    assert state.enabled is (total % 2 == 0)
+    assert not torn
+    assert [new.version for _old, new in events] == list(range(1, total + 1))
+    assert all(old.version == new.version - 1 and old.enabled != new.enabled for old, new in events)
+
+
+def test_updates_without_change_send_no_event():
+    state = MuteState()
+    events = []
+    state.add_listener(lambda old, new, source: events.append(source))
+    state.update(muted=True, desired=True)
+    state.update(muted=True, desired=True)
+    state.set_enabled(True)
+    assert events == ["check"]
+    assert state.snapshot()[:3] == (True, True, True)
+
+
+def test_listener_may_change_state_from_inside_an_event():
+    state = MuteState()
+    seen = []
+
+    def listener(old, new, source):
+        seen.append(new.version)
+        if source == "toggle" and not new.enabled:
+            state.update(source="listener", muted=None, desired=None)
+
+    state.add_listener(listener)
+    state.update(muted=True, desired=True)
+    state.toggle()
+    assert seen == [1, 2, 3]
+    assert state.snapshot()[:3] == (False, None, None)
+
+
+def test_wait_for_change_wakes_on_a_toggle_from_another_thread():
+    state = MuteState()
+    version = state.version
+    timer = threading.Timer(0.05, state.toggle, args=("hotkey",))
+    timer.start()
+    snapshot = state.wait_for_change(version, timeout=5)
+    timer.join()
+    assert snapshot.version == version + 1 and not snapshot.enabled
+    assert state.wait_for_change(snapshot.version, timeout=0.01) == snapshot
+
+
+def test_failing_listener_does_not_block_others(capsys):
+    state = MuteState()
+    calls = []
+    state.add_listener(lambda old, new, source: 1 / 0)
+    state.add_listener(lambda old, new, source: calls.append(new.enabled))
+    state.toggle()
+    assert calls == [False]
+    assert "State listener failed" in capsys.readouterr().out
@@ -0,0 +1,109 @@
+import threading
+
+from notifications import FakeNotifier, NotificationDispatcher
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_dispatcher(**options):
+    clock, notifier = ManualClock(), FakeNotifier()
+    options = dict(dict(min_interval=2.0, max_age=30.0, repeat_interval=30.0, coalesce_window=0.25), **options)
+    return clock, notifier, NotificationDispatcher(notifier, clock=clock, background=False, **options)
+
+
+def test_burst_with_one_key_coalesces():
+    clock, notifier, dispatcher = make_dispatcher()
+    for state in ["PAUSED", "ACTIVE", "PAUSED", "ACTIVE", "PAUSED"]:
+        dispatcher.post("Auto-Mute Toggle", f"Auto-mute is now {state}", key="toggle")
+        clock.advance(0.01)
+    assert dispatcher.deliver_due() == 0  # the burst has not settled yet
+    clock.advance(0.25)
+    assert dispatcher.deliver_due() == 1
+    assert notifier.delivered == [("Auto-Mute Toggle", "Auto-mute is now PAUSED")]
+    assert (dispatcher.posted, dispatcher.coalesced) == (5, 4)
+
+
+def test_messages_without_a_key_are_all_delivered():
+    clock, notifier, dispatcher = make_dispatcher(min_interval=0.0)
+    dispatcher.post("Auto-Mute", "one")
+    dispatcher.post("Auto-Mute", "two")
+    clock.advance(0.25)
+    assert dispatcher.deliver_due() == 2
+    assert [message for _title, message in notifier.delivered] == ["one", "two"]
+
+
+def test_deliveries_are_rate_limited():
+    clock, notifier, dispatcher = make_dispatcher()
+    dispatcher.post("Auto-Mute", "muted", key="schedule")
+    dispatcher.post("Auto-Mute", "paused", key="toggle")
+    clock.advance(0.25)
+    assert dispatcher.deliver_due() == 1
+    clock.advance(1.9)
+    assert dispatcher.deliver_due() == 0
+    clock.advance(0.1)
+    assert dispatcher.deliver_due() == 1
+    assert [message for _title, message in notifier.delivered] == ["muted", "paused"]
+
+
+def test_stale_messages_and_repeats_are_dropped():
+    clock, notifier, dispatcher = make_dispatcher()
+    dispatcher.post("Auto-Mute", "muted", key="schedule")
+    clock.advance(31)
+    assert dispatcher.deliver_due() == 0 and dispatcher.dropped == 1
+
+    dispatcher.post("Auto-Mute", "muted", key="schedule")
+    clock.advance(1)
+    dispatcher.deliver_due()
+    dispatcher.post("Auto-Mute", "muted", key="schedule")
+    clock.advance(10)
+    assert dispatcher.deliver_due() == 0 and dispatcher.dropped == 2
+    # Once repeat_interval has passed the same text is shown again
+    dispatcher.post("Auto-Mute", "muted", key="schedule")
+    clock.advance(25)
+    assert dispatcher.deliver_due() == 1
+    assert notifier.delivered == [("Auto-Mute", "muted")] * 2
+
+
+def test_failing_sender_does_not_stop_delivery(capsys):
+    clock = ManualClock()
+    sent = []
+
+    def sender(title, message):
+        if message == "boom":
+            raise OSError("no notification daemon")
+        sent.append(message)
+
+    dispatcher = NotificationDispatcher(sender, min_interval=0.0, clock=clock, background=False)
+    dispatcher.post("Auto-Mute", "boom")
+    dispatcher.post("Auto-Mute", "after")
+    clock.advance(1)
+    assert dispatcher.flush()
+    assert sent == ["after"] and dispatcher.delivered == 1
+    assert "Failed to send notification: no notification daemon" in capsys.readouterr().out
+
+
+def test_worker_never_blocks_the_caller():
+    notifier = FakeNotifier(delay=0.2)
+    dispatcher = NotificationDispatcher(notifier, min_interval=0.0, coalesce_window=0.01)
+    posted = threading.Event()
+
+    def post_many():
+        for index in range(20):
+            dispatcher.post("Auto-Mute", f"toggle {index}", key="toggle")
+        posted.set()
+
+    threading.Thread(target=post_many).start()
+    assert posted.wait(1)  # twenty deliveries would take four seconds
+    assert dispatcher.flush(2)
+    assert 1 <= len(notifier.delivered) < 20
+    assert notifier.delivered[-1] == ("Auto-Mute", "toggle 19")
+    dispatcher.stop()
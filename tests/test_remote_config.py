@@ -0,0 +1,136 @@
+import json
+import os
+import random
+import time
+import urllib.request
+
+import pytest
+
+import remote_config
+from remote_config import ERROR, NOT_MODIFIED, UNCHANGED, UPDATED, RemoteConfigFetcher, ScheduleServer
+
+SCHEDULE = {"Monday": {"start": "22:00", "end": "07:00"}, "settings": {"show_notifications": False}}
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps(SCHEDULE))
+    server = ScheduleServer(str(path))
+    server.start()
+    yield server, path
+    server.stop()
+
+
+@pytest.fixture
+def fetcher(served, tmp_path):
+    server, _path = served
+    updates = []
+    fetcher = RemoteConfigFetcher(server.url, str(tmp_path / "config.remote.json"), interval=10, jitter=0,
+                                  on_update=lambda: updates.append(1), rng=random.Random(1))
+    fetcher.updates = updates
+    return fetcher
+
+
+def signature(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def test_unchanged_etag_gets_304_and_leaves_the_cache_alone(served, fetcher):
+    server, _path = served
+    assert fetcher.fetch() == UPDATED
+    before = signature(fetcher.cache_path)
+    assert fetcher.fetch() == NOT_MODIFIED
+    assert (server.full_responses, server.not_modified) == (1, 1)
+    assert signature(fetcher.cache_path) == before
+    assert fetcher.updates == [1]
+
+
+def test_same_bytes_with_new_validators_are_not_rewritten(served, fetcher):
+    server, _path = served
+    assert fetcher.fetch() == UPDATED
+    etag = fetcher.etag
+    # As if the server had been replaced: the old ETag no longer matches
+    meta = json.loads(open(fetcher.meta_path).read())
+    meta.update(etag='"stale"', last_modified=None)
+    with open(fetcher.meta_path, "w") as f:
+        json.dump(meta, f)
+    before = signature(fetcher.cache_path)
+
+    assert fetcher.fetch() == UNCHANGED
+    assert server.full_responses == 2
+    assert signature(fetcher.cache_path) == before
+    assert fetcher.etag == etag
+    assert fetcher.updates == [1]
+
+
+MALFORMED = [
+    "{not json",
+    "[1, 2]",
+    {"Monday": {"start": "nine", "end": "17:00"}},
+    {"Monday": {"start": "22:00"}},
+    {"Monday": "22:00"},
+    {"Monday": {"start": 22, "end": "07:00"}},
+    {"exceptions": [{"date": "2026-12-24"}]},
+    {"exceptions": 5},
+    {"holidays": ["12-25"]},
+]
+
+
+@pytest.mark.parametrize("body", [entry if isinstance(entry, str) else json.dumps(entry) for entry in MALFORMED])
+def test_invalid_schedule_keeps_the_last_good_copy(served, fetcher, body, capsys):
+    _server, path = served
+    assert fetcher.fetch() == UPDATED
+    before = signature(fetcher.cache_path)
+    path.write_text(body)
+
+    assert fetcher.fetch() == ERROR
+    assert "using the cached copy" in capsys.readouterr().out
+    assert signature(fetcher.cache_path) == before
+    assert remote_config.effective_config({"settings": {}}, fetcher.cache_path)["Monday"] == SCHEDULE["Monday"]
+    assert fetcher.updates == [1]
+
+
+def test_failures_back_off_and_success_resets(served, fetcher, capsys):
+    server, path = served
+    server.path = str(path) + ".missing"  # 404
+    # Doubling from the 10 s interval, each delay jittered over its upper half
+    for base in (10, 20, 40, 80):
+        assert fetcher.fetch() == ERROR
+        assert base / 2 <= fetcher.next_delay() <= base
+    assert fetcher.failures == 4
+
+    server.path = str(path)
+    assert fetcher.fetch() == UPDATED
+    assert fetcher.failures == 0
+    assert fetcher.next_delay() == fetcher.interval
+
+
+@pytest.mark.parametrize("data", [entry for entry in MALFORMED if isinstance(entry, dict)])
+def test_pushed_malformed_schedule_is_rejected(fetcher, data, capsys):
+    # The fleet controller push path calls store() directly
+    assert fetcher.store(json.dumps(data).encode("utf-8"), {"ETag": '"pushed"'}) == ERROR
+    assert "invalid schedule" in capsys.readouterr().out
+    assert not os.path.exists(fetcher.cache_path)
+
+
+def test_poll_thread_survives_an_unexpected_error(served, tmp_path, capsys):
+    server, _path = served
+    calls = []
+
+    def urlopen(request, timeout):
+        calls.append(request)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return urllib.request.urlopen(request, timeout=timeout)
+
+    fetcher = RemoteConfigFetcher(server.url, str(tmp_path / "config.remote.json"), interval=0.01,
+                                  urlopen=urlopen)
+    fetcher.start()
+    deadline = time.monotonic() + 5
+    while not fetcher.stats[UPDATED] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    fetcher.stop()
+    assert fetcher.stats[UPDATED] == 1 and fetcher.stats[ERROR] >= 1
+    assert "unexpected error: RuntimeError('boom')" in capsys.readouterr().out
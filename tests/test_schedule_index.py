@@ -0,0 +1,235 @@
+import datetime
+import itertools
+import time
+
+import pytest
+
+from schedule_index import DAYS, CompiledSchedule, iter_transitions, parse_time
+
+MONDAY = datetime.date(2026, 1, 5)
+
+WEEKLY_SCHEDULES = [
+    {day: {"start": "22:00", "end": "07:00"} for day in DAYS},                      # overnight
+    {day: {"start": "09:00", "end": "17:30"} for day in DAYS[:5]},                  # daytime, weekend free
+    {"Monday": {"start": "12:00", "end": "12:00"}, "Friday": {"start": "00:00", "end": "00:00"}},  # whole day
+    {"Tuesday": {"start": "00:00", "end": "06:15"}, "Sunday": {"start": "23:59", "end": "00:00"}},
+    {"Wednesday": {"start": "18:45", "end": "00:01"}, "Saturday": {"start": "00:01", "end": "23:59"}},
+    {},
+]
+
+
+def baseline_muted(schedule_data, moment):
+    """The pre-index check: one window per weekday, an overnight range wraps within the same day."""
+    weekday = moment.strftime("%A")
+    if weekday not in schedule_data:
+        return False
+    start = parse_time(schedule_data[weekday]["start"])
+    end = parse_time(schedule_data[weekday]["end"])
+    current = moment.hour * 60 + moment.minute
+    if start < end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def every_minute_of_the_week():
+    first = datetime.datetime.combine(MONDAY, datetime.time())
+    return [first + datetime.timedelta(minutes=minute) for minute in range(7 * 24 * 60)]
+
+
+@pytest.mark.parametrize("schedule_data", WEEKLY_SCHEDULES)
+def test_matches_the_baseline_check_every_minute_of_the_week(schedule_data):
+    compiled = CompiledSchedule(schedule_data)
+    for moment in every_minute_of_the_week():
+        assert compiled.is_muted_at(moment) == baseline_muted(schedule_data, moment), moment
+        assert compiled.has_day(moment) == (moment.strftime("%A") in schedule_data)
+
+
+def test_window_boundaries():
+    compiled = CompiledSchedule({"Monday": {"start": "22:00", "end": "07:00"}})
+    monday = datetime.datetime.combine(MONDAY, datetime.time())
+    assert compiled.is_muted_at(monday.replace(hour=6, minute=59, second=59))
+    assert not compiled.is_muted_at(monday.replace(hour=7))   # end is exclusive
+    assert not compiled.is_muted_at(monday.replace(hour=21, minute=59, second=59))
+    assert compiled.is_muted_at(monday.replace(hour=22))      # start is inclusive
+    # The window belongs to Monday: Tuesday morning is not muted
+    assert not compiled.is_muted_at(monday + datetime.timedelta(days=1, hours=3))
+
+
+@pytest.mark.parametrize("schedule_data", WEEKLY_SCHEDULES)
+def test_next_transition_matches_a_minute_by_minute_scan(schedule_data):
+    compiled = CompiledSchedule(schedule_data)
+    minutes = every_minute_of_the_week()
+    states = [compiled.is_muted_at(moment) for moment in minutes]
+    changes = [(minutes[i], states[i]) for i in range(len(minutes)) if states[i] != states[i - 1]]
+    if not changes:
+        assert compiled.next_transition(minutes[0]) is None
+        return
+    for moment in minutes[::37]:
+        upcoming = [change for change in changes if change[0] > moment]
+        expected = upcoming[0] if upcoming else (changes[0][0] + datetime.timedelta(days=7), changes[0][1])
+        assert compiled.next_transition(moment) == expected, moment
+
+
+OVERRIDES = {
+    "Monday": {"start": "22:00", "end": "07:00"},
+    "Thursday": [{"start": "12:00", "end": "13:00"}, {"start": "22:00", "end": "07:00"}],
+    "exceptions": [
+        {"date": "2026-12-24", "windows": [{"start": "18:00", "end": "07:00"}]},
+        {"date": "2026-08-03", "until": "2026-08-14", "muted": False},
+        {"date": "2026-12-25", "windows": [{"start": "10:00", "end": "11:00"}]},
+    ],
+    "holidays": [{"date": "12-25", "muted": True}, {"date": "07-04", "muted": True}],
+}
+
+
+def at(date, hour=0, minute=0):
+    return datetime.datetime(date.year, date.month, date.day, hour, minute)
+
+
+def test_exception_replaces_the_weekday_windows():
+    compiled = CompiledSchedule(OVERRIDES)
+    christmas_eve = datetime.date(2026, 12, 24)  # a Thursday
+    assert compiled.is_muted_at(at(christmas_eve, 6, 59))
+    assert not compiled.is_muted_at(at(christmas_eve, 12, 30))  # Thursday's lunch window is gone
+    assert compiled.is_muted_at(at(christmas_eve, 18))
+    # Neighbouring Thursdays keep their windows
+    assert compiled.is_muted_at(at(christmas_eve + datetime.timedelta(days=7), 12, 30))
+
+
+def test_until_range_covers_every_day_inclusive():
+    compiled = CompiledSchedule(OVERRIDES)
+    first, last = datetime.date(2026, 8, 3), datetime.date(2026, 8, 14)
+    for offset in range((last - first).days + 1):
+        day = first + datetime.timedelta(days=offset)
+        assert compiled.has_day(at(day))
+        assert not any(compiled.is_muted_at(at(day, hour)) for hour in range(24)), day
+    # Mondays on either side are muted again at 23:00
+    assert compiled.is_muted_at(at(datetime.date(2026, 7, 27), 23))
+    assert compiled.is_muted_at(at(datetime.date(2026, 8, 17), 23))
+
+
+def test_holidays_recur_every_year_and_lose_to_exceptions():
+    compiled = CompiledSchedule(OVERRIDES)
+    for year in (2026, 2027, 2030):
+        independence_day = datetime.date(year, 7, 4)
+        assert compiled.has_day(at(independence_day))
+        assert all(compiled.is_muted_at(at(independence_day, hour)) for hour in range(24))
+    # 2026-12-25 has its own exception, other years use the holiday
+    assert not compiled.is_muted_at(at(datetime.date(2026, 12, 25), 9))
+    assert compiled.is_muted_at(at(datetime.date(2026, 12, 25), 10, 30))
+    assert compiled.is_muted_at(at(datetime.date(2027, 12, 25), 9))
+    assert [day.isoformat() for day in compiled.override_dates(datetime.date(2026, 12, 1), datetime.date(2027, 7, 31))] \
+        == ["2026-12-24", "2026-12-25", "2027-07-04"]
+
+
+def test_overlapping_windows_merge():
+    compiled = CompiledSchedule({"Monday": [
+        {"start": "09:00", "end": "11:00"},
+        {"start": "10:00", "end": "12:00"},
+        {"start": "12:00", "end": "12:30"},   # touching: merged as well
+        {"start": "23:00", "end": "01:00"},   # wraps onto the morning of the same day
+        {"start": "00:30", "end": "02:00"},
+    ]})
+    assert compiled.is_muted_at(at(MONDAY))
+    changes = []
+    moment = at(MONDAY)
+    for _ in range(5):
+        moment, muted = compiled.next_transition(moment)
+        changes.append((moment.strftime("%a %H:%M"), muted))
+    assert changes == [("Mon 02:00", False), ("Mon 09:00", True), ("Mon 12:30", False),
+                       ("Mon 23:00", True), ("Tue 00:00", False)]
+
+
+def test_override_dates_walk_leap_day_holidays():
+    compiled = CompiledSchedule({"holidays": [{"date": "02-29", "muted": True}]})
+    assert list(compiled.override_dates(datetime.date(2026, 1, 1), datetime.date(2029, 1, 1))) \
+        == [datetime.date(2028, 2, 29)]
+
+
+@pytest.mark.parametrize("schedule_data, message", [
+    ({"exceptions": [{"date": "2026-12-24"}]}, "needs \"windows\" or \"muted\""),
+    ({"exceptions": [{"date": "24.12.2026", "muted": True}]}, "expected YYYY-MM-DD"),
+    ({"exceptions": [{"date": "2026-08-03", "until": "soon", "muted": True}]}, "expected YYYY-MM-DD"),
+    ({"holidays": [{"date": "02-30", "muted": True}]}, "expected MM-DD"),
+    ({"holidays": [{"date": "Christmas", "muted": True}]}, "expected MM-DD"),
+    ({"Monday": {"start": "7am", "end": "09:00"}}, "expected HH:MM"),
+    ({"Monday": {"start": "24:01", "end": "09:00"}}, "expected HH:MM"),
+])
+def test_invalid_overrides_raise_value_error(schedule_data, message):
+    with pytest.raises(ValueError, match=message):
+        CompiledSchedule(schedule_data)
+
+UTC = datetime.timezone.utc
+
+# Sunday windows around 2 a.m., where both 2026 US clock changes happen
+SUNDAY = CompiledSchedule({"Sunday": [{"start": "01:15", "end": "01:45"}, {"start": "02:30", "end": "03:30"}]})
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Run with the system time zone set to America/New_York."""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset() is not available on this platform")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def upcoming(schedule, start, count, tz=None):
+    return [(at.astimezone(UTC).strftime("%m-%d %H:%M"), at.utcoffset().total_seconds() / 3600, muted)
+            for at, muted in itertools.islice(iter_transitions(schedule, start, tz), count)]
+
+
+def test_spring_forward_gap(new_york):
+    # 2026-03-08 02:00 EST jumps to 03:00 EDT: the 02:30 start lands when the gap ends
+    assert upcoming(SUNDAY, datetime.datetime(2026, 3, 7, 12), 4) == [
+        ("03-08 06:15", -5, True),
+        ("03-08 06:45", -5, False),
+        ("03-08 07:00", -4, True),   # 03:00 EDT, not an hour late and not dropped
+        ("03-08 07:30", -4, False),  # 03:30 EDT
+    ]
+
+
+def test_window_ending_inside_the_gap(new_york):
+    schedule = CompiledSchedule({"Sunday": {"start": "01:00", "end": "02:30"}})
+    assert upcoming(schedule, datetime.datetime(2026, 3, 7, 12), 2) == [
+        ("03-08 06:00", -5, True),
+        ("03-08 07:00", -4, False),  # 02:30 never happens; unmuted when the clock reaches 03:00
+    ]
+
+
+def test_fall_back_fold_repeats_the_window(new_york):
+    # 2026-11-01 02:00 EDT falls back to 01:00 EST: 01:15-01:45 happens twice
+    assert upcoming(SUNDAY, datetime.datetime(2026, 10, 31, 12), 6) == [
+        ("11-01 05:15", -4, True),
+        ("11-01 05:45", -4, False),
+        ("11-01 06:15", -5, True),
+        ("11-01 06:45", -5, False),
+        ("11-01 07:30", -5, True),
+        ("11-01 08:30", -5, False),
+    ]
+
+
+def test_weeks_without_a_change_keep_the_offset(new_york):
+    assert upcoming(SUNDAY, datetime.datetime(2026, 3, 9), 2) == [
+        ("03-15 05:15", -4, True),
+        ("03-15 05:45", -4, False),
+    ]
+
+
+def test_explicit_zone_overrides_the_system_zone():
+    zoneinfo = pytest.importorskip("zoneinfo")
+    try:
+        berlin = zoneinfo.ZoneInfo("Europe/Berlin")
+    except zoneinfo.ZoneInfoNotFoundError:
+        pytest.skip("no time zone database")
+    # Europe changes on 2026-03-29 at 02:00 CET -> 03:00 CEST
+    start = datetime.datetime(2026, 3, 28, 12, tzinfo=berlin)
+    assert upcoming(SUNDAY, start, 4, tz=berlin) == [
+        ("03-29 00:15", 1, True),
+        ("03-29 00:45", 1, False),
+        ("03-29 01:00", 2, True),
+        ("03-29 01:30", 2, False),
+    ]
@@ -0,0 +1,37 @@
+import auto_mute_core as core
+from session_index import AppRules, FakeSessionProvider, SessionIndex
+
+
+def test_index_follows_sessions_appearing_and_disappearing():
+    provider = FakeSessionProvider([f"app{number}.exe" for number in range(300)] + ["chrome.exe", "Teams.exe"])
+    index = SessionIndex()
+    removed = []
+    index.on_removed = removed.append
+    provider.start(index)
+    rules = AppRules({"mute": ["chrome.exe", "*.exe"], "keep": ["teams.exe"]})
+    assert len(index.matching(rules)) == 301
+
+    chrome = next(session_id for session_id, name in provider._names.items() if name == "chrome.exe")
+    provider.close(chrome)
+    provider.close(chrome)  # a second expiry notification is harmless
+    assert removed == [chrome]
+    assert len(index) == 301 and len(index.matching(rules)) == 300
+    assert "chrome.exe" not in index.process_names()
+
+
+def test_expired_sessions_are_forgotten_by_the_core():
+    provider = FakeSessionProvider(["chrome.exe", "spotify.exe"])
+    saved = (core.session_provider, core.session_index)
+    core.set_session_provider(provider)
+    try:
+        rules = AppRules({"mute": ["chrome.exe", "spotify.exe"]})
+        core.set_app_sessions_mute(rules, True)
+        assert core._sessions_muted_by_us == set(provider.sessions)
+
+        for session_id in list(provider.sessions):
+            provider.close(session_id)
+        assert core._sessions_muted_by_us == set()
+        assert core.app_sessions_in_state(rules, False)
+    finally:
+        core._sessions_muted_by_us.clear()
+        core.session_provider, core.session_index = saved
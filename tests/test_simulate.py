@@ -0,0 +1,65 @@
+import datetime
+import time
+
+import pytest
+
+import auto_mute_core as core
+import simulate
+from schedule_index import CompiledSchedule
+
+START = datetime.date(2027, 1, 4)  # a Monday
+CONFIG = {
+    **{day: {"start": "22:00", "end": "07:00"} for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]},
+    "exceptions": [{"date": "2027-01-13", "muted": False}],
+}
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    """Run with the system time zone set to UTC, so the period has no DST change."""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset() is not available on this platform")
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_report_and_core_replay():
+    saved = (core.config_cache, core.audio_backend, core.state.enabled)
+    report = simulate.simulate(CONFIG, START, 14, replay_core=True)
+    assert (core.config_cache, core.audio_backend, core.state.enabled) == saved
+
+    # Nine hours on each of the ten weekdays, less the Wednesday exception
+    assert report["muted_hours"] == report["wall_clock"]["muted_minutes"] / 60 == 81
+    assert report["wall_clock"]["muted_hours_by_weekday"]["Wednesday"] == 9
+    assert report["wall_clock"]["muted_hours_by_weekday"]["Saturday"] == 0
+    assert (report["mutes"], report["unmutes"]) == (11, 12)
+    assert report["anomalies"] == []
+
+    replay = report["replay"]
+    assert replay["wrong_state_checks"] == 0 and replay["clock_jumps"] == 0
+    # Every transition plus the mute at the start of the period
+    assert replay["mute_changes"] == report["transitions"] + 1
+
+
+def test_numpy_and_bytes_grids_agree():
+    numpy = pytest.importorskip("numpy")
+    compiled = CompiledSchedule(CONFIG)
+    fast = simulate.minute_grid(compiled, START, 30)
+    slow = simulate.minute_grid(compiled, START, 30, use_numpy=False)
+    assert isinstance(fast, numpy.ndarray) and isinstance(slow, bytes)
+    assert fast.tobytes() == slow
+    assert simulate.grid_summary(fast, START, 30) == simulate.grid_summary(slow, START, 30)
+
+    with_numpy = simulate.simulate(CONFIG, START, 30, replay_core=False)
+    without = simulate.simulate(CONFIG, START, 30, use_numpy=False, replay_core=False)
+    assert (with_numpy["grid_backend"], without["grid_backend"]) == ("numpy", "bytes")
+    assert with_numpy["wall_clock"] == without["wall_clock"]
+    assert "replay" not in without
+
+
+def test_whole_day_window_is_reported():
+    report = simulate.simulate({"Saturday": {"start": "08:00", "end": "08:00"}}, START, 7, replay_core=False)
+    assert [anomaly["where"] for anomaly in report["anomalies"] if anomaly["kind"] == "zero_length_window"] == ["Saturday"]
@@ -0,0 +1,102 @@
+import os
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+from supervisor import Supervisor
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(code):
+    return [sys.executable, "-c", code]
+
+
+def run_until(supervisor, condition, timeout=15.0):
+    """Run the supervisor in a thread until condition() holds, then stop it."""
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline and thread.is_alive():
+        time.sleep(0.01)
+    met = condition()
+    supervisor.stop()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    return met
+
+
+def restart_delays(log_file):
+    if not os.path.exists(log_file):
+        return []
+    with open(log_file, encoding="utf-8") as f:
+        return [float(delay) for delay in re.findall(r"Restarting in ([\d.]+)s", f.read())]
+
+
+@pytest.fixture
+def make_supervisor(tmp_path):
+    def make(command, **options):
+        options.setdefault("heartbeat_file", None)
+        options.setdefault("check_interval", 0.05)
+        return Supervisor(command, log_file=str(tmp_path / "watchdog.log"), **options)
+    return make
+
+
+def test_crashing_child_is_restarted_with_exponential_backoff(make_supervisor):
+    supervisor = make_supervisor(child("raise SystemExit(3)"), backoff_initial=0.1, backoff_max=0.4,
+                                 crash_limit=100)
+    assert run_until(supervisor, lambda: supervisor.restarts >= 4)
+    assert supervisor.last_reason == "exited with code 3"
+    assert restart_delays(supervisor.log_file)[:4] == [0.1, 0.2, 0.4, 0.4]
+
+
+def test_crash_loop_pauses_restarts(make_supervisor):
+    supervisor = make_supervisor(child("raise SystemExit(1)"), backoff_initial=0.1, crash_limit=3,
+                                 crash_window=60, crash_pause=30)
+    assert run_until(supervisor, lambda: 30.0 in restart_delays(supervisor.log_file))
+    # Two quick restarts, then the third exit trips the crash-loop pause
+    assert supervisor.restarts == 2
+    assert restart_delays(supervisor.log_file) == [0.1, 0.2, 30.0]
+    with open(supervisor.log_file, encoding="utf-8") as f:
+        assert "Crash loop detected (3 exits" in f.read()
+
+
+def test_hung_child_without_heartbeat_is_killed_and_restarted(make_supervisor, tmp_path):
+    heartbeat = str(tmp_path / "heartbeat.json")
+    # Beats once, promising to wake within 0.1 s, then hangs
+    code = (f"import sys, time; sys.path.insert(0, {REPO!r}); from supervisor import HeartbeatWriter; "
+            "HeartbeatWriter.from_environment().beat(0.1); time.sleep(60)")
+    supervisor = make_supervisor(child(code), heartbeat_file=heartbeat, heartbeat_grace=0.3,
+                                 startup_grace=1.0, backoff_initial=30)
+    processes = []
+    original_start = supervisor._start_child
+
+    def start_child():
+        started = original_start()
+        processes.append(supervisor.process)
+        return started
+
+    supervisor._start_child = start_child
+    assert run_until(supervisor, lambda: restart_delays(supervisor.log_file))
+    assert re.fullmatch(r"heartbeat overdue by \d+s \(loop hung\)", supervisor.last_reason)
+    assert processes[0].poll() is not None  # terminated, not left running
+
+
+def test_child_that_never_beats_is_restarted(make_supervisor, tmp_path):
+    supervisor = make_supervisor(child("import time; time.sleep(60)"), heartbeat_file=str(tmp_path / "hb.json"),
+                                 startup_grace=0.3, backoff_initial=30)
+    assert run_until(supervisor, lambda: restart_delays(supervisor.log_file))
+    assert supervisor.last_reason == "no heartbeat within 0s of start"
+
+
+def test_clean_exit_is_not_restarted(make_supervisor):
+    supervisor = make_supervisor(child("raise SystemExit(0)"), backoff_initial=0.01)
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert supervisor.restarts == 0 and supervisor.last_reason == "exited normally"
+    assert restart_delays(supervisor.log_file) == []
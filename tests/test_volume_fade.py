@@ -0,0 +1,50 @@
+import threading
+
+from audio_backend import FakeAudioBackend
+from volume_fade import VolumeFader
+
+
+def make_fader(level=0.6):
+    backend = FakeAudioBackend()
+    backend.volume = level
+    return backend, VolumeFader(backend, steps_per_second=100)
+
+
+def test_fade_out_mutes_and_restores_level():
+    backend, fader = make_fader()
+    fader.fade_out(0.2)
+    assert fader.wait(2)
+    assert backend.get_mute() and backend.volume == 0.6
+    assert [result.direction for result in fader.results] == ["out"]
+
+
+def test_repeated_fade_out_requests_do_not_lose_the_level():
+    backend, fader = make_fader()
+    # Checks racing the worker: only the first request may start a ramp
+    threads = [threading.Thread(target=fader.fade_out, args=(0.2,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fader.direction == "out"
+    assert fader.wait(2)
+    assert len(fader.results) == 1 and fader.last_result.original_level == 0.6
+    assert backend.get_mute() and backend.volume == 0.6
+
+
+def test_cancel_restores_level_and_goes_idle():
+    backend, fader = make_fader()
+    fader.fade_out(5.0)
+    fader.cancel()
+    assert fader.direction is None
+    assert fader.wait(2)
+    assert not backend.get_mute() and backend.volume == 0.6
+
+
+def test_fade_in_replaces_fade_out():
+    backend, fader = make_fader()
+    fader.fade_out(5.0)
+    fader.fade_in(0.2)
+    assert fader.direction == "in"
+    assert fader.wait(2)
+    assert not backend.get_mute() and backend.volume == 0.6
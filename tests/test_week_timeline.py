@@ -0,0 +1,73 @@
+from schedule_index import CompiledSchedule
+from week_timeline import (ERROR_COLOR, MUTED_COLOR, RecordingCanvas, WeekTimeline, day_segments,
+                           merge_to_pixels, week_segments)
+
+SCHEDULE = {
+    "Monday": {"start": "22:00", "end": "07:00"},
+    "Wednesday": [{"start": "09:00", "end": "12:00"}, {"start": "13:00", "end": "17:30"}],
+    "Saturday": {"start": "00:00", "end": "00:00"},
+}
+
+
+def muted_rectangles(canvas):
+    return sorted(coords for kind, coords, options in canvas.items.values()
+                  if kind == "rectangle" and options["fill"] == MUTED_COLOR)
+
+
+def test_segments_follow_the_compiled_bitmap():
+    compiled = CompiledSchedule(SCHEDULE)
+    assert day_segments(compiled.bitmap, 0) == [(0, 420), (1320, 1440)]
+    assert day_segments(compiled.bitmap, 2) == [(540, 720), (780, 1050)]
+    assert day_segments(compiled.bitmap, 5) == [(0, 1440)]
+    segments = week_segments(compiled)
+    assert len(segments) == 7 and segments[1] == segments[3] == segments[6] == []
+
+
+def test_render_day_draws_the_segments():
+    canvas = RecordingCanvas()
+    # 1,440 minutes over 720 pixels: two minutes per pixel
+    timeline = WeekTimeline(canvas, width=760, label_width=40)
+    assert timeline.render_day(2, week_segments(CompiledSchedule(SCHEDULE))[2])
+    top = timeline.row_top(2)
+    bottom = top + timeline.row_height
+    assert muted_rectangles(canvas) == [(310, top, 400, bottom), (430, top, 565, bottom)]
+    # The muted bars sit on one background bar
+    assert len(canvas.items) == 3 and timeline.items_created == 3
+
+
+def test_unchanged_day_draws_nothing():
+    canvas = RecordingCanvas()
+    timeline = WeekTimeline(canvas, width=760)
+    segments = week_segments(CompiledSchedule(SCHEDULE))
+    for day_index, day in enumerate(segments):
+        timeline.render_day(day_index, day)
+    items, created = dict(canvas.items), timeline.items_created
+
+    assert not any(timeline.render_day(day_index, list(day)) for day_index, day in enumerate(segments))
+    assert canvas.items == items and timeline.items_created == created and canvas.deleted == 0
+    assert timeline.rows_drawn == 7
+
+    # Only the changed row is replaced
+    assert timeline.render_day(0, [(0, 420)])
+    assert canvas.deleted == 3 and timeline.rows_drawn == 8
+    assert len(canvas.items) == len(items) - 1
+
+
+def test_error_row_has_no_segments():
+    canvas = RecordingCanvas()
+    timeline = WeekTimeline(canvas, width=760)
+    timeline.render_day(0, [(0, 420)])
+    assert timeline.render_day(0, [(0, 420)], error=True)
+    fills = [options["fill"] for kind, coords, options in canvas.items.values()]
+    assert fills == [ERROR_COLOR]
+
+
+def test_close_segments_merge_into_one_pixel_run():
+    windows = [(minute, minute + 1) for minute in range(0, 60, 2)]
+    assert merge_to_pixels(windows, minutes_per_pixel=4) == [(0, 59)]
+    assert merge_to_pixels(windows, minutes_per_pixel=1) == windows
+
+    canvas = RecordingCanvas()
+    timeline = WeekTimeline(canvas, width=400)
+    timeline.render_day(0, windows)
+    assert len(muted_rectangles(canvas)) == 1
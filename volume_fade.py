@@ -0,0 +1,322 @@
+"""
+Auto Mute - Volume Fade
+
+Fades the default device's master volume instead of flipping a hard mute at
+a schedule boundary: the level ramps down over the last seconds before a
+mute window starts (then the device is muted), and ramps back up from
+silence after it ends.
+
+The user's level is never lost. A fade-out reads it once, ramps to silence,
+mutes, and writes the original level back while muted; a fade-in starts
+from silence, unmutes and ramps up to that same level. A cancelled ramp
+(pause, shutdown, or a new fade replacing it) restores the level at once.
+
+Ramps run on one long-lived worker thread, so every step goes through that
+thread's single cached endpoint handle (one activation for the life of the
+daemon with PycawBackend). Steps are scheduled against absolute
+perf_counter deadlines by PrecisionTimer, which sleeps until just before a
+deadline and spins the rest, so timing errors do not accumulate; a ramp
+that falls behind skips steps instead of stretching. Steps that would not
+change the level (after rounding to LEVEL_QUANTUM) are not sent.
+
+Every ramp returns a RampResult with its backend call count and the
+lateness of each step, so jitter can be measured against FakeAudioBackend.
+
+Usage:
+    fader = VolumeFader(backend, curve="ease")
+    fader.fade_out(8.0)   # returns at once; muted 8 s later
+    fader.fade_in(8.0)
+    fader.wait()
+    fader.last_result.lateness
+"""
+
+import collections
+import math
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Progress shapes: map elapsed fraction 0..1 to level fraction 0..1
+CURVES: Dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    # Slow start and end, no audible "step" at either side
+    "ease": lambda t: 0.5 - 0.5 * math.cos(math.pi * t),
+    # Most of the change happens late (fade-out) / early (fade-in) in level terms
+    "exponential": lambda t: (2 ** (10 * t) - 1) / 1023,
+}
+DEFAULT_CURVE = "ease"
+DEFAULT_STEPS_PER_SECOND = 30
+DEFAULT_SPIN_SECONDS = 0.002
+LEVEL_QUANTUM = 0.005
+# Below this level there is nothing to fade
+MIN_FADE_LEVEL = 0.01
+
+
+class RampResult(NamedTuple):
+    """Outcome of one fade."""
+    direction: str
+    duration: float
+    steps: int
+    backend_calls: int
+    skipped_steps: int
+    lateness: List[float]
+    cancelled: bool
+    original_level: Optional[float]
+    error: Optional[str] = None
+
+    @property
+    def max_lateness(self) -> float:
+        return max(self.lateness, default=0.0)
+
+
+class PrecisionTimer:
+    """
+    Sleeps until absolute perf_counter deadlines with sub-millisecond error.
+
+    Coarse sleeping is done with an interruptible Event wait up to
+    spin_seconds before the deadline, the rest by spinning. On Windows the
+    system timer resolution is raised to 1 ms while the timer is in use.
+    """
+
+    def __init__(self, spin_seconds: float = DEFAULT_SPIN_SECONDS, clock: Callable[[], float] = time.perf_counter):
+        self.spin_seconds = spin_seconds
+        self.clock = clock
+        self._winmm = None
+
+    def __enter__(self):
+        if sys.platform == "win32":
+            try:
+                import ctypes
+                self._winmm = ctypes.WinDLL("winmm")
+                self._winmm.timeBeginPeriod(1)
+            except (OSError, AttributeError):
+                self._winmm = None
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._winmm is not None:
+            self._winmm.timeEndPeriod(1)
+            self._winmm = None
+
+    def sleep_until(self, deadline: float, cancel: Optional[threading.Event] = None) -> Optional[float]:
+        """
+        Block until deadline.
+
+        Returns:
+            Seconds late (>= 0), or None if cancel was set first
+        """
+        clock = self.clock
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return -remaining
+            if remaining > self.spin_seconds:
+                if cancel is not None:
+                    if cancel.wait(remaining - self.spin_seconds):
+                        return None
+                else:
+                    time.sleep(remaining - self.spin_seconds)
+            elif cancel is not None and cancel.is_set():
+                return None
+
+
+def ramp(set_level: Callable[[float], None], start: float, end: float, duration: float,
+         curve: Callable[[float], float] = CURVES[DEFAULT_CURVE], steps_per_second: float = DEFAULT_STEPS_PER_SECOND,
+         timer: Optional[PrecisionTimer] = None, cancel: Optional[threading.Event] = None):
+    """
+    Move a level from start to end over duration seconds.
+
+    Returns:
+        (calls, steps, skipped_steps, lateness, cancelled)
+    """
+    timer = timer or PrecisionTimer()
+    steps = max(1, int(round(duration * steps_per_second)))
+    began = timer.clock()
+    last_sent = round(start / LEVEL_QUANTUM)
+    calls = skipped = 0
+    lateness = []
+    step = 1
+    while step <= steps:
+        late = timer.sleep_until(began + duration * step / steps, cancel)
+        if late is None:
+            return calls, len(lateness), skipped, lateness, True
+        lateness.append(late)
+        # Behind by more than a step (slow device, busy machine): catch up, don't stretch
+        behind = int(late * steps / duration) if duration > 0 else 0
+        if behind:
+            skipped += min(behind, steps - step)
+            step = min(steps, step + behind)
+        level = start + (end - start) * curve(step / steps)
+        quantized = round(level / LEVEL_QUANTUM)
+        if quantized != last_sent or step == steps:
+            set_level(end if step == steps else quantized * LEVEL_QUANTUM)
+            last_sent = quantized
+            calls += 1
+        step += 1
+    return calls, len(lateness), skipped, lateness, False
+
+
+class VolumeFader:
+    """
+    Runs fade-outs and fade-ins on one worker thread.
+
+    Attributes:
+        results: Recent RampResults, newest last
+        last_result: The most recent RampResult, or None
+        direction: "out" or "in" from the moment a fade is requested until
+            it ends, else None
+    """
+
+    def __init__(self, backend, curve: str = DEFAULT_CURVE, steps_per_second: float = DEFAULT_STEPS_PER_SECOND,
+                 timer: Optional[PrecisionTimer] = None):
+        """
+        Initialize the fader.
+
+        Args:
+            backend: AudioBackend with get/set_volume and set_mute
+            curve: Name in CURVES
+            steps_per_second: Level updates per second of ramp
+            timer: PrecisionTimer (default: 2 ms spin)
+        """
+        self.backend = backend
+        self.curve = curve
+        self.steps_per_second = steps_per_second
+        self.timer = timer or PrecisionTimer()
+        self.results = collections.deque(maxlen=64)
+        self.direction: Optional[str] = None
+
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._cancel = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def last_result(self) -> Optional[RampResult]:
+        return self.results[-1] if self.results else None
+
+    @property
+    def active(self) -> bool:
+        return not self._idle.is_set()
+
+    def fade_out(self, duration: float):
+        """Ramp to silence over duration seconds, then mute (asynchronous)."""
+        self._submit("out", duration)
+
+    def fade_in(self, duration: float):
+        """Unmute at silence and ramp up to the user's level (asynchronous)."""
+        self._submit("in", duration)
+
+    def cancel(self):
+        """Stop the running fade (its level is restored) and drop queued ones."""
+        with self._lock:
+            while True:
+                try:
+                    self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+            self._cancel.set()
+            self.direction = None
+            if not self._running:
+                self._idle.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no fade is running; returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def _submit(self, direction: str, duration: float):
+        with self._lock:
+            if self.direction == direction:
+                # Already queued or running: a second ramp would start from the
+                # lowered level and take it for the user's
+                return
+            self.direction = direction
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="volume-fade", daemon=True)
+                self._thread.start()
+            # A newer fade replaces whatever is running or queued
+            while True:
+                try:
+                    self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+            self._cancel.set()
+            self._idle.clear()
+            self._jobs.put((direction, max(0.0, duration)))
+
+    def _run(self):
+        # The worker's own COM apartment and cached endpoint handle
+        self.backend._worker_init()
+        while True:
+            direction, duration = self._jobs.get()
+            with self._lock:
+                if not self._jobs.empty() or self.direction != direction:
+                    # Replaced or cancelled before it started
+                    if self._jobs.empty():
+                        self._idle.set()
+                    continue
+                self._cancel.clear()
+                self._running = True
+            try:
+                with self.timer:
+                    result = self._fade(direction, duration)
+            except Exception as e:
+                result = RampResult(direction, duration, 0, 0, 0, [], False, None, str(e))
+                print(f"[WARNING] Volume fade failed: {e}")
+            self.results.append(result)
+            with self._lock:
+                self._running = False
+                if self._jobs.empty():
+                    self.direction = None
+                    self._idle.set()
+
+    def _fade(self, direction: str, duration: float) -> RampResult:
+        backend = self.backend
+        curve = CURVES.get(self.curve, CURVES[DEFAULT_CURVE])
+        original = backend.get_volume()
+        calls = 1
+
+        if original < MIN_FADE_LEVEL or duration <= 0:
+            backend.set_mute(direction == "out")
+            return RampResult(direction, duration, 0, calls + 1, 0, [], False, original)
+
+        if direction == "out":
+            sent, steps, skipped, lateness, cancelled = ramp(
+                backend.set_volume, original, 0.0, duration, curve, self.steps_per_second, self.timer, self._cancel)
+            if not cancelled:
+                backend.set_mute(True)
+                calls += 1
+        else:
+            backend.set_volume(0.0)
+            backend.set_mute(False)
+            calls += 2
+            sent, steps, skipped, lateness, cancelled = ramp(
+                backend.set_volume, 0.0, original, duration, curve, self.steps_per_second, self.timer, self._cancel)
+        calls += sent
+        if direction == "out" or cancelled:
+            # Back to the user's level (inaudible now if the fade-out muted)
+            backend.set_volume(original)
+            calls += 1
+        return RampResult(direction, duration, steps, calls, skipped, lateness, cancelled, original)
+
+    def stats(self) -> dict:
+        """Summary of recent fades: backend calls, skipped steps and step lateness."""
+        results = list(self.results)
+        lateness = sorted(late for result in results for late in result.lateness)
+
+        def pick(fraction):
+            return lateness[min(len(lateness) - 1, int(fraction * len(lateness)))] * 1e6 if lateness else None
+
+        return {
+            "fades": len(results),
+            "cancelled": sum(result.cancelled for result in results),
+            "backend_calls_per_fade": sum(r.backend_calls for r in results) / len(results) if results else None,
+            "skipped_steps": sum(result.skipped_steps for result in results),
+            "lateness_p50_us": pick(0.5),
+            "lateness_p99_us": pick(0.99),
+            "lateness_max_us": lateness[-1] * 1e6 if lateness else None,
+        }
@@ -0,0 +1,197 @@
+"""
+Auto Mute - Week Timeline
+
+Draws the weekly mute schedule as seven horizontal bars (one per day,
+midnight to midnight) for config_gui.py.
+
+The rows are taken from the compiled schedule's week bitmap, the same table
+the daemon checks, so the preview cannot disagree with what will be
+enforced. Drawing is incremental: each row remembers what it last drew and
+is only redrawn when its segments (or its error state) change, and segments
+closer together than a pixel are merged, so a day with hundreds of windows
+still costs a handful of canvas items.
+
+The renderer only needs create_rectangle / create_line / create_text /
+delete, so it can be driven by RecordingCanvas to check the drawing logic
+without a display.
+
+Usage:
+    from week_timeline import WeekTimeline, week_segments
+
+    timeline = WeekTimeline(canvas, width=560)
+    timeline.draw_grid()
+    for day_index, segments in enumerate(week_segments(compiled)):
+        timeline.render_day(day_index, segments)
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from schedule_index import DAYS, MINUTES_PER_DAY
+
+MUTED_COLOR = "#e74c3c"
+UNMUTED_COLOR = "#ecf0f1"
+ERROR_COLOR = "#f5b7b1"
+GRID_COLOR = "#bdc3c7"
+TEXT_COLOR = "#555"
+
+
+def day_segments(bitmap, day_index: int) -> List[Tuple[int, int]]:
+    """
+    Muted [start, end) minute ranges of one weekday in a week bitmap.
+
+    Args:
+        bitmap: CompiledSchedule.bitmap (one byte per minute of the week)
+        day_index: 0 = Monday
+    """
+    row = bytes(bitmap[day_index * MINUTES_PER_DAY:(day_index + 1) * MINUTES_PER_DAY])
+    segments = []
+    position = row.find(1)
+    while position >= 0:
+        end = row.find(0, position)
+        if end < 0:
+            end = MINUTES_PER_DAY
+        segments.append((position, end))
+        position = row.find(1, end)
+    return segments
+
+
+def week_segments(compiled) -> List[List[Tuple[int, int]]]:
+    """Muted minute ranges for Monday..Sunday of a CompiledSchedule."""
+    return [day_segments(compiled.bitmap, day_index) for day_index in range(len(DAYS))]
+
+
+def merge_to_pixels(segments: Sequence[Tuple[int, int]], minutes_per_pixel: float) -> List[Tuple[int, int]]:
+    """Join segments separated by less than a pixel, so each drawn rectangle is visible."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in segments:
+        if merged and start - merged[-1][1] < minutes_per_pixel:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class WeekTimeline:
+    """
+    Incremental renderer for the seven day rows.
+
+    Attributes:
+        rows_drawn: Number of row redraws so far
+        items_created: Canvas items created so far
+    """
+
+    def __init__(self, canvas, width: int, label_width: int = 40, row_height: int = 16,
+                 row_gap: int = 4, top: int = 16):
+        """
+        Initialize the renderer.
+
+        Args:
+            canvas: tkinter Canvas (or RecordingCanvas)
+            width: Total width in pixels
+            label_width: Space for the day names on the left
+            row_height: Height of one day's bar
+            row_gap: Space between bars
+            top: Space for the hour labels above the first bar
+        """
+        self.canvas = canvas
+        self.width = width
+        self.label_width = label_width
+        self.row_height = row_height
+        self.row_gap = row_gap
+        self.top = top
+        self.rows_drawn = 0
+        self.items_created = 0
+
+        self._row_items: List[List[int]] = [[] for _ in DAYS]
+        self._row_signatures: List[Optional[tuple]] = [None for _ in DAYS]
+
+    @property
+    def height(self) -> int:
+        return self.top + len(DAYS) * (self.row_height + self.row_gap)
+
+    @property
+    def minutes_per_pixel(self) -> float:
+        return MINUTES_PER_DAY / (self.width - self.label_width)
+
+    def x(self, minute: int) -> float:
+        """Canvas x coordinate of a minute of the day."""
+        return self.label_width + minute / self.minutes_per_pixel
+
+    def row_top(self, day_index: int) -> int:
+        return self.top + day_index * (self.row_height + self.row_gap)
+
+    def _create(self, kind: str, *args, **kwargs) -> int:
+        self.items_created += 1
+        return getattr(self.canvas, f"create_{kind}")(*args, **kwargs)
+
+    def draw_grid(self):
+        """Draw the day names and hour lines (once)."""
+        bottom = self.height - self.row_gap
+        for hour in range(0, 25, 3):
+            x = self.x(hour * 60)
+            self._create("line", x, self.top - 2, x, bottom, fill=GRID_COLOR)
+            self._create("text", x, self.top - 8, text=f"{hour:02d}", fill=TEXT_COLOR, font=("Segoe UI", 7))
+        for day_index, day in enumerate(DAYS):
+            self._create("text", 4, self.row_top(day_index) + self.row_height / 2, text=day[:3],
+                         anchor="w", fill=TEXT_COLOR, font=("Segoe UI", 8))
+
+    def render_day(self, day_index: int, segments: Sequence[Tuple[int, int]], error: bool = False) -> bool:
+        """
+        Draw one day's row if it changed since it was last drawn.
+
+        Args:
+            day_index: 0 = Monday
+            segments: Muted [start, end) minute ranges
+            error: Draw the row as invalid (the entered times do not parse)
+
+        Returns:
+            True if the row was redrawn
+        """
+        signature = (tuple(segments), error)
+        if signature == self._row_signatures[day_index]:
+            return False
+
+        for item in self._row_items[day_index]:
+            self.canvas.delete(item)
+        top = self.row_top(day_index)
+        bottom = top + self.row_height
+        items = [self._create("rectangle", self.x(0), top, self.x(MINUTES_PER_DAY), bottom,
+                              fill=ERROR_COLOR if error else UNMUTED_COLOR, outline="")]
+        if not error:
+            for start, end in merge_to_pixels(segments, self.minutes_per_pixel):
+                # At least one pixel wide, so a one-minute window is still visible
+                right = max(self.x(end), self.x(start) + 1)
+                items.append(self._create("rectangle", self.x(start), top, right, bottom,
+                                          fill=MUTED_COLOR, outline=""))
+        self._row_items[day_index] = items
+        self._row_signatures[day_index] = signature
+        self.rows_drawn += 1
+        return True
+
+
+class RecordingCanvas:
+    """Canvas stand-in that records items instead of drawing them."""
+
+    def __init__(self):
+        self.items = {}
+        self.deleted = 0
+        self._next_id = 1
+
+    def _add(self, kind: str, coords, options) -> int:
+        item = self._next_id
+        self._next_id += 1
+        self.items[item] = (kind, coords, options)
+        return item
+
+    def create_rectangle(self, *coords, **options) -> int:
+        return self._add("rectangle", coords, options)
+
+    def create_line(self, *coords, **options) -> int:
+        return self._add("line", coords, options)
+
+    def create_text(self, *coords, **options) -> int:
+        return self._add("text", coords, options)
+
+    def delete(self, item):
+        if self.items.pop(item, None) is not None:
+            self.deleted += 1